@@ -4,19 +4,46 @@ Supports DRYRUN, SEMI_AUTO, and FULL_AUTO modes.
 """
 
 import asyncio
-from typing import Optional
+import random
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Optional
 from datetime import datetime
-from alpaca.trading.client import TradingClient
-from alpaca.trading.requests import LimitOrderRequest
-from alpaca.trading.enums import OrderSide, TimeInForce
 
 from app.schemas import ApprovedSignal, OrderRecord, OrderStatus, Position
 from app.config import get_settings, get_rules
 from app.storage import Storage
-from app.utils import setup_logger, get_utc_now
+from app.utils import setup_logger, get_utc_now, RateLimiter
+
+# The Alpaca trading SDK is imported lazily inside the live-trading code paths
+# so DRYRUN runs never load it
+if TYPE_CHECKING:
+    from alpaca.trading.requests import LimitOrderRequest
+    from alpaca.trading.stream import TradingStream
 
 logger = setup_logger(__name__)
 
+# Keep-alive pool for the Alpaca REST session
+HTTP_POOL_CONNECTIONS = 10
+HTTP_POOL_MAXSIZE = 50
+
+# Dedicated RNG for approval simulation and retry jitter (not the shared global one)
+_RNG = random.Random()
+
+# Trade-update events after which an order will not change again
+TERMINAL_TRADE_EVENTS = {"fill", "canceled", "rejected", "expired"}
+
+# Order statuses after which an order will not change again
+TERMINAL_ORDER_STATUSES = {"filled", "canceled", "cancelled", "rejected", "expired"}
+
+# Terminal updates kept for orders nobody is waiting on yet (e.g. a fill that
+# arrives before _monitor_order registers); oldest dropped first
+TRADE_UPDATE_BUFFER_SIZE = 256
+
+
+def _status_value(status) -> str:
+    """Plain string for an Alpaca order status (enum or str)."""
+    return getattr(status, "value", status)
+
 
 class BrokerExecutor:
     """
@@ -27,16 +54,80 @@ class BrokerExecutor:
         self.settings = get_settings()
         self.rules = get_rules()
         self.storage = storage
-        self.client = None
 
-        # Initialize Alpaca client only if not in DRYRUN mode
-        if self.settings.run_mode != "DRYRUN":
-            self.client = TradingClient(
+        # Alpaca client, created on first use (never in DRYRUN mode)
+        self._client = None
+
+        # Shared budget for all Alpaca trading API calls (Alpaca allows 200/min);
+        # one limiter for the executor's lifetime, re-rated by refresh_rules
+        self._rate = RateLimiter(max_rate=200, time_period=60.0)
+
+        # Execution rules are read on every order; cache them and refresh on reload
+        self.refresh_rules()
+        self.rules.on_reload(self.refresh_rules)
+
+        # Trade-updates stream (started before the first live order is
+        # submitted) and the per-order futures it resolves, keyed by Alpaca
+        # order ID; terminal updates with no waiter yet are buffered
+        self._stream: Optional["TradingStream"] = None
+        self._stream_task: Optional[asyncio.Task] = None
+        self._pending_orders: dict[str, asyncio.Future] = {}
+        self._unclaimed_updates: OrderedDict[str, Any] = OrderedDict()
+
+        # Order/position writes buffered during execute/close_position and
+        # flushed to storage in one transaction each when the call finishes
+        self._pending_writes: list[OrderRecord] = []
+        self._pending_positions: list[Position] = []
+
+        # order_id -> hash of the state last written, to skip no-op rewrites
+        self._saved_state: dict[str, int] = {}
+
+    @property
+    def client(self):
+        """Alpaca TradingClient, built on first access outside DRYRUN (None in DRYRUN)."""
+        if self._client is None and self.settings.run_mode != "DRYRUN":
+            from alpaca.trading.client import TradingClient
+            from requests.adapters import HTTPAdapter
+
+            self._client = TradingClient(
                 api_key=self.settings.alpaca_api_key,
                 secret_key=self.settings.alpaca_secret_key,
                 paper=True  # Always use paper trading
             )
 
+            # The SDK retries 429/504 itself with a fixed blocking sleep
+            # (retry_attempts can't be set to 0); turn that off so only
+            # _submit_with_backoff's jittered retries run
+            self._client._retry = 0
+
+            # Reuse pooled connections so submit/poll/cancel calls skip the
+            # TCP+TLS handshake
+            adapter = HTTPAdapter(
+                pool_connections=HTTP_POOL_CONNECTIONS,
+                pool_maxsize=HTTP_POOL_MAXSIZE,
+                max_retries=0
+            )
+            self._client._session.mount("https://", adapter)
+
+        return self._client
+
+    @client.setter
+    def client(self, value) -> None:
+        """Inject a client (e.g. a test double)."""
+        self._client = value
+
+    def refresh_rules(self) -> None:
+        """Re-read cached execution rules (called by RulesConfig.reload)."""
+        exec_rules = self.rules.execution
+        self._max_retries = int(exec_rules.get("max_retries", 1))
+        self._retry_base = float(exec_rules.get("retry_backoff_base_seconds", 0.5))
+        self._retry_cap = float(exec_rules.get("retry_backoff_cap_seconds", 8.0))
+        self._order_timeout = float(exec_rules.get("order_timeout_seconds", 30))
+
+        # Re-rate the existing limiter: a new one would forget the budget
+        # already spent and orphan calls waiting on the old one
+        self._rate.set_rate(int(exec_rules.get("api_requests_per_minute", 200)))
+
     async def execute(
         self,
         signal: ApprovedSignal,
@@ -59,15 +150,54 @@ class BrokerExecutor:
             return None
 
         # Execute based on mode
-        if self.settings.run_mode == "DRYRUN":
-            return await self._execute_dryrun(signal, event_id, signal_id)
-        elif self.settings.run_mode == "SEMI_AUTO":
-            return await self._execute_semi_auto(signal, event_id, signal_id)
-        elif self.settings.run_mode == "FULL_AUTO":
-            return await self._execute_full_auto(signal, event_id, signal_id)
-        else:
-            logger.error(f"Unknown run mode: {self.settings.run_mode}")
-            return None
+        try:
+            if self.settings.run_mode != "DRYRUN":
+                # Connect before submitting so a fast fill's update isn't missed
+                self._ensure_trade_stream()
+
+            if self.settings.run_mode == "DRYRUN":
+                return await self._execute_dryrun(signal, event_id, signal_id)
+            elif self.settings.run_mode == "SEMI_AUTO":
+                return await self._execute_semi_auto(signal, event_id, signal_id)
+            elif self.settings.run_mode == "FULL_AUTO":
+                return await self._execute_full_auto(signal, event_id, signal_id)
+            else:
+                logger.error(f"Unknown run mode: {self.settings.run_mode}")
+                return None
+        finally:
+            self._flush_writes()
+
+    async def execute_batch(
+        self,
+        batch: list[tuple[ApprovedSignal, str, str]]
+    ) -> list[Optional[OrderRecord]]:
+        """
+        Execute several approved signals concurrently.
+
+        Each order is still its own Alpaca request (the API has no multi-order
+        endpoint), but submissions run in parallel so a batch costs roughly
+        one broker round-trip instead of one per signal.
+
+        Args:
+            batch: List of (signal, event_id, signal_id) tuples
+
+        Returns:
+            OrderRecord (or None) per input, in the same order as the batch
+        """
+        results = await asyncio.gather(
+            *(self.execute(signal, event_id, signal_id) for signal, event_id, signal_id in batch),
+            return_exceptions=True
+        )
+
+        orders = []
+        for (signal, _, _), result in zip(batch, results):
+            if isinstance(result, Exception):
+                logger.error(f"Batch execution failed for {signal.ticker}: {result}")
+                orders.append(None)
+            else:
+                orders.append(result)
+
+        return orders
 
     async def _execute_dryrun(
         self,
@@ -92,8 +222,8 @@ class BrokerExecutor:
             submitted_at=get_utc_now()
         )
 
-        # Save to database
-        self.storage.save_order(order)
+        # Buffer for database
+        self._pending_writes.append(order)
 
         return order
 
@@ -120,8 +250,7 @@ class BrokerExecutor:
         await asyncio.sleep(1)
 
         # Simulate 80% approval rate
-        import random
-        approved = random.random() < 0.8
+        approved = _RNG.random() < 0.8
 
         if not approved:
             logger.info(f"[SEMI_AUTO] Order rejected by user for {signal.ticker}")
@@ -138,7 +267,7 @@ class BrokerExecutor:
                 submitted_at=get_utc_now(),
                 error_message="Rejected by user"
             )
-            self.storage.save_order(order)
+            self._pending_writes.append(order)
             return order
 
         # Execute the order
@@ -172,6 +301,9 @@ class BrokerExecutor:
         Returns:
             OrderRecord
         """
+        from alpaca.trading.requests import LimitOrderRequest
+        from alpaca.trading.enums import OrderSide, TimeInForce
+
         try:
             # Create limit order request
             order_request = LimitOrderRequest(
@@ -179,75 +311,23 @@ class BrokerExecutor:
                 qty=signal.shares,
                 side=OrderSide.BUY,
                 time_in_force=TimeInForce.DAY,
-                limit_price=signal.entry_price_target
-            )
-
-            # Submit order (run in thread to avoid blocking event loop)
-            alpaca_order = await asyncio.to_thread(
-                self.client.submit_order,
-                order_request
-            )
-
-            logger.info(f"Order placed: {alpaca_order.id} for {signal.ticker}")
-
-            # Create order record
-            order = OrderRecord(
-                order_id=alpaca_order.id,
-                ticker=signal.ticker,
-                event_id=event_id,
-                signal_id=signal_id,
-                side="buy",
-                quantity=signal.shares,
-                order_type="limit",
                 limit_price=signal.entry_price_target,
-                status=OrderStatus.SUBMITTED,
-                submitted_at=get_utc_now()
+                # Stable across retries, so Alpaca rejects a resubmit of an
+                # order it already accepted as a duplicate
+                client_order_id=signal_id
             )
 
-            # Save to database
-            self.storage.save_order(order)
-
-            # Monitor order (simplified - in production would be async task)
-            await self._monitor_order(order, signal)
-
-            return order
+            # Submit order, retrying transient API failures
+            alpaca_order = await self._submit_with_backoff(
+                order_request,
+                max_retries=self._max_retries,
+                base=self._retry_base,
+                cap=self._retry_cap
+            )
 
         except Exception as e:
             logger.error(f"Order placement failed: {e}")
 
-            # Retry once
-            max_retries = self.rules.execution.get("max_retries", 1)
-            if max_retries > 0:
-                retry_delay = self.rules.execution.get("retry_delay_seconds", 2)
-                logger.info(f"Retrying order in {retry_delay}s...")
-                await asyncio.sleep(retry_delay)
-
-                try:
-                    alpaca_order = await asyncio.to_thread(
-                        self.client.submit_order,
-                        order_request
-                    )
-                    logger.info(f"Retry successful: {alpaca_order.id}")
-
-                    order = OrderRecord(
-                        order_id=alpaca_order.id,
-                        ticker=signal.ticker,
-                        event_id=event_id,
-                        signal_id=signal_id,
-                        side="buy",
-                        quantity=signal.shares,
-                        order_type="limit",
-                        limit_price=signal.entry_price_target,
-                        status=OrderStatus.SUBMITTED,
-                        submitted_at=get_utc_now()
-                    )
-                    self.storage.save_order(order)
-                    return order
-
-                except Exception as e2:
-                    logger.error(f"Retry failed: {e2}")
-
-            # Both attempts failed
             order = OrderRecord(
                 order_id=f"FAILED_{signal_id}",
                 ticker=signal.ticker,
@@ -261,83 +341,251 @@ class BrokerExecutor:
                 submitted_at=get_utc_now(),
                 error_message=str(e)
             )
-            self.storage.save_order(order)
+            self._pending_writes.append(order)
             return order
 
-    async def _monitor_order(self, order: OrderRecord, signal: ApprovedSignal) -> None:
+        logger.info(f"Order placed: {alpaca_order.id} for {signal.ticker}")
+
+        # Create order record
+        order = OrderRecord(
+            order_id=str(alpaca_order.id),
+            ticker=signal.ticker,
+            event_id=event_id,
+            signal_id=signal_id,
+            side="buy",
+            quantity=signal.shares,
+            order_type="limit",
+            limit_price=signal.entry_price_target,
+            status=OrderStatus.SUBMITTED,
+            submitted_at=get_utc_now()
+        )
+
+        # Buffer for database
+        self._pending_writes.append(order)
+
+        # Monitor order (simplified - in production would be async task)
+        await self._monitor_order(order, signal, alpaca_order)
+
+        return order
+
+    async def _submit_with_backoff(
+        self,
+        req: "LimitOrderRequest",
+        max_retries: int,
+        base: float = 0.5,
+        cap: float = 8.0
+    ):
         """
-        Monitor order for fill (simplified).
+        Submit an order, retrying transient failures with exponential backoff.
 
-        In production, this would be a separate async task that:
-        1. Polls order status
-        2. Updates database
-        3. Places stop-loss/take-profit orders when filled
-        4. Sends notifications
+        Sleeps use full jitter (uniform in [0, min(cap, base * 2**attempt)]) so
+        tickers that hit the same rate limit don't retry in lockstep. Only 429
+        and 5xx responses are retried; anything else is raised immediately.
+        A 5xx may come back for an order Alpaca did accept, so before
+        resubmitting after one, the order is looked up by its client_order_id
+        and returned if it exists.
+
+        Args:
+            req: Order request to submit
+            max_retries: Retries after the first attempt
+            base: Base delay in seconds
+            cap: Maximum delay in seconds
+
+        Returns:
+            Alpaca Order
         """
-        timeout = self.rules.execution.get("order_timeout_seconds", 30)
+        from alpaca.common.exceptions import APIError
+        from requests import HTTPError
+
+        status = None
+        for attempt in range(max_retries + 1):
+            try:
+                if attempt > 0 and 500 <= status < 600:
+                    existing = await self._find_submitted_order(req)
+                    if existing is not None:
+                        logger.info(f"Order {req.client_order_id} for {req.symbol} was accepted "
+                                    f"despite HTTP {status}; not resubmitting")
+                        return existing
+
+                # Run in thread to avoid blocking event loop
+                async with self._rate:
+                    return await asyncio.to_thread(self.client.submit_order, req)
+
+            except (APIError, HTTPError) as e:
+                status = e.status_code if isinstance(e, APIError) else getattr(e.response, "status_code", None)
+                retryable = status == 429 or (status is not None and 500 <= status < 600)
+                if not retryable or attempt == max_retries:
+                    raise
+
+                delay = _RNG.uniform(0, min(cap, base * 2 ** attempt))
+                logger.warning(f"Order submit for {req.symbol} got HTTP {status}, "
+                               f"retrying in {delay:.2f}s ({attempt + 1}/{max_retries})")
+                await asyncio.sleep(delay)
+
+    async def _find_submitted_order(self, req: "LimitOrderRequest"):
+        """Alpaca order with req's client_order_id, or None if there is none (or no ID)."""
+        from alpaca.common.exceptions import APIError
+
+        if not req.client_order_id:
+            return None
 
         try:
-            # Poll order status
-            for _ in range(int(timeout / 2)):
-                await asyncio.sleep(2)
-
-                # Get order status (run in thread to avoid blocking event loop)
-                alpaca_order = await asyncio.to_thread(
-                    self.client.get_order_by_id,
-                    order.order_id
+            async with self._rate:
+                return await asyncio.to_thread(self.client.get_order_by_client_id, req.client_order_id)
+        except APIError as e:
+            if e.status_code != 404:
+                logger.warning(f"Lookup of order {req.client_order_id} failed: {e}")
+            return None
+
+    async def _monitor_order(self, order: OrderRecord, signal: ApprovedSignal, alpaca_order) -> None:
+        """
+        Wait for the order to reach a terminal state via the trade-updates stream.
+
+        Instead of polling order status every 2s, a future is registered for the
+        order and resolved by the WebSocket handler on fill/cancel/reject/expiry.
+        If nothing arrives within the timeout, the order status is checked once
+        over REST (in case the update was missed) before cancelling.
+
+        Args:
+            order: Order record to update
+            signal: Signal the order was placed for
+            alpaca_order: Order as returned by submit (may already be terminal)
+        """
+        timeout = self._order_timeout
+
+        try:
+            if _status_value(alpaca_order.status) not in TERMINAL_ORDER_STATUSES:
+                future = asyncio.get_running_loop().create_future()
+                self._pending_orders[order.order_id] = future
+                self._ensure_trade_stream()
+
+                # The update may have arrived before the future existed
+                unclaimed = self._unclaimed_updates.pop(order.order_id, None)
+                if unclaimed is not None:
+                    future.set_result(unclaimed)
+
+                try:
+                    alpaca_order = await asyncio.wait_for(future, timeout)
+                except asyncio.TimeoutError:
+                    # Stream may have dropped the update; confirm before cancelling
+                    async with self._rate:
+                        alpaca_order = await asyncio.to_thread(
+                            self.client.get_order_by_id,
+                            order.order_id
+                        )
+                finally:
+                    self._pending_orders.pop(order.order_id, None)
+
+            if alpaca_order.status == "filled":
+                logger.info(f"Order {order.order_id} filled @ ${alpaca_order.filled_avg_price}")
+
+                # Update order record
+                order.status = OrderStatus.FILLED
+                order.filled_at = get_utc_now()
+                order.filled_avg_price = float(alpaca_order.filled_avg_price)
+                order.filled_qty = int(alpaca_order.filled_qty)
+                self._pending_writes.append(order)
+
+                # Create position record
+                position = Position(
+                    ticker=signal.ticker,
+                    entry_price=order.filled_avg_price,
+                    quantity=order.filled_qty,
+                    entry_time=order.filled_at,
+                    event_id=order.event_id,
+                    order_id=order.order_id,
+                    stop_loss=order.filled_avg_price * signal.stop_mult,
+                    take_profit=order.filled_avg_price * signal.tp_mult
                 )
+                self._pending_positions.append(position)
 
-                if alpaca_order.status == "filled":
-                    logger.info(f"Order {order.order_id} filled @ ${alpaca_order.filled_avg_price}")
-
-                    # Update order record
-                    order.status = OrderStatus.FILLED
-                    order.filled_at = get_utc_now()
-                    order.filled_avg_price = float(alpaca_order.filled_avg_price)
-                    order.filled_qty = int(alpaca_order.filled_qty)
-                    self.storage.save_order(order)
-
-                    # Create position record
-                    position = Position(
-                        ticker=signal.ticker,
-                        entry_price=order.filled_avg_price,
-                        quantity=order.filled_qty,
-                        entry_time=order.filled_at,
-                        event_id=order.event_id,
-                        order_id=order.order_id,
-                        stop_loss=order.filled_avg_price * (1 - signal.hard_stop_bp / 10000),
-                        take_profit=order.filled_avg_price * (1 + signal.take_profit_bp / 10000)
-                    )
-                    self.storage.save_position(position)
-
-                    logger.info(f"Position opened: {position.quantity} shares @ ${position.entry_price:.2f}")
-                    break
-
-                elif alpaca_order.status in ["canceled", "cancelled", "rejected", "expired"]:
-                    # Note: Alpaca uses US spelling "canceled" (not "cancelled")
-                    logger.warning(f"Order {order.order_id} status: {alpaca_order.status}")
-                    order.status = OrderStatus.CANCELLED
-                    order.error_message = f"Order {alpaca_order.status}"
-                    self.storage.save_order(order)
-                    break
+                logger.info(f"Position opened: {position.quantity} shares @ ${position.entry_price:.2f}")
+
+            elif alpaca_order.status in ["canceled", "cancelled", "rejected", "expired"]:
+                # Note: Alpaca uses US spelling "canceled" (not "cancelled")
+                logger.warning(f"Order {order.order_id} status: {alpaca_order.status}")
+                order.status = OrderStatus.CANCELLED
+                order.error_message = f"Order {alpaca_order.status}"
+                self._pending_writes.append(order)
 
             else:
                 # Timeout - cancel order
                 logger.warning(f"Order {order.order_id} timeout, cancelling...")
                 try:
-                    await asyncio.to_thread(
-                        self.client.cancel_order_by_id,
-                        order.order_id
-                    )
+                    async with self._rate:
+                        await asyncio.to_thread(
+                            self.client.cancel_order_by_id,
+                            order.order_id
+                        )
                     order.status = OrderStatus.CANCELLED
                     order.error_message = "Timeout"
-                    self.storage.save_order(order)
+                    self._pending_writes.append(order)
                 except Exception as e:
                     logger.error(f"Failed to cancel order: {e}")
 
         except Exception as e:
             logger.error(f"Error monitoring order: {e}")
 
+    def _ensure_trade_stream(self) -> None:
+        """Start the trade-updates WebSocket on first use (restarts if it died)."""
+        if self._stream_task is not None and not self._stream_task.done():
+            return
+
+        from alpaca.trading.stream import TradingStream
+
+        self._stream = TradingStream(
+            api_key=self.settings.alpaca_api_key,
+            secret_key=self.settings.alpaca_secret_key,
+            paper=True
+        )
+        self._stream.subscribe_trade_updates(self._on_trade_update)
+        # TradingStream.run() owns its own event loop; run the coroutine on ours.
+        # _run_forever is private API: alpaca-py is pinned in requirements.txt
+        # for this reason, so re-check it when upgrading
+        self._stream_task = asyncio.create_task(self._stream._run_forever())
+        logger.info("Trade-updates stream started")
+
+    async def _on_trade_update(self, update) -> None:
+        """
+        Resolve the waiter for an order once it reaches a terminal state.
+
+        Args:
+            update: alpaca TradeUpdate pushed by the stream
+        """
+        event = getattr(update.event, "value", update.event)
+        if event not in TERMINAL_TRADE_EVENTS:
+            return
+
+        order_id = str(update.order.id)
+        future = self._pending_orders.get(order_id)
+        if future is None:
+            # Not registered yet (or not ours to wait on): keep it for a late waiter
+            self._unclaimed_updates[order_id] = update.order
+            while len(self._unclaimed_updates) > TRADE_UPDATE_BUFFER_SIZE:
+                self._unclaimed_updates.popitem(last=False)
+        elif not future.done():
+            future.set_result(update.order)
+
+    async def close(self) -> None:
+        """Stop the trade-updates stream if it was started."""
+        if self._stream is None:
+            return
+
+        try:
+            await self._stream.stop_ws()
+        except Exception as e:
+            logger.error(f"Failed to stop trade stream: {e}")
+
+        if self._stream_task is not None:
+            self._stream_task.cancel()
+            try:
+                await self._stream_task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+        self._stream = None
+        self._stream_task = None
+
     async def close_position(
         self,
         position: Position,
@@ -360,13 +608,37 @@ class BrokerExecutor:
         logger.info(f"[CLOSE] {position.ticker}: {quantity} shares @ ${price:.2f} ({reason})")
 
         # Execute based on mode
-        if self.settings.run_mode == "DRYRUN":
-            return await self._close_dryrun(position, quantity, price, reason)
-        elif self.settings.run_mode in ["SEMI_AUTO", "FULL_AUTO"]:
-            return await self._place_sell_order(position, quantity, price, reason)
-        else:
-            logger.error(f"Unknown run mode: {self.settings.run_mode}")
-            return None
+        try:
+            if self.settings.run_mode == "DRYRUN":
+                return await self._close_dryrun(position, quantity, price, reason)
+            elif self.settings.run_mode in ["SEMI_AUTO", "FULL_AUTO"]:
+                return await self._place_sell_order(position, quantity, price, reason)
+            else:
+                logger.error(f"Unknown run mode: {self.settings.run_mode}")
+                return None
+        finally:
+            self._flush_writes()
+
+    def _flush_writes(self) -> None:
+        """Write buffered orders and positions to storage."""
+        # Swap buffers first so concurrent executions don't write twice
+        orders, self._pending_writes = self._pending_writes, []
+        positions, self._pending_positions = self._pending_positions, []
+
+        # Only write orders whose mutable state changed since their last save
+        dirty = {}
+        for order in orders:
+            state = hash((order.status, order.filled_avg_price, order.filled_qty, order.error_message))
+            if self._saved_state.get(order.order_id) != state:
+                dirty[order.order_id] = (order, state)
+
+        # Orders first: positions reference them. One commit for both
+        with self.storage.transaction():
+            self.storage.save_orders([order for order, _ in dirty.values()])
+            self.storage.save_positions(positions)
+
+        for order_id, (_, state) in dirty.items():
+            self._saved_state[order_id] = state
 
     async def _close_dryrun(
         self,
@@ -398,8 +670,8 @@ class BrokerExecutor:
             filled_qty=quantity
         )
 
-        # Save to database
-        self.storage.save_order(order)
+        # Buffer for database
+        self._pending_writes.append(order)
 
         return order
 
@@ -411,6 +683,9 @@ class BrokerExecutor:
         reason: str
     ) -> OrderRecord:
         """Place actual sell order via Alpaca API."""
+        from alpaca.trading.requests import LimitOrderRequest
+        from alpaca.trading.enums import OrderSide, TimeInForce
+
         try:
             # Create sell limit order request
             order_request = LimitOrderRequest(
@@ -418,20 +693,24 @@ class BrokerExecutor:
                 qty=quantity,
                 side=OrderSide.SELL,
                 time_in_force=TimeInForce.DAY,
-                limit_price=price
+                limit_price=price,
+                # One ID per close attempt, shared by its retries
+                client_order_id=f"{position.order_id}_SELL_{reason}_{int(get_utc_now().timestamp())}"
             )
 
-            # Submit order (run in thread to avoid blocking event loop)
-            alpaca_order = await asyncio.to_thread(
-                self.client.submit_order,
-                order_request
+            # Submit order, retrying transient API failures
+            alpaca_order = await self._submit_with_backoff(
+                order_request,
+                max_retries=self._max_retries,
+                base=self._retry_base,
+                cap=self._retry_cap
             )
 
             logger.info(f"Sell order placed: {alpaca_order.id} for {position.ticker} ({reason})")
 
             # Create order record
             order = OrderRecord(
-                order_id=alpaca_order.id,
+                order_id=str(alpaca_order.id),
                 ticker=position.ticker,
                 event_id=position.event_id,
                 signal_id=f"exit_{reason}",
@@ -443,8 +722,8 @@ class BrokerExecutor:
                 submitted_at=get_utc_now()
             )
 
-            # Save to database
-            self.storage.save_order(order)
+            # Buffer for database
+            self._pending_writes.append(order)
 
             return order
 
@@ -464,7 +743,7 @@ class BrokerExecutor:
                 submitted_at=get_utc_now(),
                 error_message=str(e)
             )
-            self.storage.save_order(order)
+            self._pending_writes.append(order)
             return order
 
 
@@ -501,5 +780,4 @@ async def main():
 
 
 if __name__ == "__main__":
-    import asyncio
     asyncio.run(main())
@@ -3,10 +3,19 @@ Configuration management for the automated trading system.
 Loads settings from environment variables and YAML files.
 """
 
+import inspect
 import os
+import weakref
+from functools import cache, cached_property
 from pathlib import Path
-from typing import Literal
+from typing import Callable, Literal
 import yaml
+
+# libyaml-backed loader when available (much faster than the pure-Python one)
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
 
@@ -17,6 +26,7 @@ class Settings(BaseSettings):
     # Anthropic API
     anthropic_api_key: str = Field(..., alias="ANTHROPIC_API_KEY")
     anthropic_model: str = Field(default="claude-3-haiku-20240307", alias="ANTHROPIC_MODEL")
+    llm_requests_per_minute: int = Field(default=50, alias="LLM_REQUESTS_PER_MINUTE")
 
     # Alpaca Trading API
     alpaca_api_key: str = Field(..., alias="ALPACA_API_KEY")
@@ -32,6 +42,7 @@ class Settings(BaseSettings):
 
     # Slack (optional)
     slack_webhook_url: str = Field(default="", alias="SLACK_WEBHOOK_URL")
+    slack_minimal: bool = Field(default=False, alias="SLACK_MINIMAL")  # Plain-text payloads (no blocks)
 
     # Trading configuration
     run_mode: Literal["DRYRUN", "SEMI_AUTO", "FULL_AUTO"] = Field(
@@ -57,13 +68,19 @@ class Settings(BaseSettings):
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
-        case_sensitive=False
+        case_sensitive=False,
+        frozen=True
     )
 
-    @property
-    def tickers(self) -> list[str]:
-        """Parse ticker whitelist into list."""
-        return [t.strip().upper() for t in self.ticker_whitelist.split(",") if t.strip()]
+    @cached_property
+    def tickers(self) -> tuple[str, ...]:
+        """Parse ticker whitelist into an ordered tuple (computed once)."""
+        return tuple(t.strip().upper() for t in self.ticker_whitelist.split(",") if t.strip())
+
+    @cached_property
+    def tickers_set(self) -> frozenset[str]:
+        """Ticker whitelist as a set for O(1) membership checks."""
+        return frozenset(self.tickers)
 
     @property
     def slack_enabled(self) -> bool:
@@ -74,8 +91,14 @@ class Settings(BaseSettings):
 class RulesConfig:
     """Trading rules loaded from YAML configuration."""
 
+    # Sections are looked up on hot paths, so resolve each once per load;
+    # reload() drops them from __dict__ to invalidate.
+    _SECTIONS = ("entry", "skip", "risk", "exit", "execution", "monitoring")
+
     def __init__(self, config_path: str = "configs/rules.yaml"):
         self.config_path = Path(config_path)
+        # Zero-argument getters returning the callback, or None once it's gone
+        self._reload_callbacks: list[Callable[[], Callable[[], None] | None]] = []
         self._rules = self._load_rules()
 
     def _load_rules(self) -> dict:
@@ -83,63 +106,81 @@ class RulesConfig:
         if not self.config_path.exists():
             raise FileNotFoundError(f"Rules config not found: {self.config_path}")
 
+        self._mtime_ns = self.config_path.stat().st_mtime_ns
         with open(self.config_path, "r") as f:
-            return yaml.safe_load(f)
+            return yaml.load(f, Loader=_YamlLoader)
 
-    @property
+    @cached_property
     def entry(self) -> dict:
         """Entry rules."""
         return self._rules.get("entry", {})
 
-    @property
+    @cached_property
     def skip(self) -> dict:
         """Skip rules."""
         return self._rules.get("skip", {})
 
-    @property
+    @cached_property
     def risk(self) -> dict:
         """Risk management rules."""
         return self._rules.get("risk", {})
 
-    @property
+    @cached_property
     def exit(self) -> dict:
         """Exit rules."""
         return self._rules.get("exit", {})
 
-    @property
+    @cached_property
     def execution(self) -> dict:
         """Execution rules."""
         return self._rules.get("execution", {})
 
-    @property
+    @cached_property
     def monitoring(self) -> dict:
         """Monitoring rules."""
         return self._rules.get("monitoring", {})
 
-    def reload(self) -> None:
-        """Reload rules from file."""
-        self._rules = self._load_rules()
+    def on_reload(self, callback: Callable[[], None]) -> None:
+        """
+        Register a callback to run after rules are reloaded.
 
+        Bound methods are held weakly: the rules object is a process-wide
+        singleton and must not keep every component that registered with it
+        alive. Their registration lapses when the owner is collected.
+        """
+        if inspect.ismethod(callback):
+            self._reload_callbacks.append(weakref.WeakMethod(callback))
+        else:
+            self._reload_callbacks.append(lambda: callback)
 
-# Singleton instances
-_settings: Settings | None = None
-_rules: RulesConfig | None = None
-
+    def reload(self) -> None:
+        """Reload rules from file and notify registered callbacks."""
+        # Unchanged file: keep the parsed rules (a stat is far cheaper than a parse)
+        if self.config_path.exists() and self.config_path.stat().st_mtime_ns == self._mtime_ns:
+            return
 
+        self._rules = self._load_rules()
+        for section in self._SECTIONS:
+            self.__dict__.pop(section, None)
+        # Drop registrations whose owner has been collected
+        callbacks = [ref() for ref in self._reload_callbacks]
+        self._reload_callbacks = [ref for ref, cb in zip(self._reload_callbacks, callbacks) if cb is not None]
+        for callback in callbacks:
+            if callback is not None:
+                callback()
+
+
+# Singleton instances (use .cache_clear() to rebuild, e.g. in tests)
+@cache
 def get_settings() -> Settings:
     """Get application settings singleton."""
-    global _settings
-    if _settings is None:
-        _settings = Settings()
-    return _settings
+    return Settings()
 
 
+@cache
 def get_rules() -> RulesConfig:
     """Get rules configuration singleton."""
-    global _rules
-    if _rules is None:
-        _rules = RulesConfig()
-    return _rules
+    return RulesConfig()
 
 
 # RSS Feed sources
@@ -4,16 +4,21 @@ Analyzes news headlines and classifies them into structured EventCards.
 """
 
 import asyncio
+import hashlib
 import json
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
 from typing import Optional
-from anthropic import Anthropic
+import orjson
 from pydantic import ValidationError
 
 from app.schemas import EventCard, RSSFeedItem
 from app.config import get_settings
 from app.utils import (
     generate_event_id, get_market_session,
-    get_utc_now, setup_logger, extract_tickers_from_text
+    get_utc_now, setup_logger, compile_ticker_pattern, RateLimiter
 )
 
 logger = setup_logger(__name__)
@@ -23,7 +28,7 @@ logger = setup_logger(__name__)
 SYSTEM_PROMPT = """You are a financial news classification system. Your task is to analyze news headlines and extract structured information.
 
 CRITICAL RULES:
-1. Output ONLY valid JSON matching the exact schema provided
+1. Report your analysis ONLY through the emit_event tool, matching its schema exactly
 2. Do NOT guess or speculate - if uncertain, set reliability < 0.6
 3. sentiment: -1.0 (very negative) to 1.0 (very positive)
 4. reliability: 0.0 (uncertain) to 1.0 (highly confident)
@@ -71,16 +76,62 @@ EVENT_SCHEMA = {
 }
 
 
+# Interpretation cache: aggregators republish the same headline across feeds
+LLM_CACHE_TTL_SECONDS = 3600
+LLM_CACHE_MAX_SIZE = 10_000
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+
+# Max in-flight Claude requests (keeps concurrent batches under rate limits)
+LLM_MAX_CONCURRENCY = 8
+
+# Hold new requests until the window resets once fewer than this many remain
+LLM_RATE_LIMIT_HEADROOM = 5
+
+
+# Structured output: Claude fills in the event via a forced tool call
+EVENT_TOOL_NAME = "emit_event"
+EVENT_TOOLS = [
+    {
+        "name": EVENT_TOOL_NAME,
+        "description": "Record the classification of a financial news item.",
+        "input_schema": EVENT_SCHEMA
+    }
+]
+
+# Static system prompt, marked for server-side prompt caching
+SYSTEM_BLOCKS = [
+    {"type": "text", "text": SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}
+]
+
+# Decoder for the text fallback (raw_decode stops at the end of the first object)
+_JSON_DECODER = json.JSONDecoder()
+
+
 class LLMInterpreter:
     """
     Interprets RSS feed items using Claude LLM.
     """
 
     def __init__(self):
+        # Imported here so modules that only need the prompt/schema constants
+        # don't pay for loading the SDK
+        from anthropic import AsyncAnthropic
+
         self.settings = get_settings()
-        self.client = Anthropic(api_key=self.settings.anthropic_api_key)
+        self.client = AsyncAnthropic(api_key=self.settings.anthropic_api_key)
         self.model = self.settings.anthropic_model
         self.whitelist = self.settings.tickers
+        self._ticker_re = compile_ticker_pattern(tuple(self.whitelist))
+        self._sem = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+        # Paces request starts to the account's RPM limit; waits overlap
+        # with calls already in flight
+        self._rate = RateLimiter(self.settings.llm_requests_per_minute, time_period=60.0)
+        # Monotonic time before which no request is started (set from the
+        # provider's rate-limit headers)
+        self._paused_until = 0.0
+
+        # cache key -> (stored_at, llm_output); ordered for LRU eviction
+        self._cache: OrderedDict[str, tuple[float, dict]] = OrderedDict()
 
     async def interpret(self, item: RSSFeedItem, max_retries: int = 2) -> Optional[EventCard]:
         """
@@ -93,32 +144,46 @@ class LLMInterpreter:
         Returns:
             EventCard if successful, None if failed
         """
+        cache_key = self._cache_key(item)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            logger.debug("LLM cache hit: %.50s...", item.headline)
+            try:
+                return self._build_event_card(item, cached)
+            except ValidationError as e:
+                logger.warning(f"Cached interpretation invalid, re-querying: {e}")
+                self._cache.pop(cache_key, None)
+
         for attempt in range(max_retries):
             try:
                 # Build user prompt
                 user_prompt = self._build_user_prompt(item)
 
-                # Call Claude (run in thread to avoid blocking event loop)
-                response = await asyncio.to_thread(
-                    self.client.messages.create,
-                    model=self.model,
-                    max_tokens=500,
-                    temperature=0.3,  # Lower temperature for more consistent output
-                    system=SYSTEM_PROMPT,
-                    messages=[
-                        {"role": "user", "content": user_prompt}
-                    ]
-                )
-
-                # Extract JSON from response
-                content = response.content[0].text.strip()
-                llm_output = self._extract_json(content)
+                # Call Claude
+                async with self._sem:
+                    await self._wait_for_headroom()
+                    await self._rate.acquire()
+                    raw = await self.client.messages.with_raw_response.create(
+                        model=self.model,
+                        max_tokens=500,
+                        temperature=0.3,  # Lower temperature for more consistent output
+                        system=SYSTEM_BLOCKS,
+                        tools=EVENT_TOOLS,
+                        tool_choice={"type": "tool", "name": EVENT_TOOL_NAME},
+                        messages=[
+                            {"role": "user", "content": user_prompt}
+                        ]
+                    )
+                    self._update_rate_limit(raw.headers)
+
+                llm_output = self._parse_response(raw.parse())
 
                 # Create EventCard
                 event_card = self._build_event_card(item, llm_output)
+                self._cache_put(cache_key, llm_output)
 
-                logger.debug(f"Successfully interpreted: {item.headline[:50]}... "
-                           f"(category={event_card.category}, sentiment={event_card.sentiment:.2f})")
+                logger.debug("Successfully interpreted: %.50s... (category=%s, sentiment=%.2f)",
+                             item.headline, event_card.category, event_card.sentiment)
                 return event_card
 
             except ValidationError as e:
@@ -128,14 +193,118 @@ class LLMInterpreter:
                     return None
 
             except Exception as e:
+                response = getattr(e, "response", None)
+                if response is not None and response.status_code == 429:
+                    self._update_rate_limit(response.headers, throttled=True)
                 logger.error(f"LLM interpretation error: {e}")
                 return None
 
         return None
 
+    async def interpret_many(self, items: list[RSSFeedItem]) -> list[Optional[EventCard]]:
+        """
+        Interpret several RSS items concurrently.
+
+        Requests run in parallel, bounded by the interpreter's semaphore and
+        paced by its requests-per-minute limiter.
+
+        Args:
+            items: RSS feed items
+
+        Returns:
+            EventCard (or None) per input, in the same order as items
+        """
+        results = await asyncio.gather(
+            *(self.interpret(item) for item in items),
+            return_exceptions=True
+        )
+
+        events = []
+        for item, result in zip(items, results):
+            if isinstance(result, Exception):
+                logger.error(f"LLM interpretation error for {item.headline[:50]}: {result}")
+                events.append(None)
+            else:
+                events.append(result)
+
+        return events
+
+    async def _wait_for_headroom(self) -> None:
+        """Sleep until the provider's rate-limit window has room again."""
+        delay = self._paused_until - time.monotonic()
+        if delay > 0:
+            logger.info(f"LLM rate limit nearly exhausted, waiting {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    def _update_rate_limit(self, headers, throttled: bool = False) -> None:
+        """
+        Pause new requests based on the provider's rate-limit headers.
+
+        Nothing waits while the remaining request budget is above
+        LLM_RATE_LIMIT_HEADROOM; below it (or after a 429), requests are held
+        until the advertised reset / retry-after time.
+
+        Args:
+            headers: Response headers from the Anthropic API
+            throttled: Whether the response was a 429
+        """
+        delay = 0.0
+
+        retry_after = headers.get("retry-after")
+        if throttled and retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                pass
+
+        remaining = headers.get("anthropic-ratelimit-requests-remaining")
+        reset = headers.get("anthropic-ratelimit-requests-reset")
+        if reset:
+            try:
+                if throttled or (remaining is not None and int(remaining) < LLM_RATE_LIMIT_HEADROOM):
+                    reset_at = datetime.fromisoformat(reset)
+                    delay = max(delay, (reset_at - datetime.now(timezone.utc)).total_seconds())
+            except ValueError:
+                pass
+
+        if delay > 0:
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+
+    def _cache_key(self, item: RSSFeedItem) -> str:
+        """
+        Build cache key from normalized headline and snippet.
+
+        Case, punctuation and whitespace are dropped so trivially re-formatted
+        republications of the same story share one entry.
+        """
+        text = f"{item.headline} {item.snippet or ''}".lower()
+        normalized = _NON_ALNUM_RE.sub(" ", text).strip()
+        return hashlib.blake2b(normalized.encode(), digest_size=16).hexdigest()
+
+    def _cache_get(self, key: str) -> Optional[dict]:
+        """Return cached LLM output if present and not expired."""
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+
+        stored_at, llm_output = entry
+        if time.monotonic() - stored_at > LLM_CACHE_TTL_SECONDS:
+            del self._cache[key]
+            return None
+
+        self._cache.move_to_end(key)
+        return llm_output
+
+    def _cache_put(self, key: str, llm_output: dict) -> None:
+        """Store LLM output, evicting least recently used entries."""
+        self._cache[key] = (time.monotonic(), llm_output)
+        self._cache.move_to_end(key)
+        while len(self._cache) > LLM_CACHE_MAX_SIZE:
+            self._cache.popitem(last=False)
+
     def _build_user_prompt(self, item: RSSFeedItem) -> str:
         """Build user prompt for Claude."""
-        prompt = f"""Analyze this financial news item and return ONLY a JSON object:
+        prompt = f"""Analyze this financial news item and report it with the {EVENT_TOOL_NAME} tool:
 
 Headline: {item.headline}
 Source: {item.source}
@@ -144,43 +313,52 @@ Published: {item.published_at.isoformat()}"""
         if item.snippet:
             prompt += f"\nSnippet: {item.snippet[:300]}"
 
-        prompt += f"""
-
-Return JSON matching this schema:
-{json.dumps(EVENT_SCHEMA, indent=2)}
+        prompt += """
 
 Remember: Be conservative with scores. Use category="other" and low reliability if uncertain."""
 
         return prompt
 
+    def _parse_response(self, response) -> dict:
+        """
+        Get the event fields from Claude's response.
+
+        With forced tool use the arguments arrive already parsed; text
+        parsing is kept only as a fallback for responses without a tool call.
+        """
+        for block in response.content:
+            if block.type == "tool_use" and block.name == EVENT_TOOL_NAME:
+                return block.input
+
+        text = "".join(block.text for block in response.content if block.type == "text")
+        return self._extract_json(text.strip())
+
     def _extract_json(self, content: str) -> dict:
         """Extract JSON from Claude's response."""
         # Try to parse directly
         try:
-            return json.loads(content)
-        except json.JSONDecodeError:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError:
             pass
 
-        # Try to find JSON in code blocks
-        if "```json" in content:
-            start = content.find("```json") + 7
-            end = content.find("```", start)
-            content = content[start:end].strip()
-        elif "```" in content:
-            start = content.find("```") + 3
-            end = content.find("```", start)
-            content = content[start:end].strip()
-
-        # Try parsing again
+        # Decode the first object in place and stop at its closing brace, so
+        # code fences or prose around it are never scanned or re-parsed
+        start = content.find("{")
+        if start == -1:
+            raise ValueError("Failed to extract valid JSON: no object in response")
+
         try:
-            return json.loads(content)
+            obj, _ = _JSON_DECODER.raw_decode(content, start)
         except json.JSONDecodeError as e:
             raise ValueError(f"Failed to extract valid JSON: {e}")
 
+        return obj
+
     def _build_event_card(self, item: RSSFeedItem, llm_output: dict) -> EventCard:
         """Build EventCard from RSS item and LLM output."""
         # Extract tickers from headline
-        tickers = extract_tickers_from_text(item.headline + " " + (item.snippet or ""), self.whitelist)
+        text = f"{item.headline} {item.snippet or ''}".upper()
+        tickers = list(dict.fromkeys(self._ticker_re.findall(text)))
 
         # Determine session
         session = get_market_session(item.published_at)
@@ -234,5 +412,4 @@ async def main():
 
 
 if __name__ == "__main__":
-    import asyncio
     asyncio.run(main())
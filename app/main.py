@@ -18,7 +18,7 @@ from app.broker_exec import BrokerExecutor
 from app.trade_manager import TradeManager
 from app.notifier import Notifier
 from app.storage import Storage
-from app.schemas import RunRecord
+from app.schemas import ExitAction, RunRecord
 from app.config import get_settings
 from app.utils import setup_logger, get_utc_now
 
@@ -45,6 +45,10 @@ class AutoTrader:
         self.trade_manager = TradeManager()
         self.notifier = Notifier()
 
+        # Serializes risk approval (and its entry reservation) across
+        # concurrently processed tickers; execution runs outside it
+        self._risk_lock = asyncio.Lock()
+
     async def run_cycle(self) -> RunRecord:
         """
         Execute one complete trading cycle.
@@ -70,7 +74,7 @@ class AutoTrader:
 
             # Step 1: Fetch RSS items
             logger.info("Step 1: Fetching RSS feeds...")
-            since_time = self._get_since_time()
+            since_time = self._get_since_time(started_at)
             rss_items = await self.rss_fetcher.fetch_recent_items(
                 since=since_time,
                 delay_minutes=self.settings.cycle_minutes
@@ -79,22 +83,16 @@ class AutoTrader:
 
             # Step 2: Interpret events with LLM
             logger.info("Step 2: Interpreting events with LLM...")
-            events = []
-            for item in rss_items:
-                # Check if event already exists
-                if self.storage.event_exists(item.cluster_id):
-                    logger.debug(f"Event already exists: {item.cluster_id}")
-                    continue
+            # Skip items whose event already exists (one bulk lookup)
+            existing = self.storage.events_exist([item.cluster_id for item in rss_items])
+            new_items = [item for item in rss_items if item.cluster_id not in existing]
+            if existing:
+                logger.debug(f"Skipping {len(rss_items) - len(new_items)} already-seen items")
 
-                # Interpret with LLM
-                event = await self.llm_interpreter.interpret(item)
-                if event:
-                    events.append(event)
-                    # Save to database
-                    self.storage.save_event(event)
-
-                # Rate limiting
-                await asyncio.sleep(0.5)
+            # Interpret with LLM (concurrent, bounded by the interpreter), then
+            # save the whole batch in one transaction
+            events = [event for event in await self.llm_interpreter.interpret_many(new_items) if event]
+            self.storage.save_events(events)
 
             logger.info(f"Interpreted {len(events)} new events")
             run_record.events_fetched = len(events)
@@ -112,7 +110,7 @@ class AutoTrader:
 
             for event in all_events:
                 try:
-                    order_count = await self._process_event(event)
+                    order_count = await self._process_event(event, run_record.errors)
                     signals_generated += 1
                     orders_placed += order_count
 
@@ -160,41 +158,94 @@ class AutoTrader:
 
         return run_record
 
-    async def _process_event(self, event) -> int:
+    async def aclose(self) -> None:
+        """Release long-lived connections and worker threads."""
+        await self.notifier.aclose()
+        await self.rss_fetcher.close()
+        await self.broker.close()
+        self.market_scanner.close()
+        self.storage.close()
+
+    async def _process_event(self, event, errors: list[str]) -> int:
         """
         Process a single event through the entire pipeline.
 
+        If at least one ticker was processed, the event is marked processed
+        and the other tickers' failures are only recorded, so tickers that
+        already traded aren't bought again when the event is retried. If
+        every ticker failed, the first error is raised and the event is
+        retried next cycle.
+
         Args:
             event: EventCard to process
+            errors: Run error list that per-ticker failures are appended to
 
         Returns:
             Number of orders placed
         """
         logger.info(f"Processing event: {event.headline[:60]}...")
 
-        processed_any = False  # Track if any ticker was successfully processed
-        orders_count = 0  # Track orders placed
+        # Warm the scanner's cache for all tickers with one batched fetch
+        await self.market_scanner.get_market_states(event.tickers)
 
-        # For each ticker mentioned in the event
-        for ticker in event.tickers:
-            try:
-                # Step 3a: Get market state
-                logger.debug(f"Getting market state for {ticker}...")
-                market_state = await self.market_scanner.get_market_state(ticker)
+        # Tickers are independent I/O, so process them concurrently
+        results = await asyncio.gather(
+            *(self._process_ticker(event, ticker) for ticker in event.tickers),
+            return_exceptions=True
+        )
 
-                if not market_state:
-                    logger.warning(f"No market data for {ticker}, will retry in next cycle")
-                    continue
+        failures = [(t, r) for t, r in zip(event.tickers, results) if isinstance(r, Exception)]
+        processed = [r for r in results if r is not None and not isinstance(r, Exception)]
+        orders_count = sum(processed)
+
+        # Nothing went through: leave the event unprocessed for the next cycle
+        if failures and not processed:
+            raise failures[0][1]
 
-                # Step 3b: Evaluate with rule engine
-                logger.debug(f"Evaluating rules for {ticker}...")
-                pre_signal = self.rule_engine.evaluate(event, market_state)
+        for ticker, error in failures:
+            errors.append(f"Event {event.event_id[:8]} {ticker}: {error}")
 
+        # Mark event as processed if at least one ticker was successfully processed
+        if processed:
+            self.storage.mark_event_processed(event.event_id)
+            logger.debug(f"Event {event.event_id[:8]} marked as processed")
+
+        return orders_count
+
+    async def _process_ticker(self, event, ticker: str) -> Optional[int]:
+        """
+        Process one ticker of an event: scan, evaluate, approve, execute, notify.
+
+        Args:
+            event: EventCard being processed
+            ticker: Ticker symbol
+
+        Returns:
+            Number of orders placed (0 or 1), or None if the ticker was skipped
+        """
+        order = None
+        try:
+            # Step 3a: Get market state
+            logger.debug("Getting market state for %s...", ticker)
+            market_state = await self.market_scanner.get_market_state(ticker)
+
+            if not market_state:
+                logger.warning(f"No market data for {ticker}, will retry in next cycle")
+                return None
+
+            # Step 3b: Evaluate with rule engine
+            logger.debug("Evaluating rules for %s...", ticker)
+            pre_signal = self.rule_engine.evaluate(event, market_state, verbose=False)
+
+            # Steps 3c-3d read portfolio limits that entries change, so
+            # concurrent tickers go through them one at a time
+            reservation = None
+            async with self._risk_lock:
                 # Step 3c: Get portfolio state
                 portfolio = await self.risk_guard.get_portfolio_state()
 
                 # Step 3d: Apply risk management
-                logger.debug(f"Applying risk management for {ticker}...")
+                logger.debug("Applying risk management for %s...", ticker)
                 approved_signal = await self.risk_guard.approve_signal(
                     pre_signal, market_state, portfolio
                 )
@@ -202,39 +253,41 @@ class AutoTrader:
                 # Save signal to database
                 signal_id = self.storage.save_signal(pre_signal, approved_signal)
 
-                # Step 3e: Execute if approved
-                order = None
                 if approved_signal.approved:
-                    logger.info(f"Signal approved for {ticker}, executing...")
+                    # Held against position/sector limits until the order
+                    # settles, so other tickers needn't wait for the fill
+                    reservation = self.risk_guard.reserve_entry(ticker, approved_signal.size_final_usd)
+
+            # Step 3e: Execute if approved (outside the lock: may wait for a fill)
+            if reservation is not None:
+                logger.info(f"Signal approved for {ticker}, executing...")
+                try:
                     order = await self.broker.execute(
                         approved_signal, event.event_id, signal_id
                     )
+                finally:
+                    self.risk_guard.release_entry(reservation)
 
-                    if order:
-                        logger.info(f"Order placed: {order.order_id}")
-                        orders_count += 1  # Increment order counter
+                if order:
+                    logger.info(f"Order placed: {order.order_id}")
 
-                # Step 3f: Send notification
-                await self.notifier.notify_signal(
-                    event, pre_signal, approved_signal, order
-                )
-
-                logger.debug(f"Completed processing {ticker}: "
-                           f"action={pre_signal.action}, "
-                           f"approved={approved_signal.approved}")
+            # Step 3f: Send notification
+            await self.notifier.notify_signal(
+                event, pre_signal, approved_signal, order
+            )
 
-                processed_any = True  # Mark that at least one ticker was processed
+            # Lazy %-formatting: per-ticker debug lines cost nothing at INFO
+            logger.debug("Completed processing %s: action=%s, approved=%s",
+                         ticker, pre_signal.action, approved_signal.approved)
 
-            except Exception as e:
-                logger.error(f"Error processing {ticker} for event {event.event_id}: {e}")
-                raise
+            return 1 if order else 0
 
-        # Mark event as processed if at least one ticker was successfully processed
-        if processed_any:
-            self.storage.mark_event_processed(event.event_id)
-            logger.debug(f"Event {event.event_id[:8]} marked as processed")
-
-        return orders_count
+        except Exception as e:
+            logger.error(f"Error processing {ticker} for event {event.event_id}: {e}")
+            # A placed order stands; failing the ticker would buy it again on retry
+            if order:
+                return 1
+            raise
 
     async def _monitor_positions(self) -> None:
         """
@@ -249,10 +302,18 @@ class AutoTrader:
 
         logger.info(f"Monitoring {len(positions)} open positions")
 
+        # Current prices for all positions in one batched fetch, bypassing the
+        # cache so stops and targets are checked against a fresh quote
+        market_states = await self.market_scanner.get_market_states(
+            [position.ticker for position in positions], max_age=0
+        )
+
+        # One clock reading for the whole sweep: every hold time uses the same now
+        now = get_utc_now()
+
         for position in positions:
             try:
-                # Get current market price
-                market_state = await self.market_scanner.get_market_state(position.ticker)
+                market_state = market_states.get(position.ticker)
 
                 if not market_state:
                     logger.warning(f"No market data for {position.ticker}, skipping exit check")
@@ -275,23 +336,23 @@ class AutoTrader:
                 exit_decision = self.trade_manager.manage_exit(
                     position=position,
                     market_price=current_price,
-                    now=get_utc_now()
+                    now=now
                 )
 
                 # Execute exit if needed
-                if exit_decision["action"] == "PARTIAL_SELL":
-                    logger.info(f"PARTIAL EXIT: {position.ticker} - {exit_decision['reason']}")
+                if exit_decision.action is ExitAction.PARTIAL_SELL:
+                    logger.info(f"PARTIAL EXIT: {position.ticker} - {exit_decision.reason}")
 
                     # Place sell order
                     order = await self.broker.close_position(
                         position=position,
-                        quantity=exit_decision["sell_qty"],
-                        price=exit_decision["sell_price"],
-                        reason=exit_decision["reason"]
+                        quantity=exit_decision.sell_qty,
+                        price=exit_decision.sell_price,
+                        reason=exit_decision.reason
                     )
 
                     # Update position: reduce quantity and mark partial_sold
-                    remaining_qty = position.quantity - exit_decision["sell_qty"]
+                    remaining_qty = position.quantity - exit_decision.sell_qty
                     self.storage.update_position(
                         order_id=position.order_id,
                         quantity=remaining_qty,
@@ -301,30 +362,30 @@ class AutoTrader:
                     # Send notification
                     await self.notifier.notify_exit(
                         position=position,
-                        exit_price=exit_decision["sell_price"],
-                        quantity=exit_decision["sell_qty"],
-                        reason=exit_decision["reason"],
+                        exit_price=exit_decision.sell_price,
+                        quantity=exit_decision.sell_qty,
+                        reason=exit_decision.reason,
                         partial=True
                     )
 
-                elif exit_decision["action"] == "FULL_SELL":
-                    logger.info(f"FULL EXIT: {position.ticker} - {exit_decision['reason']}")
+                elif exit_decision.action is ExitAction.FULL_SELL:
+                    logger.info(f"FULL EXIT: {position.ticker} - {exit_decision.reason}")
 
                     # Place sell order
                     order = await self.broker.close_position(
                         position=position,
-                        quantity=exit_decision["sell_qty"],
-                        price=exit_decision["sell_price"],
-                        reason=exit_decision["reason"]
+                        quantity=exit_decision.sell_qty,
+                        price=exit_decision.sell_price,
+                        reason=exit_decision.reason
                     )
 
                     # Calculate realized P&L
-                    realized_pnl = (exit_decision["sell_price"] - position.entry_price) * exit_decision["sell_qty"]
+                    realized_pnl = (exit_decision.sell_price - position.entry_price) * exit_decision.sell_qty
 
                     # Close position in database
                     self.storage.close_position(
                         order_id=position.order_id,
-                        exit_price=exit_decision["sell_price"],
+                        exit_price=exit_decision.sell_price,
                         exit_time=get_utc_now(),
                         realized_pnl=realized_pnl
                     )
@@ -332,25 +393,28 @@ class AutoTrader:
                     # Send notification
                     await self.notifier.notify_exit(
                         position=position,
-                        exit_price=exit_decision["sell_price"],
-                        quantity=exit_decision["sell_qty"],
-                        reason=exit_decision["reason"],
+                        exit_price=exit_decision.sell_price,
+                        quantity=exit_decision.sell_qty,
+                        reason=exit_decision.reason,
                         partial=False
                     )
 
                 else:
                     # HOLD - log current status
                     pnl_pct = ((current_price - position.entry_price) / position.entry_price) * 100
-                    logger.debug(f"HOLD {position.ticker}: +{pnl_pct:.1f}% | {exit_decision['reason']}")
+                    logger.debug("HOLD %s: +%.1f%% | %s", position.ticker, pnl_pct, exit_decision.reason)
 
             except Exception as e:
                 logger.error(f"Error monitoring position {position.ticker}: {e}")
                 continue
 
-    def _get_since_time(self) -> datetime:
+    def _get_since_time(self, now: Optional[datetime] = None) -> datetime:
         """
         Get the time to fetch news from.
         Based on last run time or cycle duration.
+
+        Args:
+            now: Start time of the current cycle (defaults to the current time)
         """
         last_run = self.storage.get_last_run_time()
 
@@ -359,13 +423,16 @@ class AutoTrader:
             return last_run
         else:
             # First run: fetch from cycle_minutes ago
-            return get_utc_now() - timedelta(minutes=self.settings.cycle_minutes * 2)
+            return (now or get_utc_now()) - timedelta(minutes=self.settings.cycle_minutes * 2)
 
 
 async def run_once():
     """Run a single cycle."""
     trader = AutoTrader()
-    await trader.run_cycle()
+    try:
+        await trader.run_cycle()
+    finally:
+        await trader.aclose()
 
 
 async def run_continuous():
@@ -376,21 +443,36 @@ async def run_continuous():
 
     logger.info(f"Starting continuous mode with {trader.settings.cycle_minutes} minute cycles")
 
-    while True:
-        try:
-            await trader.run_cycle()
+    try:
+        while True:
+            try:
+                await trader.run_cycle()
 
-            # Wait for next cycle
-            logger.info(f"Waiting {trader.settings.cycle_minutes} minutes until next cycle...")
-            await asyncio.sleep(cycle_seconds)
+                # Wait for next cycle
+                logger.info(f"Waiting {trader.settings.cycle_minutes} minutes until next cycle...")
+                await asyncio.sleep(cycle_seconds)
 
-        except KeyboardInterrupt:
-            logger.info("Shutting down...")
-            break
-        except Exception as e:
-            logger.error(f"Unexpected error in continuous loop: {e}")
-            # Wait a bit before retrying
-            await asyncio.sleep(60)
+            except KeyboardInterrupt:
+                logger.info("Shutting down...")
+                break
+            except Exception as e:
+                logger.error(f"Unexpected error in continuous loop: {e}")
+                # Wait a bit before retrying
+                await asyncio.sleep(60)
+    finally:
+        await trader.aclose()
+
+
+def _run(coro) -> None:
+    """Run coroutine on uvloop when installed, else the default event loop."""
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(coro)
+        return
+
+    with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+        runner.run(coro)
 
 
 def main():
@@ -420,9 +502,9 @@ def main():
 
     try:
         if args.mode == "once":
-            asyncio.run(run_once())
+            _run(run_once())
         else:
-            asyncio.run(run_continuous())
+            _run(run_continuous())
 
     except KeyboardInterrupt:
         logger.info("Interrupted by user")
@@ -4,22 +4,57 @@ Uses Alpaca Market Data API to calculate technical indicators.
 """
 
 import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 import numpy as np
 from alpaca.data.historical import StockHistoricalDataClient
 from alpaca.data.requests import StockBarsRequest, StockLatestQuoteRequest
 from alpaca.data.timeframe import TimeFrame
+from requests.adapters import HTTPAdapter
 
 from app.schemas import MarketState
 from app.config import get_settings
 from app.utils import (
-    get_utc_now, get_market_session, calculate_spread_bp,
-    calculate_price_change_pct, setup_logger
+    get_utc_now, get_market_session,
+    calculate_price_change_pct, calculate_spread_bp, setup_logger, njit, HAS_NUMBA
 )
 
 logger = setup_logger(__name__)
 
+# Minute bars are kept as one structured array (column per field) so the
+# indicators below are vectorized slices instead of per-bar dict lookups.
+# A missing bar VWAP is stored as NaN.
+BAR_DTYPE = np.dtype([('close', 'f8'), ('volume', 'i8'), ('vwap', 'f8')])
+
+# Market states are reused for this long (same ticker across headlines in a cycle)
+MARKET_STATE_TTL_SECONDS = 30.0
+
+# Worker threads for the blocking Alpaca data SDK (matched by the HTTP pool)
+DATA_POOL_WORKERS = 8
+
+
+@njit(cache=True, fastmath=True)
+def _rsi_kernel(closes, period):
+    """Simple-average RSI over the last `period` changes, in one pass."""
+    gain = 0.0
+    loss = 0.0
+    n = closes.shape[0]
+    for i in range(n - period - 1, n - 1):
+        d = closes[i + 1] - closes[i]
+        if d > 0:
+            gain += d
+        else:
+            loss -= d
+
+    if loss == 0.0:
+        return 100.0
+
+    # Averages share the same divisor, so the sums' ratio is RS
+    rs = gain / loss
+    return 100.0 - 100.0 / (1.0 + rs)
+
 
 class MarketScanner:
     """
@@ -33,6 +68,28 @@ class MarketScanner:
             secret_key=self.settings.alpaca_secret_key
         )
 
+        # Dedicated workers for SDK calls, each able to keep its own
+        # keep-alive connection in the client's requests.Session
+        self._pool = ThreadPoolExecutor(max_workers=DATA_POOL_WORKERS, thread_name_prefix="alpaca-data")
+        self.client._session.mount("https://", HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=DATA_POOL_WORKERS
+        ))
+
+        # ticker -> (fetched_at monotonic, state), plus fetches in progress
+        self._cache: dict[str, tuple[float, MarketState]] = {}
+        self._inflight: dict[str, asyncio.Task] = {}
+
+        # Compile (or load the cached) RSI kernel now, not on the first ticker.
+        # Same argument types as _calculate_rsi (contiguous float64, int), so
+        # the warm specialization is the one the cycle uses.
+        started = time.perf_counter()
+        _rsi_kernel(np.zeros(8, dtype=np.float64), 3)
+        logger.info(
+            f"Indicator kernels warm ({'numba' if HAS_NUMBA else 'pure Python'}, "
+            f"{(time.perf_counter() - started) * 1000:.0f} ms)"
+        )
+
     async def get_market_state(self, ticker: str) -> Optional[MarketState]:
         """
         Get current market state for a ticker.
@@ -43,139 +100,233 @@ class MarketScanner:
         Returns:
             MarketState object or None if failed
         """
-        try:
-            # Get latest quote
-            quote = await self._get_latest_quote(ticker)
-            if not quote:
-                logger.warning(f"No quote data for {ticker}")
-                return None
-
-            # Get recent bars for calculations
-            bars = await self._get_recent_bars(ticker, minutes=10)
-            if len(bars) < 5:
-                logger.warning(f"Insufficient bar data for {ticker}: {len(bars)} bars")
-                return None
-
-            # Calculate metrics
-            bid = quote['bid']
-            ask = quote['ask']
-            mid = (bid + ask) / 2
-            spread_bp = calculate_spread_bp(bid, ask)
-
-            # Price changes
-            dp_1m = calculate_price_change_pct(bars[-2]['close'], bars[-1]['close'])
-            dp_5m = calculate_price_change_pct(bars[-6]['close'] if len(bars) > 5 else bars[0]['close'], bars[-1]['close'])
-
-            # Volume ratio (recent vs average)
-            recent_vol = bars[-1]['volume']
-            avg_vol = np.mean([b['volume'] for b in bars[:-1]])
-            vol_ratio = recent_vol / avg_vol if avg_vol > 0 else 1.0
-
-            # RSI (3-period)
-            rsi_3 = self._calculate_rsi([b['close'] for b in bars], period=3)
-
-            # VWAP deviation
-            vwap = self._calculate_vwap(bars)
-            vwap_dev_bp = int(((mid - vwap) / vwap) * 10000) if vwap > 0 else 0
-
-            # Session
-            session = get_market_session(get_utc_now())
-
-            return MarketState(
-                ticker=ticker,
-                ts=get_utc_now(),
-                mid=mid,
-                spread_bp=spread_bp,
-                dP_1m=dp_1m,
-                dP_5m=dp_5m,
-                vol_ratio_1m=vol_ratio,
-                rsi_3=rsi_3,
-                vwap_dev_bp=vwap_dev_bp,
-                session=session,
-                bid=bid,
-                ask=ask,
-                volume=recent_vol
+        states = await self.get_market_states([ticker])
+        return states.get(ticker)
+
+    async def get_market_states(
+        self,
+        tickers: list[str],
+        max_age: float = MARKET_STATE_TTL_SECONDS
+    ) -> dict[str, MarketState]:
+        """
+        Get current market states for several tickers at once.
+
+        Uncached tickers are fetched with one multi-symbol quote request and
+        one multi-symbol bars request. States are cached for
+        MARKET_STATE_TTL_SECONDS, and concurrent requests for the same ticker
+        share one fetch.
+
+        Args:
+            tickers: Stock ticker symbols
+            max_age: Oldest cached state to reuse, in seconds. 0 always fetches
+                fresh data (exit checks must not act on a stale price).
+
+        Returns:
+            Dict of ticker -> MarketState (tickers without data are omitted)
+        """
+        now = time.monotonic()
+        states: dict[str, MarketState] = {}
+        pending: dict[str, asyncio.Task] = {}
+        missing = []
+
+        for ticker in dict.fromkeys(tickers):
+            cached = self._cache.get(ticker)
+            if cached is not None and now - cached[0] < max_age:
+                states[ticker] = cached[1].model_copy()
+            elif ticker in self._inflight and max_age > 0:
+                pending[ticker] = self._inflight[ticker]
+            else:
+                missing.append(ticker)
+
+        if missing:
+            task = asyncio.create_task(self._fetch_market_states(missing))
+            for ticker in missing:
+                self._inflight[ticker] = task
+                pending[ticker] = task
+            task.add_done_callback(
+                lambda done: [self._inflight.pop(t) for t in missing if self._inflight.get(t) is done]
             )
 
-        except Exception as e:
-            logger.error(f"Error getting market state for {ticker}: {e}")
-            return None
+        if not pending:
+            return states
+
+        fetched_at = time.monotonic()
+        for task in set(pending.values()):
+            await asyncio.shield(task)
+
+        # Drop expired entries so the cache stays bounded by active tickers
+        now = time.monotonic()
+        self._cache = {t: entry for t, entry in self._cache.items() if now - entry[0] < MARKET_STATE_TTL_SECONDS}
+        for ticker, task in pending.items():
+            state = task.result().get(ticker)
+            if state is not None:
+                self._cache[ticker] = (fetched_at, state)
+                states[ticker] = state.model_copy()
+
+        return states
+
+    async def _fetch_market_states(self, tickers: list[str]) -> dict[str, MarketState]:
+        """Fetch quotes and bars for tickers from Alpaca and compute market states."""
+        # One timestamp for the bars window and the resulting states
+        now = get_utc_now()
+        session = get_market_session(now)
+
+        quotes, bars_by_ticker = await asyncio.gather(
+            self._get_latest_quotes(tickers),
+            self._get_recent_bars(tickers, end=now, minutes=10)
+        )
 
-    async def _get_latest_quote(self, ticker: str) -> Optional[dict]:
-        """Get latest bid/ask quote."""
+        usable = []
+        for ticker in tickers:
+            if ticker not in quotes:
+                logger.warning(f"No quote data for {ticker}")
+            elif len(bars_by_ticker.get(ticker, ())) < 5:
+                logger.warning(f"Insufficient bar data for {ticker}: {len(bars_by_ticker.get(ticker, ()))} bars")
+            else:
+                usable.append(ticker)
+
+        if not usable:
+            return {}
+
+        states = {}
+        for ticker in usable:
+            bid = quotes[ticker]['bid']
+            ask = quotes[ticker]['ask']
+            try:
+                states[ticker] = self._build_market_state(
+                    ticker, now, session,
+                    bid, ask, (bid + ask) / 2, calculate_spread_bp(bid, ask),
+                    bars_by_ticker[ticker]
+                )
+            except Exception as e:
+                logger.error(f"Error getting market state for {ticker}: {e}")
+
+        return states
+
+    def _build_market_state(
+        self,
+        ticker: str,
+        ts: datetime,
+        session: str,
+        bid: float,
+        ask: float,
+        mid: float,
+        spread_bp: int,
+        bars: np.ndarray
+    ) -> MarketState:
+        """Compute bar-based indicators and assemble a MarketState."""
+        closes = bars['close']
+        volumes = bars['volume']
+
+        # Price changes
+        dp_1m = calculate_price_change_pct(closes[-2], closes[-1])
+        dp_5m = calculate_price_change_pct(closes[-6] if len(closes) > 5 else closes[0], closes[-1])
+
+        # Volume ratio (recent vs average)
+        recent_vol = int(volumes[-1])
+        avg_vol = volumes[:-1].mean()
+        vol_ratio = recent_vol / avg_vol if avg_vol > 0 else 1.0
+
+        # RSI (3-period)
+        rsi_3 = self._calculate_rsi(closes, period=3)
+
+        # VWAP deviation
+        vwap = self._calculate_vwap(bars)
+        vwap_dev_bp = int(((mid - vwap) / vwap) * 10000) if vwap > 0 else 0
+
+        return MarketState(
+            ticker=ticker,
+            ts=ts,
+            mid=mid,
+            spread_bp=spread_bp,
+            dP_1m=dp_1m,
+            dP_5m=dp_5m,
+            vol_ratio_1m=vol_ratio,
+            rsi_3=rsi_3,
+            vwap_dev_bp=vwap_dev_bp,
+            session=session,
+            bid=bid,
+            ask=ask,
+            volume=recent_vol
+        )
+
+    async def _get_latest_quotes(self, tickers: list[str]) -> dict[str, dict]:
+        """Get latest bid/ask quotes for tickers (one request)."""
         try:
             request = StockLatestQuoteRequest(
-                symbol_or_symbols=ticker,
+                symbol_or_symbols=tickers,
                 feed='iex'  # Use IEX feed (free tier compatible)
             )
-            # Run in thread to avoid blocking event loop
-            quotes = await asyncio.to_thread(
+            # Run in worker thread to avoid blocking event loop
+            quotes = await asyncio.get_running_loop().run_in_executor(
+                self._pool,
                 self.client.get_stock_latest_quote,
                 request
             )
 
-            if ticker not in quotes:
-                return None
-
-            quote = quotes[ticker]
             return {
-                'bid': float(quote.bid_price),
-                'ask': float(quote.ask_price),
-                'bid_size': int(quote.bid_size),
-                'ask_size': int(quote.ask_size),
+                ticker: {
+                    'bid': float(quote.bid_price),
+                    'ask': float(quote.ask_price),
+                    'bid_size': int(quote.bid_size),
+                    'ask_size': int(quote.ask_size),
+                }
+                for ticker, quote in quotes.items()
             }
 
         except Exception as e:
-            logger.error(f"Error fetching quote for {ticker}: {e}")
-            return None
-
-    async def _get_recent_bars(self, ticker: str, minutes: int = 10) -> list[dict]:
-        """Get recent minute bars."""
+            logger.error(f"Error fetching quotes for {tickers}: {e}")
+            return {}
+
+    async def _get_recent_bars(
+        self,
+        tickers: list[str],
+        end: datetime,
+        minutes: int = 10
+    ) -> dict[str, np.ndarray]:
+        """Get minute bars up to `end` per ticker as BAR_DTYPE structured arrays (oldest first)."""
         try:
-            end = get_utc_now()
             start = end - timedelta(minutes=minutes)
 
             request = StockBarsRequest(
-                symbol_or_symbols=ticker,
+                symbol_or_symbols=tickers,
                 timeframe=TimeFrame.Minute,
                 start=start,
                 end=end,
                 feed='iex'  # Use IEX feed (free tier compatible)
             )
 
-            # Run in thread to avoid blocking event loop
-            bars_response = await asyncio.to_thread(
+            # Run in worker thread to avoid blocking event loop
+            bars_response = await asyncio.get_running_loop().run_in_executor(
+                self._pool,
                 self.client.get_stock_bars,
                 request
             )
 
-            if ticker not in bars_response:
-                return []
-
-            bars = []
-            for bar in bars_response[ticker]:
-                bars.append({
-                    'timestamp': bar.timestamp,
-                    'open': float(bar.open),
-                    'high': float(bar.high),
-                    'low': float(bar.low),
-                    'close': float(bar.close),
-                    'volume': int(bar.volume),
-                    'vwap': float(bar.vwap) if bar.vwap else None
-                })
+            result = {}
+            for ticker, raw_bars in bars_response.data.items():
+                bars = np.empty(len(raw_bars), dtype=BAR_DTYPE)
+                for i, bar in enumerate(raw_bars):
+                    bars[i] = (bar.close, bar.volume, bar.vwap if bar.vwap else np.nan)
+                result[ticker] = bars
 
-            return bars
+            return result
 
         except Exception as e:
-            logger.error(f"Error fetching bars for {ticker}: {e}")
-            return []
+            logger.error(f"Error fetching bars for {tickers}: {e}")
+            return {}
 
-    def _calculate_rsi(self, prices: list[float], period: int = 3) -> float:
+    def close(self) -> None:
+        """Shut down the worker pool and the HTTP session."""
+        self._pool.shutdown(wait=False)
+        self.client._session.close()
+
+    def _calculate_rsi(self, prices: np.ndarray, period: int = 3) -> float:
         """
         Calculate RSI (Relative Strength Index).
 
         Args:
-            prices: List of closing prices
+            prices: Closing prices (oldest first)
             period: RSI period (default 3)
 
         Returns:
@@ -184,48 +335,33 @@ class MarketScanner:
         if len(prices) < period + 1:
             return 50.0  # Neutral default
 
-        # Calculate price changes
-        deltas = np.diff(prices)
-
-        # Separate gains and losses
-        gains = np.where(deltas > 0, deltas, 0)
-        losses = np.where(deltas < 0, -deltas, 0)
-
-        # Calculate average gains and losses
-        avg_gain = np.mean(gains[-period:])
-        avg_loss = np.mean(losses[-period:])
-
-        if avg_loss == 0:
-            return 100.0
-
-        rs = avg_gain / avg_loss
-        rsi = 100 - (100 / (1 + rs))
-
-        return float(rsi)
+        return float(_rsi_kernel(np.ascontiguousarray(prices, dtype=np.float64), period))
 
-    def _calculate_vwap(self, bars: list[dict]) -> float:
+    def _calculate_vwap(self, bars: np.ndarray) -> float:
         """
         Calculate VWAP (Volume Weighted Average Price).
 
         Args:
-            bars: List of bar data
+            bars: BAR_DTYPE structured array
 
         Returns:
             VWAP value
         """
-        if not bars:
+        if len(bars) == 0:
             return 0.0
 
         # Use bar vwap if available
-        if bars[-1].get('vwap'):
-            return bars[-1]['vwap']
+        last_vwap = bars['vwap'][-1]
+        if not np.isnan(last_vwap) and last_vwap != 0:
+            return float(last_vwap)
 
         # Otherwise calculate from bars
-        total_volume = sum(b['volume'] for b in bars)
+        volumes = bars['volume'].astype(np.float64)
+        total_volume = volumes.sum()
         if total_volume == 0:
-            return bars[-1]['close']
+            return float(bars['close'][-1])
 
-        vwap = sum(b['close'] * b['volume'] for b in bars) / total_volume
+        vwap = np.dot(bars['close'], volumes) / total_volume
         return float(vwap)
 
 
@@ -253,5 +389,4 @@ async def main():
 
 
 if __name__ == "__main__":
-    import asyncio
     asyncio.run(main())
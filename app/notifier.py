@@ -3,9 +3,11 @@ Notification module for Slack alerts.
 Sends concise trading summaries and error alerts.
 """
 
-import json
+import asyncio
+import random
 from typing import Optional
 import httpx
+import orjson
 
 from app.schemas import EventCard, PreSignal, ApprovedSignal, OrderRecord, Position
 from app.config import get_settings
@@ -13,6 +15,62 @@ from app.utils import setup_logger, format_money, format_percentage, truncate_te
 
 logger = setup_logger(__name__)
 
+# Notifications sent within this window are coalesced into one Slack post
+SLACK_BATCH_WINDOW_SECONDS = 0.25
+SLACK_BATCH_MAX_MESSAGES = 10  # Slack allows 50 blocks per message
+
+# Webhook delivery: short timeout, a few retries on 429/5xx/network errors
+SLACK_TIMEOUT_SECONDS = 3.0
+SLACK_MAX_ATTEMPTS = 3
+SLACK_RETRY_MAX_DELAY_SECONDS = 10.0  # Cap on Retry-After / backoff sleeps
+
+# Static message scaffolds; optional sections are pre-joined "\n• ..." lines
+_ENTRY_TEMPLATE = (
+    "*{headline}*\n"
+    "\n"
+    "*Category:* {category}\n"
+    "*Sentiment:* {sentiment:.2f} | *Reliability:* {reliability:.2f}\n"
+    "\n"
+    "*Market Metrics:*{metrics}\n"
+    "\n"
+    "*Trade Details:*\n"
+    "• Size: {shares} shares @ ${price:.2f} ≈ {size_usd}\n"
+    "• Stop: {stop} bp | TP: {tp} bp{fill}{reasons}"
+)
+_SKIP_TEMPLATE = (
+    "*Headline:* {headline}\n"
+    "*Category:* {category} | *Sentiment:* {sentiment:.2f} | *Reliability:* {reliability:.2f}\n"
+    "*Reason:* {reason}"
+)
+_REJECTED_TEMPLATE = (
+    "*{headline}*\n"
+    "\n"
+    "*Category:* {category} | *Sentiment:* {sentiment:.2f}\n"
+    "\n"
+    "*Rejection Reasons:*{notes}"
+)
+
+
+def _bullets(items) -> str:
+    """Render items as bullet lines, each prefixed with a newline."""
+    return "".join(f"\n• {item}" for item in items)
+
+
+def _section_message(text: str, body: str) -> dict:
+    """Wrap fallback text and a mrkdwn body into a single-section message."""
+    return {
+        "text": text,
+        "blocks": [
+            {
+                "type": "section",
+                "text": {
+                    "type": "mrkdwn",
+                    "text": body
+                }
+            }
+        ]
+    }
+
 
 class Notifier:
     """
@@ -22,6 +80,12 @@ class Notifier:
     def __init__(self):
         self.settings = get_settings()
         self.enabled = self.settings.slack_enabled
+        self.minimal = self.settings.slack_minimal
+        self._client: Optional[httpx.AsyncClient] = None
+
+        # Pending (message, future) pairs drained by a background flusher
+        self._queue: Optional[asyncio.Queue] = None
+        self._flusher_task: Optional[asyncio.Task] = None
 
     async def notify_signal(
         self,
@@ -196,28 +260,17 @@ class Notifier:
 
     def _build_skip_message(self, event: EventCard, signal: PreSignal) -> dict:
         """Build message for SKIP signal."""
-        headline = truncate_text(event.headline, 80)
-
         text = f":no_entry: *SKIP* - {event.tickers[0] if event.tickers else 'Unknown'}"
 
-        details = [
-            f"*Headline:* {headline}",
-            f"*Category:* {event.category} | *Sentiment:* {event.sentiment:.2f} | *Reliability:* {event.reliability:.2f}",
-            f"*Reason:* {signal.reasons[0] if signal.reasons else 'N/A'}"
-        ]
+        body = _SKIP_TEMPLATE.format(
+            headline=truncate_text(event.headline, 80),
+            category=event.category,
+            sentiment=event.sentiment,
+            reliability=event.reliability,
+            reason=signal.reasons[0] if signal.reasons else 'N/A'
+        )
 
-        return {
-            "text": text,
-            "blocks": [
-                {
-                    "type": "section",
-                    "text": {
-                        "type": "mrkdwn",
-                        "text": "\n".join(details)
-                    }
-                }
-            ]
-        }
+        return _section_message(text, body)
 
     def _build_entry_message(
         self,
@@ -246,50 +299,35 @@ class Notifier:
 
         text = f"{status_emoji} *{status_text}* - {ticker}"
 
-        # Event info
-        details = [
-            f"*{headline}*",
-            "",
-            f"*Category:* {event.category}",
-            f"*Sentiment:* {event.sentiment:.2f} | *Reliability:* {event.reliability:.2f}",
-            "",
-            "*Market Metrics:*"
-        ]
-
-        # Add metrics
-        for key, value in signal.metrics.items():
-            if isinstance(value, float):
-                details.append(f"• {key}: {value:.2f}")
-            else:
-                details.append(f"• {key}: {value}")
-
-        details.append("")
-        details.append("*Trade Details:*")
-        details.append(f"• Size: {approved.shares} shares @ ${approved.entry_price_target:.2f} ≈ {format_money(approved.size_final_usd)}")
-        details.append(f"• Stop: {approved.hard_stop_bp} bp | TP: {approved.take_profit_bp} bp")
+        metrics = _bullets(
+            f"{key}: {value:.2f}" if isinstance(value, float) else f"{key}: {value}"
+            for key, value in signal.metrics.items()
+        )
 
+        fill = ""
         if order and order.status == "filled":
-            details.append(f"• Fill Price: ${order.filled_avg_price:.2f}")
+            fill = f"\n• Fill Price: ${order.filled_avg_price:.2f}"
 
-        # Add reasons
+        reasons = ""
         if signal.reasons:
-            details.append("")
-            details.append("*Reasons:*")
-            for reason in signal.reasons[:3]:  # Top 3 reasons
-                details.append(f"• {reason}")
-
-        return {
-            "text": text,
-            "blocks": [
-                {
-                    "type": "section",
-                    "text": {
-                        "type": "mrkdwn",
-                        "text": "\n".join(details)
-                    }
-                }
-            ]
-        }
+            reasons = "\n\n*Reasons:*" + _bullets(signal.reasons[:3])  # Top 3 reasons
+
+        body = _ENTRY_TEMPLATE.format(
+            headline=headline,
+            category=event.category,
+            sentiment=event.sentiment,
+            reliability=event.reliability,
+            metrics=metrics,
+            shares=approved.shares,
+            price=approved.entry_price_target,
+            size_usd=format_money(approved.size_final_usd),
+            stop=approved.hard_stop_bp,
+            tp=approved.take_profit_bp,
+            fill=fill,
+            reasons=reasons
+        )
+
+        return _section_message(text, body)
 
     def _build_rejected_message(
         self,
@@ -303,44 +341,158 @@ class Notifier:
 
         text = f":x: *REJECTED* - {ticker}"
 
-        details = [
-            f"*{headline}*",
-            "",
-            f"*Category:* {event.category} | *Sentiment:* {event.sentiment:.2f}",
-            "",
-            "*Rejection Reasons:*"
-        ]
+        body = _REJECTED_TEMPLATE.format(
+            headline=headline,
+            category=event.category,
+            sentiment=event.sentiment,
+            notes=_bullets(approved.notes[:3])
+        )
+
+        return _section_message(text, body)
+
+    async def _get_client(self) -> httpx.AsyncClient:
+        """Get the shared HTTP client, creating it on first use."""
+        if self._client is None:
+            # Keep-alive connections to hooks.slack.com are reused across messages
+            self._client = httpx.AsyncClient(
+                timeout=SLACK_TIMEOUT_SECONDS,
+                limits=httpx.Limits(max_keepalive_connections=4)
+            )
+        return self._client
 
-        for note in approved.notes[:3]:
-            details.append(f"• {note}")
+    async def _send_slack(self, message: dict) -> None:
+        """
+        Queue message for Slack and wait until its batch has been posted.
 
-        return {
-            "text": text,
-            "blocks": [
-                {
-                    "type": "section",
-                    "text": {
-                        "type": "mrkdwn",
-                        "text": "\n".join(details)
-                    }
-                }
-            ]
-        }
+        Messages arriving within SLACK_BATCH_WINDOW_SECONDS of each other are
+        sent as one post, so a burst of signals/exits costs one request.
+        """
+        if self.minimal:
+            message = self._flatten_message(message)
+
+        loop = asyncio.get_running_loop()
+        if (self._flusher_task is None or self._flusher_task.done()
+                or self._flusher_task.get_loop() is not loop):
+            self._queue = asyncio.Queue()
+            self._flusher_task = asyncio.create_task(self._flusher())
+
+        future = loop.create_future()
+        await self._queue.put((message, future))
+        await future
+
+    async def _flusher(self) -> None:
+        """Background task: coalesce queued messages and post them."""
+        while True:
+            batch = [await self._queue.get()]
+
+            try:
+                # Give concurrent notifications a moment to join this batch
+                await asyncio.sleep(SLACK_BATCH_WINDOW_SECONDS)
+                while len(batch) < SLACK_BATCH_MAX_MESSAGES and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+
+                await self._post_slack(self._combine_messages([message for message, _ in batch]))
+
+            except Exception as e:
+                # Like _post_slack's own failures: logged, never raised to
+                # callers, and the loop keeps serving later messages
+                logger.error(f"Failed to send Slack notification batch: {e}")
+
+            finally:
+                # Release every waiter, even if the post failed or we were cancelled
+                for _, future in batch:
+                    if not future.done():
+                        future.set_result(None)
+
+    def _flatten_message(self, message: dict) -> dict:
+        """Reduce a message to a text-only payload containing its section bodies."""
+        sections = [block["text"]["text"] for block in message.get("blocks", []) if block.get("type") == "section"]
+
+        # Keep the summary line unless the body already starts with it
+        if not sections or not sections[0].startswith(message["text"]):
+            sections.insert(0, message["text"])
+        return {"text": "\n".join(sections)}
+
+    def _combine_messages(self, messages: list[dict]) -> dict:
+        """Merge several Slack messages into one, separated by dividers."""
+        if len(messages) == 1:
+            return messages[0]
+
+        blocks = []
+        for message in messages:
+            if blocks:
+                blocks.append({"type": "divider"})
+            blocks.extend(message.get("blocks", []))
+
+        combined = {"text": "\n".join(message["text"] for message in messages)}
+        if blocks:
+            combined["blocks"] = blocks
+        return combined
+
+    async def _post_slack(self, message: dict) -> None:
+        """
+        Post message to Slack webhook.
 
-    async def _send_slack(self, message: dict) -> None:
-        """Send message to Slack webhook."""
-        try:
-            async with httpx.AsyncClient() as client:
+        Retries 429, 5xx, timeouts and connection errors up to
+        SLACK_MAX_ATTEMPTS, honoring Retry-After and otherwise backing off
+        exponentially with full jitter. Delivery failures are logged, never
+        raised.
+        """
+        client = await self._get_client()
+        content = orjson.dumps(message)
+
+        for attempt in range(SLACK_MAX_ATTEMPTS):
+            delay = random.uniform(0, 2 ** attempt)
+            try:
                 response = await client.post(
                     self.settings.slack_webhook_url,
-                    json=message,
-                    timeout=10.0
+                    content=content,
+                    headers={"Content-Type": "application/json"}
                 )
                 response.raise_for_status()
                 logger.debug("Slack notification sent successfully")
+                return
+
+            except httpx.HTTPStatusError as e:
+                status = e.response.status_code
+                if status != 429 and status < 500:
+                    logger.error(f"Failed to send Slack notification: {e}")
+                    return
+                retry_after = e.response.headers.get("Retry-After")
+                if retry_after and retry_after.isdigit():
+                    delay = float(retry_after)
+                error = e
+
+            except httpx.TransportError as e:
+                error = e
+
+            except Exception as e:
+                logger.error(f"Failed to send Slack notification: {e}")
+                return
+
+            if attempt < SLACK_MAX_ATTEMPTS - 1:
+                delay = min(delay, SLACK_RETRY_MAX_DELAY_SECONDS)
+                logger.warning(
+                    f"Slack notification failed ({error}), retrying in {delay:.1f}s "
+                    f"(attempt {attempt + 1}/{SLACK_MAX_ATTEMPTS})"
+                )
+                await asyncio.sleep(delay)
+
+        logger.error(f"Failed to send Slack notification after {SLACK_MAX_ATTEMPTS} attempts: {error}")
+
+    async def aclose(self) -> None:
+        """Stop the batch flusher and close the shared HTTP client."""
+        if self._flusher_task is not None:
+            self._flusher_task.cancel()
+            try:
+                await self._flusher_task
+            except asyncio.CancelledError:
+                pass
+            self._flusher_task = None
 
-        except Exception as e:
-            logger.error(f"Failed to send Slack notification: {e}")
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
 
 async def main():
@@ -389,9 +541,9 @@ async def main():
 
     # Send notification
     await notifier.notify_signal(event, pre_signal, approved)
+    await notifier.aclose()
     print("Notification sent (check Slack if configured)")
 
 
 if __name__ == "__main__":
-    import asyncio
     asyncio.run(main())
@@ -22,6 +22,32 @@ class RiskGuard:
         self.settings = get_settings()
         self.storage = storage
 
+        # Approved entries whose orders are still executing, as (ticker,
+        # notional USD); counted like open positions until released
+        self._pending_entries: list[tuple[str, float]] = []
+
+        self.refresh_rules()
+        self.rules.on_reload(self.refresh_rules)
+
+    def refresh_rules(self) -> None:
+        """Re-read cached risk/execution rules (called by RulesConfig.reload)."""
+        risk_rules = self.rules.risk
+        exec_rules = self.rules.execution
+
+        self._min_stop_bp = risk_rules.get("min_stop_bp", 150)
+        self._per_trade_risk_pct = risk_rules.get("per_trade_risk_pct", 0.004)
+        self._take_profit_bp = risk_rules.get("trail_take_profit_bp", 250)
+        self._max_daily_loss_pct = risk_rules.get("max_daily_loss_pct", 0.02)
+        self._max_sector_pct = risk_rules.get("max_sector_exposure_pct", 0.3)
+        self._max_positions = risk_rules.get("max_concurrent_positions", 3)
+        self._max_daily_tickers = risk_rules.get("max_daily_tickers", 10)
+        self._max_position_pct = risk_rules.get("max_position_size_pct", 0.15)
+        self._min_position_usd = risk_rules.get("min_position_size_usd", 100.0)
+        self._max_limit_usd = risk_rules.get("max_position_size_usd", 15000.0)
+
+        self._max_slippage_bp = exec_rules.get("max_slippage_bp", 40)
+        self._limit_offset_bp = exec_rules.get("limit_offset_bp", 10)
+
     async def approve_signal(
         self,
         pre_signal: PreSignal,
@@ -43,63 +69,26 @@ class RiskGuard:
 
         # If signal is already SKIP, return rejected approval
         if pre_signal.action == "SKIP":
-            return ApprovedSignal(
-                approved=False,
-                size_final_usd=0.0,
-                hard_stop_bp=0,
-                take_profit_bp=0,
-                max_slippage_bp=0,
-                notes=["Signal was SKIP"],
-                ticker=market.ticker
-            )
+            return self._rejected(market.ticker, ["Signal was SKIP"])
 
         # Check portfolio-level limits
         if not self._check_portfolio_limits(portfolio, notes):
-            return ApprovedSignal(
-                approved=False,
-                size_final_usd=0.0,
-                hard_stop_bp=0,
-                take_profit_bp=0,
-                max_slippage_bp=0,
-                notes=notes,
-                ticker=market.ticker
-            )
+            return self._rejected(market.ticker, notes)
 
         # Check daily ticker limit
         if not self._check_daily_ticker_limit(market.ticker, notes):
-            return ApprovedSignal(
-                approved=False,
-                size_final_usd=0.0,
-                hard_stop_bp=0,
-                take_profit_bp=0,
-                max_slippage_bp=0,
-                notes=notes,
-                ticker=market.ticker
-            )
+            return self._rejected(market.ticker, notes)
 
         # Check sector exposure
         if not self._check_sector_limit(market.ticker, portfolio, notes):
-            return ApprovedSignal(
-                approved=False,
-                size_final_usd=0.0,
-                hard_stop_bp=0,
-                take_profit_bp=0,
-                max_slippage_bp=0,
-                notes=notes,
-                ticker=market.ticker
-            )
-
-        # Calculate position size
-        risk_rules = self.rules.risk
-        exec_rules = self.rules.execution
+            return self._rejected(market.ticker, notes)
 
         # Determine stop-loss distance
-        min_stop_bp = risk_rules.get("min_stop_bp", 150)
         estimated_vol_bp = int(abs(market.dP_5m) * 100)  # Use 5m move as volatility proxy
-        hard_stop_bp = max(min_stop_bp, int(estimated_vol_bp * 1.5))
+        hard_stop_bp = max(self._min_stop_bp, int(estimated_vol_bp * 1.5))
 
         # Calculate position size based on risk
-        per_trade_risk_pct = risk_rules.get("per_trade_risk_pct", 0.004)
+        per_trade_risk_pct = self._per_trade_risk_pct
         risk_amount = portfolio.equity * per_trade_risk_pct
 
         # Position size = Risk / Stop Distance
@@ -107,53 +96,34 @@ class RiskGuard:
         size_usd = risk_amount / stop_pct if stop_pct > 0 else 0
 
         # Apply position size limits
-        max_position_pct = risk_rules.get("max_position_size_pct", 0.15)
-        max_position_usd = portfolio.equity * max_position_pct
-        min_position_usd = risk_rules.get("min_position_size_usd", 100.0)
-        max_limit_usd = risk_rules.get("max_position_size_usd", 15000.0)
+        max_position_usd = portfolio.equity * self._max_position_pct
+        min_position_usd = self._min_position_usd
 
-        size_usd = min(size_usd, max_position_usd, max_limit_usd)
+        size_usd = min(size_usd, max_position_usd, self._max_limit_usd)
 
         # Check minimum size
         if size_usd < min_position_usd:
             notes.append(f"Position size ${size_usd:.2f} below minimum ${min_position_usd:.2f}")
-            return ApprovedSignal(
-                approved=False,
-                size_final_usd=0.0,
-                hard_stop_bp=0,
-                take_profit_bp=0,
-                max_slippage_bp=0,
-                notes=notes,
-                ticker=market.ticker
-            )
+            return self._rejected(market.ticker, notes)
 
         # Calculate shares
         shares = int(size_usd / market.mid)
         if shares == 0:
             notes.append("Calculated 0 shares - price too high for position size")
-            return ApprovedSignal(
-                approved=False,
-                size_final_usd=0.0,
-                hard_stop_bp=0,
-                take_profit_bp=0,
-                max_slippage_bp=0,
-                notes=notes,
-                ticker=market.ticker
-            )
+            return self._rejected(market.ticker, notes)
 
         # Recalculate actual size
         size_usd = shares * market.mid
 
         # Take profit target
-        take_profit_bp = risk_rules.get("trail_take_profit_bp", 250)
+        take_profit_bp = self._take_profit_bp
 
         # Max slippage
-        max_slippage_bp = exec_rules.get("max_slippage_bp", 40)
+        max_slippage_bp = self._max_slippage_bp
 
         # Calculate entry price target
-        limit_offset_bp = exec_rules.get("limit_offset_bp", 10)
         entry_price_target = round_to_tick(
-            market.mid * (1 + limit_offset_bp / 10000)
+            market.mid * (1 + self._limit_offset_bp / 10000)
         )
 
         # Success notes
@@ -162,7 +132,8 @@ class RiskGuard:
         notes.append(f"Stop: {hard_stop_bp} bp (${hard_stop_bp * size_usd / 10000:.2f})")
         notes.append(f"Take profit: {take_profit_bp} bp")
 
-        return ApprovedSignal(
+        # Every field was computed above from validated inputs; skip re-validation
+        return ApprovedSignal.model_construct(
             approved=True,
             size_final_usd=size_usd,
             hard_stop_bp=hard_stop_bp,
@@ -174,12 +145,27 @@ class RiskGuard:
             shares=shares
         )
 
+    def _rejected(self, ticker: str, notes: list[str]) -> ApprovedSignal:
+        """
+        Build a rejected approval without validation.
+
+        Rejections carry zero stop/take-profit levels, which the schema's
+        gt=0 bounds (meant for approved orders) would refuse.
+        """
+        return ApprovedSignal.model_construct(
+            approved=False,
+            size_final_usd=0.0,
+            hard_stop_bp=0,
+            take_profit_bp=0,
+            max_slippage_bp=0,
+            notes=notes,
+            ticker=ticker
+        )
+
     def _check_portfolio_limits(self, portfolio: PortfolioState, notes: list[str]) -> bool:
         """Check portfolio-level risk limits."""
-        risk_rules = self.rules.risk
-
         # Check daily loss limit
-        max_daily_loss_pct = risk_rules.get("max_daily_loss_pct", 0.02)
+        max_daily_loss_pct = self._max_daily_loss_pct
         if portfolio.daily_pnl_pct < -max_daily_loss_pct:
             notes.append(
                 f"Daily loss limit exceeded: {portfolio.daily_pnl_pct * 100:.2f}% "
@@ -188,7 +174,7 @@ class RiskGuard:
             return False
 
         # Check max concurrent positions
-        max_positions = risk_rules.get("max_concurrent_positions", 3)
+        max_positions = self._max_positions
         if portfolio.positions_count >= max_positions:
             notes.append(f"Max positions reached: {portfolio.positions_count}/{max_positions}")
             return False
@@ -197,8 +183,7 @@ class RiskGuard:
 
     def _check_daily_ticker_limit(self, ticker: str, notes: list[str]) -> bool:
         """Check if daily ticker limit would be exceeded."""
-        risk_rules = self.rules.risk
-        max_daily_tickers = risk_rules.get("max_daily_tickers", 10)
+        max_daily_tickers = self._max_daily_tickers
 
         # Get today's traded tickers
         today_tickers = self.storage.get_today_traded_tickers()
@@ -223,8 +208,7 @@ class RiskGuard:
         notes: list[str]
     ) -> bool:
         """Check sector exposure limit."""
-        risk_rules = self.rules.risk
-        max_sector_pct = risk_rules.get("max_sector_exposure_pct", 0.3)
+        max_sector_pct = self._max_sector_pct
 
         # Get sector for ticker
         sector = SECTOR_MAP.get(ticker, "Unknown")
@@ -234,8 +218,7 @@ class RiskGuard:
 
         # Check if adding this position would exceed limit
         # (Simplified: assume we'd add max position size)
-        max_position_pct = risk_rules.get("max_position_size_pct", 0.15)
-        potential_exposure = current_sector_exposure + max_position_pct
+        potential_exposure = current_sector_exposure + self._max_position_pct
 
         if potential_exposure > max_sector_pct:
             notes.append(
@@ -246,10 +229,31 @@ class RiskGuard:
 
         return True
 
+    def reserve_entry(self, ticker: str, notional_usd: float) -> tuple[str, float]:
+        """
+        Count an approved entry against portfolio limits while its order executes.
+
+        Args:
+            ticker: Ticker symbol
+            notional_usd: Approved position size
+
+        Returns:
+            Reservation to pass to release_entry() once execution has finished
+        """
+        reservation = (ticker, notional_usd)
+        self._pending_entries.append(reservation)
+        return reservation
+
+    def release_entry(self, reservation: tuple[str, float]) -> None:
+        """Drop a reservation (a filled order is an open position by now)."""
+        self._pending_entries.remove(reservation)
+
     async def get_portfolio_state(self) -> PortfolioState:
         """
         Get current portfolio state from broker and database.
 
+        Entries reserved with reserve_entry() count as open positions.
+
         Returns:
             PortfolioState
         """
@@ -260,16 +264,20 @@ class RiskGuard:
         # (In production, this would query Alpaca for real-time account data)
         equity = self.settings.initial_equity  # Simplified
         cash = equity  # Simplified
-        positions_count = len(open_positions)
+        positions_count = len(open_positions) + len(self._pending_entries)
         daily_pnl = 0.0  # Simplified
         daily_pnl_pct = 0.0  # Simplified
 
-        # Calculate sector exposure
-        sector_exposure = {}
+        # Calculate sector exposure (sum notional per sector, divide once)
+        sector_of = SECTOR_MAP.get
+        sector_notional: dict[str, float] = {}
         for pos in open_positions:
-            sector = SECTOR_MAP.get(pos.ticker, "Unknown")
-            exposure = abs(pos.quantity * pos.entry_price) / equity
-            sector_exposure[sector] = sector_exposure.get(sector, 0.0) + exposure
+            sector = sector_of(pos.ticker, "Unknown")
+            sector_notional[sector] = sector_notional.get(sector, 0.0) + abs(pos.quantity * pos.entry_price)
+        for ticker, notional in self._pending_entries:
+            sector = sector_of(ticker, "Unknown")
+            sector_notional[sector] = sector_notional.get(sector, 0.0) + notional
+        sector_exposure = {sector: notional / equity for sector, notional in sector_notional.items()}
 
         return PortfolioState(
             equity=equity,
@@ -4,17 +4,22 @@ Fetches and filters news from configured RSS feeds.
 """
 
 import asyncio
-from datetime import datetime, timedelta
+import calendar
+import hashlib
+import html
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 import feedparser
-from bs4 import BeautifulSoup
 import aiohttp
 
 from app.schemas import RSSFeedItem
 from app.config import RSS_FEEDS, get_settings
 from app.utils import (
     generate_cluster_id, get_utc_now, to_utc,
-    extract_tickers_from_text, setup_logger
+    compile_ticker_pattern, setup_logger
 )
 
 logger = setup_logger(__name__)
@@ -22,6 +27,29 @@ logger = setup_logger(__name__)
 # User-Agent to avoid blocking
 USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
 
+# HTML stripping for snippets: drop non-text blocks, then tags, then collapse whitespace.
+# Blocks and tags left open (e.g. by truncation) run to the end of the text.
+_NON_TEXT_RE = re.compile(
+    r'<!--.*?(?:-->|\Z)|<(script|style)\b.*?(?:</\1\s*>|\Z)',
+    re.DOTALL | re.IGNORECASE
+)
+_TAG_RE = re.compile(r'<[^>]*(?:>|\Z)')
+_WS_RE = re.compile(r'\s+')
+
+# Snippet length kept, and how much raw HTML is scanned to produce it
+SNIPPET_MAX_CHARS = 500
+SNIPPET_SCAN_CHARS = 8 * SNIPPET_MAX_CHARS
+
+# Shared HTTP session: pooled keep-alive connections and cached DNS across polls
+RSS_CONNECTION_LIMIT = 32
+RSS_DNS_CACHE_SECONDS = 300
+
+# Feeds fetched at once; the rest queue instead of flooding the connector/resolver
+RSS_MAX_CONCURRENT_FEEDS = 8
+
+# Worker threads for feedparser (CPU-bound; kept off the default executor)
+PARSE_POOL_WORKERS = max(2, (os.cpu_count() or 2) // 2)
+
 
 class RSSFetcher:
     """
@@ -32,6 +60,20 @@ class RSSFetcher:
         self.settings = get_settings()
         self.feeds = RSS_FEEDS
         self.whitelist = self.settings.tickers
+        self._ticker_re = compile_ticker_pattern(tuple(self.whitelist))
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._fetch_sem = asyncio.Semaphore(RSS_MAX_CONCURRENT_FEEDS)
+        self._parse_pool = ThreadPoolExecutor(
+            max_workers=PARSE_POOL_WORKERS,
+            thread_name_prefix="rss-parse"
+        )
+
+        # Validators from the last 200 response per feed URL, for conditional GETs
+        self._etags: dict[str, str] = {}
+        self._last_mod: dict[str, str] = {}
+
+        # feed URL -> (body digest, whitelisted items from that body)
+        self._parsed: dict[str, tuple[bytes, list[RSSFeedItem]]] = {}
 
     async def fetch_recent_items(
         self,
@@ -60,25 +102,41 @@ class RSSFetcher:
         ]
         results = await asyncio.gather(*tasks, return_exceptions=True)
 
-        # Collect all items
-        all_items = []
+        # Collect and deduplicate by cluster_id in one pass (first seen wins)
+        seen: dict[str, RSSFeedItem] = {}
+        total = 0
         for result in results:
             if isinstance(result, Exception):
                 logger.error(f"Feed fetch failed: {result}")
                 continue
-            all_items.extend(result)
+            total += len(result)
+            for item in result:
+                seen.setdefault(item.cluster_id, item)
 
-        # Deduplicate by cluster_id
-        seen_clusters = set()
-        unique_items = []
-        for item in all_items:
-            if item.cluster_id not in seen_clusters:
-                seen_clusters.add(item.cluster_id)
-                unique_items.append(item)
-
-        logger.info(f"Fetched {len(unique_items)} unique items (from {len(all_items)} total)")
+        unique_items = list(seen.values())
+        logger.info(f"Fetched {len(unique_items)} unique items (from {total} total)")
         return unique_items
 
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared HTTP session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=10),
+                headers={'User-Agent': USER_AGENT},
+                connector=aiohttp.TCPConnector(
+                    limit=RSS_CONNECTION_LIMIT,
+                    ttl_dns_cache=RSS_DNS_CACHE_SECONDS
+                )
+            )
+        return self._session
+
+    async def close(self) -> None:
+        """Close the shared HTTP session and the parser pool."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        self._parse_pool.shutdown(wait=False)
+
     async def _fetch_feed(
         self,
         source: str,
@@ -96,78 +154,122 @@ class RSSFetcher:
         Returns:
             List of filtered RSS items
         """
-        try:
-            # Fetch RSS content with aiohttp (with timeout and User-Agent)
-            timeout = aiohttp.ClientTimeout(total=10)
-            headers = {'User-Agent': USER_AGENT}
+        async with self._fetch_sem:
+            try:
+                # Conditional GET: unchanged feeds answer 304 and skip parsing
+                headers = {}
+                if url in self._etags:
+                    headers['If-None-Match'] = self._etags[url]
+                if url in self._last_mod:
+                    headers['If-Modified-Since'] = self._last_mod[url]
+
+                # Fetch RSS content over the shared session (timeout and User-Agent set there)
+                async with self._get_session().get(url, headers=headers) as response:
+                    if response.status == 304:
+                        logger.debug(f"Feed {source} not modified")
+                        return []
 
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.get(url, headers=headers) as response:
                     if response.status != 200:
                         logger.warning(f"Feed {source} returned status {response.status}")
                         return []
 
-                    content = await response.text()
-
-            # Parse RSS content with feedparser (no network I/O)
-            loop = asyncio.get_event_loop()
-            feed = await loop.run_in_executor(None, feedparser.parse, content)
-
-            if feed.bozo:
-                logger.warning(f"Feed parse warning for {source}: {feed.get('bozo_exception', 'Unknown')}")
+                    # Raw bytes: feedparser detects the charset from the XML
+                    # declaration, so skip aiohttp's decode to str
+                    content = await response.read()
+
+                    if etag := response.headers.get('ETag'):
+                        self._etags[url] = etag
+                    if last_mod := response.headers.get('Last-Modified'):
+                        self._last_mod[url] = last_mod
+
+                # Identical bodies (no ETag support, or re-served content) reuse the
+                # items built from the last parse; only the time filter is re-applied
+                digest = hashlib.blake2b(content, digest_size=16).digest()
+                cached = self._parsed.get(url)
+                if cached is not None and cached[0] == digest:
+                    candidates = cached[1]
+                else:
+                    candidates = await self._parse_items(source, content)
+                    self._parsed[url] = (digest, candidates)
+
+                items = [item for item in candidates if item.published_at >= since]
+
+                logger.debug(f"Fetched {len(items)} items from {source}")
+                return items
+
+            except asyncio.TimeoutError:
+                logger.warning(f"Timeout fetching feed {source} (10s limit)")
+                return []
+            except aiohttp.ClientError as e:
+                logger.warning(f"Network error fetching feed {source}: {e}")
+                return []
+            except Exception as e:
+                logger.error(f"Error fetching feed {source}: {e}")
+                return []
+
+    async def _parse_items(self, source: str, content: bytes) -> list[RSSFeedItem]:
+        """
+        Parse a feed body into items mentioning whitelisted tickers.
 
-            items = []
-            for entry in feed.entries:
-                # Parse publication time
-                pub_time = self._parse_pub_time(entry)
-                if pub_time is None or pub_time < since:
-                    continue
+        Args:
+            source: Feed source name
+            content: Raw (undecoded) feed body
 
-                # Extract headline and snippet
-                headline = entry.get('title', '')
-                snippet = self._extract_snippet(entry)
-                combined_text = f"{headline} {snippet}"
+        Returns:
+            Items with a publication time, not yet filtered by time
+        """
+        # Parse RSS content with feedparser (no network I/O)
+        feed = await asyncio.get_running_loop().run_in_executor(
+            self._parse_pool,
+            feedparser.parse,
+            content
+        )
+
+        if feed.bozo:
+            logger.warning(f"Feed parse warning for {source}: {feed.get('bozo_exception', 'Unknown')}")
+
+        items = []
+        for entry in feed.entries:
+            # Parse publication time
+            pub_time = self._parse_pub_time(entry)
+            if pub_time is None:
+                continue
 
-                # Check if any whitelisted ticker is mentioned
-                tickers = extract_tickers_from_text(combined_text, self.whitelist)
-                if not tickers:
-                    continue
+            # Extract headline and snippet
+            headline = entry.get('title', '')
+            snippet = self._extract_snippet(entry)
+            combined_text = f"{headline} {snippet}"
 
-                # Create RSS item
-                cluster_id = generate_cluster_id(source, headline)
-                item = RSSFeedItem(
-                    source=source,
-                    headline=headline,
-                    url=entry.get('link', ''),
-                    published_at=pub_time,
-                    snippet=snippet,
-                    cluster_id=cluster_id
-                )
-                items.append(item)
+            # Check if any whitelisted ticker is mentioned
+            if not self._ticker_re.search(combined_text.upper()):
+                continue
 
-            logger.debug(f"Fetched {len(items)} items from {source}")
-            return items
+            # Create RSS item
+            cluster_id = generate_cluster_id(source, headline)
+            items.append(RSSFeedItem(
+                source=source,
+                headline=headline,
+                url=entry.get('link', ''),
+                published_at=pub_time,
+                snippet=snippet,
+                cluster_id=cluster_id
+            ))
 
-        except asyncio.TimeoutError:
-            logger.warning(f"Timeout fetching feed {source} (10s limit)")
-            return []
-        except aiohttp.ClientError as e:
-            logger.warning(f"Network error fetching feed {source}: {e}")
-            return []
-        except Exception as e:
-            logger.error(f"Error fetching feed {source}: {e}")
-            return []
+        return items
 
     def _parse_pub_time(self, entry: dict) -> Optional[datetime]:
         """Parse publication time from feed entry."""
-        # Try different time fields
-        for field in ['published_parsed', 'updated_parsed', 'created_parsed']:
-            if field in entry and entry[field]:
-                try:
-                    dt = datetime(*entry[field][:6])
-                    return to_utc(dt)
-                except Exception:
-                    continue
+        # Try different time fields (feedparser normalizes these struct_times to UTC)
+        parsed = (
+            entry.get('published_parsed')
+            or entry.get('updated_parsed')
+            or entry.get('created_parsed')
+        )
+        if parsed:
+            try:
+                return datetime.fromtimestamp(calendar.timegm(parsed), tz=timezone.utc)
+            except (OverflowError, ValueError, OSError):
+                pass
 
         # Fallback: try string parsing
         for field in ['published', 'updated', 'created']:
@@ -190,19 +292,21 @@ class RSSFetcher:
         if not text and 'content' in entry and entry['content']:
             text = entry['content'][0].get('value', '')
 
-        # Clean HTML
+        # Clean HTML; only the head of long bodies can reach the snippet
         if text:
-            soup = BeautifulSoup(text, 'html.parser')
-            text = soup.get_text(separator=' ', strip=True)
+            text = text[:SNIPPET_SCAN_CHARS]
+            text = _TAG_RE.sub(' ', _NON_TEXT_RE.sub(' ', text))
+            text = _WS_RE.sub(' ', html.unescape(text)).strip()
 
         # Truncate
-        return text[:500] if text else ''
+        return text[:SNIPPET_MAX_CHARS] if text else ''
 
 
 async def main():
     """Test RSS fetcher."""
     fetcher = RSSFetcher()
     items = await fetcher.fetch_recent_items(delay_minutes=60)
+    await fetcher.close()
 
     print(f"\nFetched {len(items)} items:\n")
     for item in items[:5]:  # Show first 5
@@ -3,13 +3,21 @@ Rule-based decision engine for trade signals.
 Evaluates events and market conditions against configured rules.
 """
 
-from typing import Optional
-from app.schemas import EventCard, MarketState, PreSignal, ActionType
+from typing import Optional, Union
+import numpy as np
+from app.schemas import EventCard, MarketState, PreSignal, ActionType, EventBatch, MarketBatch
 from app.config import get_rules
 from app.utils import setup_logger, get_utc_now
 
 logger = setup_logger(__name__)
 
+# Check order used by evaluate_batch failure codes (index into this tuple)
+BATCH_CHECKS = (
+    "spike_1m", "session", "disallowed_category", "min_reliability",
+    "sentiment", "impact", "dP_5m_min", "dP_5m_max",
+    "vol_ratio", "spread", "rsi_3", "allowed_category",
+)
+
 
 class RuleEngine:
     """
@@ -18,14 +26,37 @@ class RuleEngine:
 
     def __init__(self):
         self.rules = get_rules()
+        self.refresh_rules()
+        self.rules.on_reload(self.refresh_rules)
 
-    def evaluate(self, event: EventCard, market: MarketState) -> PreSignal:
+    def refresh_rules(self) -> None:
+        """Re-read cached skip/entry rules (called by RulesConfig.reload)."""
+        skip_rules = self.rules.skip
+        entry_rules = self.rules.entry
+
+        self._spike_threshold = skip_rules.get("spike01_gt_pct", 5.0)
+        self._disallow_sessions = frozenset(skip_rules.get("disallow_session", ()))
+        self._disallow_categories = frozenset(skip_rules.get("disallow_categories", ()))
+        self._min_reliability = skip_rules.get("min_reliability", 0.60)
+
+        self._min_sentiment = entry_rules.get("min_sentiment", 0.70)
+        self._min_impact = entry_rules.get("min_impact", 0.70)
+        self._dp5m_min = entry_rules.get("dp5m_min_pct", 1.0)
+        self._dp5m_max = entry_rules.get("dp5m_max_pct", 4.0)
+        self._min_vol_ratio = entry_rules.get("min_vol_ratio", 3.0)
+        self._max_spread_bp = entry_rules.get("max_spread_bp", 50)
+        self._max_rsi = entry_rules.get("max_rsi3", 75)
+        self._allowed_categories = frozenset(entry_rules.get("allowed_categories", ()))
+
+    def evaluate(self, event: EventCard, market: MarketState, verbose: bool = True) -> PreSignal:
         """
         Evaluate event and market state to generate trading signal.
 
         Args:
             event: News event
             market: Current market state
+            verbose: Run every entry check and report all failures; when False,
+                stop at the first failed check (one reason, partial metrics)
 
         Returns:
             PreSignal with ENTRY or SKIP decision
@@ -33,11 +64,14 @@ class RuleEngine:
         reasons = []
         metrics = {}
 
+        # PreSignals skip validation (inputs are already-validated models), so
+        # action is passed as its string value, as use_enum_values would store it
+
         # First check SKIP conditions (highest priority)
         skip_result = self._check_skip_conditions(event, market, reasons, metrics)
         if skip_result:
-            return PreSignal(
-                action=ActionType.SKIP,
+            return PreSignal.model_construct(
+                action=ActionType.SKIP.value,
                 window_hint="N/A",
                 metrics=metrics,
                 reasons=reasons,
@@ -46,10 +80,10 @@ class RuleEngine:
             )
 
         # Then check ENTRY conditions
-        entry_result = self._check_entry_conditions(event, market, reasons, metrics)
+        entry_result = self._check_entry_conditions(event, market, reasons, metrics, verbose)
         if entry_result:
-            return PreSignal(
-                action=ActionType.ENTRY,
+            return PreSignal.model_construct(
+                action=ActionType.ENTRY.value,
                 window_hint="[1,5]m",
                 metrics=metrics,
                 reasons=reasons,
@@ -59,8 +93,8 @@ class RuleEngine:
 
         # Default: SKIP
         reasons.append("Did not meet entry criteria")
-        return PreSignal(
-            action=ActionType.SKIP,
+        return PreSignal.model_construct(
+            action=ActionType.SKIP.value,
             window_hint="N/A",
             metrics=metrics,
             reasons=reasons,
@@ -68,6 +102,57 @@ class RuleEngine:
             ticker=market.ticker
         )
 
+    def evaluate_batch(
+        self,
+        events: Union[EventBatch, list[EventCard]],
+        markets: Union[MarketBatch, list[MarketState]]
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Evaluate many (event, market) pairs at once, e.g. for backtests.
+
+        Applies the same SKIP and ENTRY rules as evaluate() as column-wise
+        NumPy comparisons, without building reasons, metrics or PreSignals.
+        Columnar callers can pass EventBatch/MarketBatch directly and skip
+        building models.
+
+        Args:
+            events: News events, as models or columns
+            markets: Market states aligned with events, as models or columns
+
+        Returns:
+            (entry_mask, failed_check): boolean ENTRY mask, and the index into
+            BATCH_CHECKS of the first failed check (-1 where ENTRY)
+        """
+        if not isinstance(events, EventBatch):
+            events = EventBatch.from_events(events)
+        if not isinstance(markets, MarketBatch):
+            markets = MarketBatch.from_markets(markets)
+
+        category = events.category
+        dp_5m = markets.dP_5m
+
+        # One row per check, in BATCH_CHECKS order; True = check failed
+        # (np.isin needs sequences, not sets)
+        failures = np.vstack([
+            np.abs(markets.dP_1m) > self._spike_threshold,
+            np.isin(markets.session, list(self._disallow_sessions)),
+            np.isin(category, list(self._disallow_categories)),
+            events.reliability < self._min_reliability,
+            events.sentiment < self._min_sentiment,
+            events.reliability < self._min_impact,
+            dp_5m < self._dp5m_min,
+            dp_5m > self._dp5m_max,
+            markets.vol_ratio_1m < self._min_vol_ratio,
+            markets.spread_bp > self._max_spread_bp,
+            markets.rsi_3 > self._max_rsi,
+            np.isin(category, list(self._allowed_categories), invert=True) if self._allowed_categories
+            else np.zeros(len(category), dtype=bool),
+        ])
+
+        entry_mask = ~failures.any(axis=0)
+        failed_check = np.where(entry_mask, -1, failures.argmax(axis=0))
+        return entry_mask, failed_check
+
     def _check_skip_conditions(
         self,
         event: EventCard,
@@ -78,31 +163,27 @@ class RuleEngine:
         """
         Check SKIP conditions. Return True if should skip.
         """
-        skip_rules = self.rules.skip
-
         # Check 0-1 minute spike
-        spike_threshold = skip_rules.get("spike01_gt_pct", 5.0)
+        spike_threshold = self._spike_threshold
         if abs(market.dP_1m) > spike_threshold:
             reasons.append(f"Excessive 1m spike: {market.dP_1m:.2f}% (limit: {spike_threshold}%)")
             metrics["spike_1m"] = market.dP_1m
             return True
 
         # Check session restrictions
-        disallowed_sessions = skip_rules.get("disallow_session", [])
-        if market.session in disallowed_sessions:
+        if market.session in self._disallow_sessions:
             reasons.append(f"Session '{market.session}' is disallowed")
             # Note: session is string, not stored in metrics
             return True
 
         # Check category blocklist
-        disallowed_categories = skip_rules.get("disallow_categories", [])
-        if event.category in disallowed_categories:
+        if event.category in self._disallow_categories:
             reasons.append(f"Category '{event.category}' is disallowed")
             # Note: category is string, not stored in metrics
             return True
 
         # Check minimum reliability
-        min_reliability = skip_rules.get("min_reliability", 0.60)
+        min_reliability = self._min_reliability
         if event.reliability < min_reliability:
             reasons.append(f"Low reliability: {event.reliability:.2f} (min: {min_reliability})")
             metrics["reliability"] = event.reliability
@@ -115,66 +196,83 @@ class RuleEngine:
         event: EventCard,
         market: MarketState,
         reasons: list[str],
-        metrics: dict
+        metrics: dict,
+        verbose: bool = True
     ) -> bool:
         """
         Check ENTRY conditions. Return True if should enter.
+
+        Unless verbose, returns at the first failed check.
         """
-        entry_rules = self.rules.entry
         passed = True
 
         # Sentiment check
-        min_sentiment = entry_rules.get("min_sentiment", 0.70)
+        min_sentiment = self._min_sentiment
         metrics["sentiment"] = event.sentiment
         if event.sentiment < min_sentiment:
             reasons.append(f"Sentiment too low: {event.sentiment:.2f} (min: {min_sentiment})")
             passed = False
+            if not verbose:
+                return False
 
         # Impact/reliability check
-        min_impact = entry_rules.get("min_impact", 0.70)
+        min_impact = self._min_impact
         metrics["reliability"] = event.reliability
         if event.reliability < min_impact:
             reasons.append(f"Impact/reliability too low: {event.reliability:.2f} (min: {min_impact})")
             passed = False
+            if not verbose:
+                return False
 
         # 5-minute price change check
-        dp5m_min = entry_rules.get("dp5m_min_pct", 1.0)
-        dp5m_max = entry_rules.get("dp5m_max_pct", 4.0)
+        dp5m_min = self._dp5m_min
+        dp5m_max = self._dp5m_max
         metrics["dP_5m"] = market.dP_5m
 
         if market.dP_5m < dp5m_min:
             reasons.append(f"5m price change too small: {market.dP_5m:.2f}% (min: {dp5m_min}%)")
             passed = False
+            if not verbose:
+                return False
         elif market.dP_5m > dp5m_max:
             reasons.append(f"5m price change too large: {market.dP_5m:.2f}% (max: {dp5m_max}%)")
             passed = False
+            if not verbose:
+                return False
 
         # Volume ratio check
-        min_vol_ratio = entry_rules.get("min_vol_ratio", 3.0)
+        min_vol_ratio = self._min_vol_ratio
         metrics["vol_ratio"] = market.vol_ratio_1m
         if market.vol_ratio_1m < min_vol_ratio:
             reasons.append(f"Volume ratio too low: {market.vol_ratio_1m:.2f}x (min: {min_vol_ratio}x)")
             passed = False
+            if not verbose:
+                return False
 
         # Spread check
-        max_spread_bp = entry_rules.get("max_spread_bp", 50)
+        max_spread_bp = self._max_spread_bp
         metrics["spread_bp"] = market.spread_bp
         if market.spread_bp > max_spread_bp:
             reasons.append(f"Spread too wide: {market.spread_bp} bp (max: {max_spread_bp} bp)")
             passed = False
+            if not verbose:
+                return False
 
         # RSI check (avoid overbought)
-        max_rsi = entry_rules.get("max_rsi3", 75)
+        max_rsi = self._max_rsi
         metrics["rsi_3"] = market.rsi_3
         if market.rsi_3 > max_rsi:
             reasons.append(f"RSI too high (overbought): {market.rsi_3:.1f} (max: {max_rsi})")
             passed = False
+            if not verbose:
+                return False
 
         # Category allowlist check (if configured)
-        allowed_categories = entry_rules.get("allowed_categories", [])
-        if allowed_categories and event.category not in allowed_categories:
+        if self._allowed_categories and event.category not in self._allowed_categories:
             reasons.append(f"Category '{event.category}' not in allowlist")
             passed = False
+            if not verbose:
+                return False
 
         # If all checks passed, add positive reasons
         if passed:
@@ -3,10 +3,13 @@ Data schemas for the automated trading system.
 All models use Pydantic for validation and serialization.
 """
 
+from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Literal, Optional, Any, Dict
+from functools import cached_property
+from typing import Literal, NamedTuple, Optional, Any, Dict
+import numpy as np
 from pydantic import BaseModel, Field, validator, ConfigDict
-from enum import Enum
+from enum import Enum, StrEnum
 
 
 def utc_now() -> datetime:
@@ -39,6 +42,21 @@ class ActionType(str, Enum):
     SKIP = "SKIP"
 
 
+class ExitAction(StrEnum):
+    """Position exit actions (str() is the plain value, for logs and storage)"""
+    HOLD = "HOLD"
+    PARTIAL_SELL = "PARTIAL_SELL"
+    FULL_SELL = "FULL_SELL"
+
+
+class ExitReason(StrEnum):
+    """Exit rules that trigger a sell"""
+    HARD_STOP = "HARD_STOP"
+    LVL1_PROFIT = "LVL1_PROFIT"
+    TRAILING_STOP = "TRAILING_STOP"
+    TIME_LIMIT = "TIME_LIMIT"
+
+
 class OrderStatus(str, Enum):
     """Order execution statuses"""
     PENDING = "pending"
@@ -123,6 +141,16 @@ class ApprovedSignal(BaseModel):
     shares: Optional[int] = Field(default=None, description="Number of shares to trade")
     timestamp: datetime = Field(default_factory=utc_now, description="Approval timestamp (UTC)")
 
+    @cached_property
+    def stop_mult(self) -> float:
+        """Fill-price multiplier for the hard stop-loss level."""
+        return 1 - self.hard_stop_bp / 10000.0
+
+    @cached_property
+    def tp_mult(self) -> float:
+        """Fill-price multiplier for the take-profit level."""
+        return 1 + self.take_profit_bp / 10000.0
+
 
 class OrderRecord(BaseModel):
     """
@@ -164,6 +192,24 @@ class Position(BaseModel):
     partial_sold: bool = Field(default=False, description="Whether partial profit taking has occurred")
 
 
+class ExitDecision(NamedTuple):
+    """
+    Exit decision for one position (returned by TradeManager.manage_exit).
+
+    Also readable by field name, e.g. decision["action"], like the dict it replaces.
+    """
+    action: ExitAction
+    reason: str  # ExitReason, or a status note on HOLD
+    sell_qty: int
+    sell_price: float
+    new_peak: float
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return getattr(self, key)
+        return tuple.__getitem__(self, key)
+
+
 class RunRecord(BaseModel):
     """
     Record of a single automation cycle run.
@@ -203,3 +249,49 @@ class PortfolioState(BaseModel):
     sector_exposure: dict[str, float] = Field(default_factory=dict, description="Exposure by sector")
     open_positions: list[Position] = Field(default_factory=list, description="Currently open positions")
     timestamp: datetime = Field(default_factory=utc_now, description="State timestamp (UTC)")
+
+
+@dataclass
+class EventBatch:
+    """
+    Column-oriented (struct-of-arrays) event fields for batch rule evaluation.
+    Arrays are aligned by index; floats are float64 to match the scalar path.
+    """
+    sentiment: np.ndarray
+    reliability: np.ndarray
+    category: np.ndarray
+
+    @classmethod
+    def from_events(cls, events: list[EventCard]) -> "EventBatch":
+        """Build columns from a list of EventCards."""
+        return cls(
+            sentiment=np.array([e.sentiment for e in events], dtype=np.float64),
+            reliability=np.array([e.reliability for e in events], dtype=np.float64),
+            category=np.array([e.category for e in events], dtype=object),
+        )
+
+
+@dataclass
+class MarketBatch:
+    """
+    Column-oriented (struct-of-arrays) market fields for batch rule evaluation.
+    Arrays are aligned by index with the matching EventBatch.
+    """
+    dP_1m: np.ndarray
+    dP_5m: np.ndarray
+    vol_ratio_1m: np.ndarray
+    spread_bp: np.ndarray
+    rsi_3: np.ndarray
+    session: np.ndarray
+
+    @classmethod
+    def from_markets(cls, markets: list[MarketState]) -> "MarketBatch":
+        """Build columns from a list of MarketStates."""
+        return cls(
+            dP_1m=np.array([m.dP_1m for m in markets], dtype=np.float64),
+            dP_5m=np.array([m.dP_5m for m in markets], dtype=np.float64),
+            vol_ratio_1m=np.array([m.vol_ratio_1m for m in markets], dtype=np.float64),
+            spread_bp=np.array([m.spread_bp for m in markets], dtype=np.float64),
+            rsi_3=np.array([m.rsi_3 for m in markets], dtype=np.float64),
+            session=np.array([m.session for m in markets], dtype=object),
+        )
@@ -4,11 +4,17 @@ Handles SQLite database operations and Parquet logging.
 """
 
 import sqlite3
-import json
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Iterator, Optional
+from urllib.parse import urlsplit
+import numpy as np
+import orjson
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 
 from app.schemas import (
     EventCard, MarketState, PreSignal, ApprovedSignal,
@@ -18,6 +24,25 @@ from app.utils import get_utc_now, setup_logger
 
 logger = setup_logger(__name__)
 
+# Max cluster IDs per IN (...) query (SQLite's default variable limit is 999)
+EXISTS_QUERY_CHUNK_SIZE = 500
+
+# positions.entry_time_epoch: UTC seconds parsed from the ISO entry_time by SQLite
+ENTRY_EPOCH_EXPR = "CAST(strftime('%s', entry_time) AS INTEGER)"
+
+# Per-connection settings. WAL (set once in _init_database, persisted in the
+# file) makes synchronous=NORMAL safe: commits no longer fsync every time.
+SQLITE_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",  # 64 MB page cache (negative = KiB)
+    "PRAGMA mmap_size=268435456",  # 256 MB
+)
+
+# Parquet logs are written once and read rarely: favor size over speed
+PARQUET_COMPRESSION = "zstd"
+PARQUET_COMPRESSION_LEVEL = 3
+
 
 class Storage:
     """
@@ -26,22 +51,111 @@ class Storage:
 
     def __init__(self, db_path: str = "data/autotrader.db"):
         self.db_path = db_path
-        self.data_dir = Path(db_path).parent
+        # "file:..." paths are SQLite URIs, e.g. "file:name?mode=memory&cache=shared"
+        self._uri = db_path.startswith("file:")
+        self._in_memory = db_path == ":memory:" or (self._uri and "mode=memory" in db_path)
+        self.data_dir = Path(urlsplit(db_path).path if self._uri else db_path).parent
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+        self._tx_depth = 0  # > 0 while inside transaction()
+        # log_type -> (UTC date, open writer for that day's Parquet file)
+        self._pq_writers: dict[str, tuple[str, pq.ParquetWriter]] = {}
         self._ensure_directories()
         self._init_database()
 
     def _ensure_directories(self) -> None:
         """Ensure all required directories exist."""
+        if self._in_memory:
+            return  # Nothing on disk; Parquet dirs are still created on first write
         self.data_dir.mkdir(parents=True, exist_ok=True)
         (self.data_dir / "events").mkdir(exist_ok=True)
         (self.data_dir / "market").mkdir(exist_ok=True)
         (self.data_dir / "signals").mkdir(exist_ok=True)
 
+    def _get_conn(self) -> sqlite3.Connection:
+        """Get the shared connection, opening it (with tuning PRAGMAs) on first use."""
+        if self._conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, uri=self._uri)
+            for pragma in SQLITE_PRAGMAS:
+                conn.execute(pragma)
+            self._conn = conn
+        return self._conn
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """
+        Use the shared database connection inside a transaction.
+
+        The connection is reused for the life of this Storage. The block
+        commits on success and rolls back on error, unless it runs inside
+        transaction(), which then commits once for all of its writes. The
+        lock serializes callers from other threads.
+        """
+        with self._lock:
+            conn = self._get_conn()
+            if self._tx_depth:
+                yield conn
+            else:
+                with conn:
+                    yield conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Group several Storage writes into one transaction with a single commit.
+
+        Takes the write lock up front (BEGIN IMMEDIATE). Nested uses join the
+        outermost transaction. Keep awaits out of the block: coroutines on the
+        same thread would join it too.
+
+        Example:
+            with storage.transaction():
+                storage.save_orders(orders)
+                storage.save_positions(positions)
+        """
+        with self._lock:
+            conn = self._get_conn()
+            if self._tx_depth:
+                self._tx_depth += 1
+                try:
+                    yield
+                finally:
+                    self._tx_depth -= 1
+                return
+
+            conn.execute("BEGIN IMMEDIATE")
+            self._tx_depth = 1
+            try:
+                yield
+            except BaseException:
+                conn.rollback()
+                raise
+            else:
+                conn.commit()
+            finally:
+                self._tx_depth = 0
+
+    def close(self) -> None:
+        """Close the shared database connection (reopened on next use) and Parquet logs."""
+        self._close_parquet_writers()
+        with self._lock:
+            if self._conn is not None:
+                # Refresh planner statistics where SQLite judges them stale
+                self._conn.execute("PRAGMA optimize")
+                self._conn.close()
+                self._conn = None
+
     def _init_database(self) -> None:
         """Initialize SQLite database with required tables."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
 
+            # Write-ahead logging: readers don't block the writer, and small
+            # commits are appended instead of rewriting journal pages
+            journal_mode = cursor.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+            if journal_mode.lower() != "wal" and not self._in_memory:
+                logger.warning(f"SQLite WAL unavailable, using journal_mode={journal_mode}")
+
             # Events table
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS events (
@@ -104,7 +218,7 @@ class Storage:
             """)
 
             # Positions table
-            cursor.execute("""
+            cursor.execute(f"""
                 CREATE TABLE IF NOT EXISTS positions (
                     position_id INTEGER PRIMARY KEY AUTOINCREMENT,
                     ticker TEXT NOT NULL,
@@ -121,6 +235,7 @@ class Storage:
                     partial_sold INTEGER DEFAULT 0,
                     realized_pnl REAL,
                     status TEXT NOT NULL DEFAULT 'open',
+                    entry_time_epoch INTEGER GENERATED ALWAYS AS ({ENTRY_EPOCH_EXPR}) VIRTUAL,
                     FOREIGN KEY (event_id) REFERENCES events (event_id),
                     FOREIGN KEY (order_id) REFERENCES orders (order_id)
                 )
@@ -171,14 +286,41 @@ class Storage:
                 conn.commit()
                 logger.info("Migration completed: partial_sold column added")
 
+            try:
+                cursor.execute("SELECT entry_time_epoch FROM positions LIMIT 1")
+            except sqlite3.OperationalError:
+                logger.info("Migrating positions table: adding entry_time_epoch column")
+                # Generated: existing rows need no backfill and writers never set it
+                cursor.execute(
+                    "ALTER TABLE positions ADD COLUMN entry_time_epoch INTEGER "
+                    f"GENERATED ALWAYS AS ({ENTRY_EPOCH_EXPR}) VIRTUAL"
+                )
+                conn.commit()
+                logger.info("Migration completed: entry_time_epoch column added")
+
             # Create indexes AFTER migrations to ensure all columns exist
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_events_published ON events (published_at)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_events_cluster ON events (cluster_id)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_events_processed ON events (processed, published_at)")
+            # Partial index: covers only the few unprocessed rows, so the
+            # backlog query stays a small range scan as history grows
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_events_unprocessed "
+                "ON events (published_at DESC) WHERE processed = 0"
+            )
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_signals_event ON signals (event_id)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_orders_signal ON orders (signal_id)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_positions_status ON positions (status)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_runs_started ON runs (started_at)")
+            # Open positions only: read every cycle, updated/closed by order_id
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_positions_open "
+                "ON positions (order_id) WHERE status = 'open'"
+            )
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_positions_entry_epoch "
+                "ON positions (entry_time_epoch) WHERE status = 'open'"
+            )
 
             conn.commit()
 
@@ -186,33 +328,48 @@ class Storage:
 
     def save_event(self, event: EventCard) -> None:
         """Save event to database with processed=0 (unprocessed)."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
+        self.save_events([event])
+
+    def save_events(self, events: list[EventCard]) -> None:
+        """
+        Save several events in a single transaction (processed=0).
+
+        Args:
+            events: Events to insert (existing event IDs are ignored)
+        """
+        if not events:
+            return
+
+        created_at = get_utc_now().isoformat()
+
+        with self._connect() as conn:
+            conn.executemany("""
                 INSERT OR IGNORE INTO events
                 (event_id, cluster_id, headline, category, sentiment, reliability,
                  published_at, session, tickers, source, url, key_facts, created_at, processed)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0)
-            """, (
-                event.event_id,
-                event.cluster_id,
-                event.headline,
-                event.category,
-                event.sentiment,
-                event.reliability,
-                event.published_at.isoformat(),
-                event.session,
-                json.dumps(event.tickers),
-                event.source,
-                event.url,
-                json.dumps(event.key_facts),
-                get_utc_now().isoformat()
-            ))
-            conn.commit()
+            """, [
+                (
+                    event.event_id,
+                    event.cluster_id,
+                    event.headline,
+                    event.category,
+                    event.sentiment,
+                    event.reliability,
+                    event.published_at.isoformat(),
+                    event.session,
+                    orjson.dumps(event.tickers).decode(),
+                    event.source,
+                    event.url,
+                    orjson.dumps(event.key_facts).decode(),
+                    created_at
+                )
+                for event in events
+            ])
 
     def get_unprocessed_events(self, limit: int = 50) -> list[EventCard]:
         """Get unprocessed events from database."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT event_id, cluster_id, headline, category, sentiment, reliability,
@@ -223,9 +380,10 @@ class Storage:
                 LIMIT ?
             """, (limit,))
 
+            # Rows were validated as EventCards on the way in; skip re-validation
             events = []
             for row in cursor.fetchall():
-                events.append(EventCard(
+                events.append(EventCard.model_construct(
                     event_id=row[0],
                     cluster_id=row[1],
                     headline=row[2],
@@ -234,109 +392,159 @@ class Storage:
                     reliability=row[5],
                     published_at=datetime.fromisoformat(row[6]),
                     session=row[7],
-                    tickers=json.loads(row[8]),
+                    tickers=orjson.loads(row[8]),
                     source=row[9],
                     url=row[10],
-                    key_facts=json.loads(row[11])
+                    key_facts=orjson.loads(row[11])
                 ))
             return events
 
     def mark_event_processed(self, event_id: str) -> None:
         """Mark event as processed."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 UPDATE events
                 SET processed = 1
                 WHERE event_id = ?
             """, (event_id,))
-            conn.commit()
-            logger.debug(f"Marked event {event_id[:8]} as processed")
+            logger.debug("Marked event %.8s as processed", event_id)
 
     def save_signal(self, pre_signal: PreSignal, approved: ApprovedSignal) -> str:
         """Save signal to database and return signal_id."""
-        signal_id = f"{pre_signal.event_id}_{pre_signal.ticker}_{int(pre_signal.timestamp.timestamp())}"
+        return self.save_signals([(pre_signal, approved)])[0]
 
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
+    def save_signals(self, signals: list[tuple[PreSignal, ApprovedSignal]]) -> list[str]:
+        """
+        Save several signals in a single transaction.
+
+        Args:
+            signals: (pre_signal, approved) pairs
+
+        Returns:
+            Signal IDs, in input order
+        """
+        if not signals:
+            return []
+
+        created_at = get_utc_now().isoformat()
+        signal_ids = [
+            f"{pre_signal.event_id}_{pre_signal.ticker}_{int(pre_signal.timestamp.timestamp())}"
+            for pre_signal, _ in signals
+        ]
+
+        with self._connect() as conn:
+            conn.executemany("""
                 INSERT INTO signals
                 (signal_id, event_id, ticker, action, approved, size_usd,
                  entry_price, stop_bp, take_profit_bp, reasons, notes, created_at)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                signal_id,
-                pre_signal.event_id,
-                pre_signal.ticker,
-                pre_signal.action,
-                1 if approved.approved else 0,
-                approved.size_final_usd,
-                approved.entry_price_target,
-                approved.hard_stop_bp,
-                approved.take_profit_bp,
-                json.dumps(pre_signal.reasons),
-                json.dumps(approved.notes),
-                get_utc_now().isoformat()
-            ))
-            conn.commit()
+            """, [
+                (
+                    signal_id,
+                    pre_signal.event_id,
+                    pre_signal.ticker,
+                    pre_signal.action,
+                    1 if approved.approved else 0,
+                    approved.size_final_usd,
+                    approved.entry_price_target,
+                    approved.hard_stop_bp,
+                    approved.take_profit_bp,
+                    orjson.dumps(pre_signal.reasons).decode(),
+                    orjson.dumps(approved.notes).decode(),
+                    created_at
+                )
+                for signal_id, (pre_signal, approved) in zip(signal_ids, signals)
+            ])
 
-        return signal_id
+        return signal_ids
 
     def save_order(self, order: OrderRecord) -> None:
         """Save order to database."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
+        self.save_orders([order])
+
+    def save_orders(self, orders: list[OrderRecord]) -> None:
+        """
+        Save several orders in a single transaction.
+
+        Args:
+            orders: Orders to upsert (later entries win for repeated order IDs)
+        """
+        if not orders:
+            return
+
+        # An order buffered at submit and again at fill only needs its final state
+        latest = {order.order_id: order for order in orders}
+
+        with self._connect() as conn:
+            conn.executemany("""
                 INSERT OR REPLACE INTO orders
                 (order_id, signal_id, event_id, ticker, side, quantity, order_type,
                  limit_price, stop_price, status, submitted_at, filled_at,
                  filled_avg_price, filled_qty, error_message)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                order.order_id,
-                order.signal_id,
-                order.event_id,
-                order.ticker,
-                order.side,
-                order.quantity,
-                order.order_type,
-                order.limit_price,
-                order.stop_price,
-                order.status,
-                order.submitted_at.isoformat(),
-                order.filled_at.isoformat() if order.filled_at else None,
-                order.filled_avg_price,
-                order.filled_qty,
-                order.error_message
-            ))
-            conn.commit()
+            """, [self._order_row(order) for order in latest.values()])
+
+    @staticmethod
+    def _order_row(order: OrderRecord) -> tuple:
+        """Convert order to orders table row."""
+        return (
+            order.order_id,
+            order.signal_id,
+            order.event_id,
+            order.ticker,
+            order.side,
+            order.quantity,
+            order.order_type,
+            order.limit_price,
+            order.stop_price,
+            order.status,
+            order.submitted_at.isoformat(),
+            order.filled_at.isoformat() if order.filled_at else None,
+            order.filled_avg_price,
+            order.filled_qty,
+            order.error_message
+        )
 
     def save_position(self, position: Position) -> None:
         """Save position to database."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
+        self.save_positions([position])
+
+    def save_positions(self, positions: list[Position]) -> None:
+        """
+        Save several new positions in a single transaction.
+
+        Args:
+            positions: Positions to insert
+        """
+        if not positions:
+            return
+
+        with self._connect() as conn:
+            conn.executemany("""
                 INSERT INTO positions
                 (ticker, entry_price, quantity, entry_time, event_id, order_id,
                  stop_loss, take_profit, current_price, partial_sold, status)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'open')
-            """, (
-                position.ticker,
-                position.entry_price,
-                position.quantity,
-                position.entry_time.isoformat(),
-                position.event_id,
-                position.order_id,
-                position.stop_loss,
-                position.take_profit,
-                position.current_price or position.entry_price,
-                0  # partial_sold starts as False
-            ))
-            conn.commit()
+            """, [
+                (
+                    position.ticker,
+                    position.entry_price,
+                    position.quantity,
+                    position.entry_time.isoformat(),
+                    position.event_id,
+                    position.order_id,
+                    position.stop_loss,
+                    position.take_profit,
+                    position.current_price or position.entry_price,
+                    0  # partial_sold starts as False
+                )
+                for position in positions
+            ])
 
     def create_run(self, run: RunRecord) -> None:
         """Create new run record."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 INSERT INTO runs
@@ -348,11 +556,10 @@ class Storage:
                 run.status,
                 run.mode
             ))
-            conn.commit()
 
     def update_run(self, run: RunRecord) -> None:
         """Update existing run record."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 UPDATE runs
@@ -365,14 +572,13 @@ class Storage:
                 run.events_fetched,
                 run.signals_generated,
                 run.orders_placed,
-                json.dumps(run.errors),
+                orjson.dumps(run.errors).decode(),
                 run.run_id
             ))
-            conn.commit()
 
     def get_last_run_time(self) -> Optional[datetime]:
         """Get timestamp of last completed run."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT started_at FROM runs
@@ -392,7 +598,7 @@ class Storage:
 
         today_start = datetime.combine(date.today(), datetime.min.time())
 
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT DISTINCT ticker
@@ -404,7 +610,7 @@ class Storage:
 
     def get_open_positions(self) -> list[Position]:
         """Get all open positions."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT ticker, entry_price, quantity, entry_time, event_id,
@@ -413,9 +619,10 @@ class Storage:
                 WHERE status = 'open'
             """)
 
+            # Rows were validated as Positions on the way in; skip re-validation
             positions = []
             for row in cursor.fetchall():
-                positions.append(Position(
+                positions.append(Position.model_construct(
                     ticker=row[0],
                     entry_price=row[1],
                     quantity=row[2],
@@ -430,6 +637,37 @@ class Storage:
 
             return positions
 
+    def load_positions_for_exit_scan(self) -> dict[str, np.ndarray]:
+        """
+        Load open positions as columns for TradeManager-style batch exit scans.
+
+        Entry times come from the entry_time_epoch column (computed by SQLite),
+        so no per-row datetime parsing happens in Python.
+
+        Returns:
+            Arrays aligned by row: ticker, order_id (object), entry_price,
+            current_price (peak; entry price if unset), entry_epoch (UTC seconds),
+            quantity and partial_sold
+        """
+        with self._connect() as conn:
+            rows = conn.execute("""
+                SELECT ticker, order_id, entry_price, COALESCE(current_price, entry_price),
+                       entry_time_epoch, quantity, partial_sold
+                FROM positions
+                WHERE status = 'open'
+            """).fetchall()
+
+        columns = list(zip(*rows)) or [()] * 7
+        return {
+            "ticker": np.array(columns[0], dtype=object),
+            "order_id": np.array(columns[1], dtype=object),
+            "entry_price": np.array(columns[2], dtype=np.float64),
+            "current_price": np.array(columns[3], dtype=np.float64),
+            "entry_epoch": np.array(columns[4], dtype=np.int64),
+            "quantity": np.array(columns[5], dtype=np.int64),
+            "partial_sold": np.array(columns[6], dtype=bool),
+        }
+
     def update_position(
         self,
         order_id: str,
@@ -446,7 +684,7 @@ class Storage:
             quantity: Update remaining quantity (after partial sale)
             partial_sold: Mark as partially sold
         """
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
 
             # Build dynamic update query
@@ -473,7 +711,6 @@ class Storage:
                     WHERE order_id = ? AND status = 'open'
                 """
                 cursor.execute(query, params)
-                conn.commit()
 
     def close_position(
         self,
@@ -491,7 +728,7 @@ class Storage:
             exit_time: Exit timestamp
             realized_pnl: Realized profit/loss
         """
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 UPDATE positions
@@ -506,11 +743,10 @@ class Storage:
                 realized_pnl,
                 order_id
             ))
-            conn.commit()
 
     def event_exists(self, cluster_id: str) -> bool:
         """Check if event with cluster_id already exists."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 "SELECT COUNT(*) FROM events WHERE cluster_id = ?",
@@ -519,10 +755,42 @@ class Storage:
             count = cursor.fetchone()[0]
             return count > 0
 
+    def events_exist(self, cluster_ids: list[str]) -> set[str]:
+        """
+        Check which cluster IDs already have an event, in one query per chunk.
+
+        Args:
+            cluster_ids: Cluster IDs to look up
+
+        Returns:
+            Subset of cluster_ids present in the events table
+        """
+        existing = set()
+        unique_ids = list(dict.fromkeys(cluster_ids))
+
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            # Chunked to stay under SQLite's bound-parameter limit
+            for i in range(0, len(unique_ids), EXISTS_QUERY_CHUNK_SIZE):
+                chunk = unique_ids[i:i + EXISTS_QUERY_CHUNK_SIZE]
+                placeholders = ", ".join("?" * len(chunk))
+                cursor.execute(
+                    f"SELECT DISTINCT cluster_id FROM events WHERE cluster_id IN ({placeholders})",
+                    chunk
+                )
+                existing.update(row[0] for row in cursor.fetchall())
+
+        return existing
+
     def log_to_parquet(self, data: list[dict], log_type: str) -> None:
         """
         Log data to Parquet file (partitioned by date).
 
+        Batches are appended as row groups to one open file per log type and
+        day, instead of writing a new small file per call. The file becomes
+        readable once its writer is closed: on date rollover, on a schema
+        change, or in close().
+
         Args:
             data: List of dictionaries to log
             log_type: Type of log ('events', 'market', 'signals')
@@ -530,14 +798,43 @@ class Storage:
         if not data:
             return
 
-        df = pd.DataFrame(data)
+        table = pa.Table.from_pandas(pd.DataFrame(data), preserve_index=False)
         today = get_utc_now().strftime("%Y-%m-%d")
 
-        output_dir = self.data_dir / log_type / f"date={today}"
-        output_dir.mkdir(parents=True, exist_ok=True)
+        current = self._pq_writers.get(log_type)
+        if current is not None:
+            date, writer = current
+            if date == today and not writer.schema.equals(table.schema):
+                try:
+                    table = table.cast(writer.schema)
+                except (pa.ArrowInvalid, pa.ArrowNotImplementedError, ValueError):
+                    pass
+            if date != today or not writer.schema.equals(table.schema):
+                writer.close()
+                current = None
+
+        if current is None:
+            output_dir = self.data_dir / log_type / f"date={today}"
+            output_dir.mkdir(parents=True, exist_ok=True)
+
+            # Microseconds: a schema change can rotate files within one second
+            timestamp = get_utc_now().strftime("%H%M%S%f")
+            output_file = output_dir / f"{log_type}_{timestamp}.parquet"
+
+            current = (today, pq.ParquetWriter(
+                output_file,
+                table.schema,
+                compression=PARQUET_COMPRESSION,
+                compression_level=PARQUET_COMPRESSION_LEVEL,
+                use_dictionary=True  # repeated tickers/sources encode as small ints
+            ))
+            self._pq_writers[log_type] = current
 
-        timestamp = get_utc_now().strftime("%H%M%S")
-        output_file = output_dir / f"{log_type}_{timestamp}.parquet"
+        current[1].write_table(table)
+        logger.debug("Logged %d records to %s parquet log", len(data), log_type)
 
-        df.to_parquet(output_file, index=False)
-        logger.debug(f"Logged {len(data)} records to {output_file}")
+    def _close_parquet_writers(self) -> None:
+        """Finalize open Parquet log files."""
+        for _, writer in self._pq_writers.values():
+            writer.close()
+        self._pq_writers.clear()
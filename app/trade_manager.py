@@ -3,14 +3,22 @@ Trade manager for position exit logic.
 Handles partial profit taking, trailing stops, and time-based exits.
 """
 
+import logging
 from datetime import datetime, timedelta
-from typing import Dict, Optional
-from app.schemas import Position
+from fractions import Fraction
+from typing import Optional
+import numpy as np
+from app.schemas import ExitAction, ExitDecision, ExitReason, Position
 from app.config import get_rules
 from app.utils import setup_logger, get_utc_now
 
 logger = setup_logger(__name__)
 
+# Codes returned by manage_exit_batch (index into these tuples)
+BATCH_ACTIONS = (ExitAction.HOLD, ExitAction.PARTIAL_SELL, ExitAction.FULL_SELL)
+BATCH_REASONS = ("HOLD", ExitReason.HARD_STOP, ExitReason.LVL1_PROFIT,
+                 ExitReason.TRAILING_STOP, ExitReason.TIME_LIMIT)
+
 
 class TradeManager:
     """
@@ -19,13 +27,29 @@ class TradeManager:
 
     def __init__(self):
         self.rules = get_rules()
+        self.refresh_rules()
+        self.rules.on_reload(self.refresh_rules)
+
+    def refresh_rules(self) -> None:
+        """Re-read cached exit rules (called by RulesConfig.reload)."""
+        exit_rules = self.rules.exit
+
+        self._hard_stop_pct = exit_rules.get("hard_stop_pct", 4.0)
+        self._tp1_pct = exit_rules.get("take_profit_lvl1_pct", 8.0)
+        # Partial-sell fraction as an exact ratio (0.4 -> 2/5), so sizing is
+        # integer floor division; int(qty * 0.29) would give 28 for 100 shares
+        tp1_ratio = Fraction(str(exit_rules.get("take_profit_lvl1_part", 0.4)))
+        self._tp1_num, self._tp1_den = tp1_ratio.numerator, tp1_ratio.denominator
+        self._trail_pct = exit_rules.get("trailing_stop_pct", 5.0)
+        self._trail_mult = 1 - self._trail_pct / 100
+        self._hold_minutes = exit_rules.get("hold_minutes", 60)
 
     def manage_exit(
         self,
         position: Position,
         market_price: float,
         now: Optional[datetime] = None
-    ) -> Dict:
+    ) -> ExitDecision:
         """
         Evaluate exit conditions for an open position.
 
@@ -35,19 +59,12 @@ class TradeManager:
             now: Current time (UTC), defaults to now
 
         Returns:
-            {
-                "action": "HOLD" | "PARTIAL_SELL" | "FULL_SELL",
-                "reason": str,
-                "sell_qty": int,
-                "sell_price": float,
-                "new_peak": float
-            }
+            ExitDecision (action, reason, sell_qty, sell_price, new_peak);
+            on HOLD, reason is a P&L/hold-time note and sell_qty is 0
         """
         if now is None:
             now = get_utc_now()
 
-        exit_rules = self.rules.exit
-
         # Update peak price
         current_peak = position.current_price or position.entry_price
         new_peak = max(current_peak, market_price)
@@ -59,72 +76,116 @@ class TradeManager:
 
         # Get position quantity (considering partial sales)
         current_qty = position.quantity
+        qty_abs = abs(current_qty)
 
         # 1. Check HARD STOP LOSS (highest priority)
-        hard_stop_pct = exit_rules.get("hard_stop_pct", 4.0)
+        hard_stop_pct = self._hard_stop_pct
         if pnl_pct <= -hard_stop_pct:
-            logger.warning(f"[EXIT] {position.ticker} {pnl_pct:.2f}% → HARD_STOP (-{hard_stop_pct}%) → FULL_SELL @{market_price:.2f}")
-            return {
-                "action": "FULL_SELL",
-                "reason": "HARD_STOP",
-                "sell_qty": abs(current_qty),
-                "sell_price": market_price,
-                "new_peak": new_peak
-            }
+            logger.warning("[EXIT] %s %.2f%% → HARD_STOP (-%s%%) → FULL_SELL @%.2f",
+                           position.ticker, pnl_pct, hard_stop_pct, market_price)
+            return ExitDecision(ExitAction.FULL_SELL, ExitReason.HARD_STOP, qty_abs, market_price, new_peak)
 
         # 2. Check PARTIAL PROFIT TAKING (1st level)
-        take_profit_lvl1_pct = exit_rules.get("take_profit_lvl1_pct", 8.0)
-        take_profit_lvl1_part = exit_rules.get("take_profit_lvl1_part", 0.4)
+        take_profit_lvl1_pct = self._tp1_pct
 
         # Check if already partially sold
         if pnl_pct >= take_profit_lvl1_pct and current_qty > 0 and not position.partial_sold:
             # First time hitting this level - calculate partial sale quantity
-            partial_qty = int(current_qty * take_profit_lvl1_part)
+            partial_qty = current_qty * self._tp1_num // self._tp1_den
             if partial_qty > 0:
-                logger.info(f"[EXIT] {position.ticker} +{pnl_pct:.1f}% → LVL1_PROFIT (+{take_profit_lvl1_pct}%) → PARTIAL_SELL {partial_qty} @{market_price:.2f}")
-                return {
-                    "action": "PARTIAL_SELL",
-                    "reason": "LVL1_PROFIT",
-                    "sell_qty": partial_qty,
-                    "sell_price": market_price,
-                    "new_peak": new_peak
-                }
+                logger.info("[EXIT] %s +%.1f%% → LVL1_PROFIT (+%s%%) → PARTIAL_SELL %d @%.2f",
+                            position.ticker, pnl_pct, take_profit_lvl1_pct, partial_qty, market_price)
+                return ExitDecision(ExitAction.PARTIAL_SELL, ExitReason.LVL1_PROFIT, partial_qty, market_price, new_peak)
 
         # 3. Check TRAILING STOP (from peak)
-        trailing_stop_pct = exit_rules.get("trailing_stop_pct", 5.0)
         if new_peak > entry_price:  # Only trail if in profit
-            trail_trigger = new_peak * (1 - trailing_stop_pct / 100)
+            trail_trigger = new_peak * self._trail_mult
             if market_price <= trail_trigger:
-                peak_drop_pct = ((market_price - new_peak) / new_peak) * 100
-                logger.info(f"[EXIT] {position.ticker} +{pnl_pct:.1f}% → TRAIL_TRIGGER ({peak_drop_pct:.1f}% from peak ${new_peak:.2f}) → FULL_SELL @{market_price:.2f}")
-                return {
-                    "action": "FULL_SELL",
-                    "reason": "TRAILING_STOP",
-                    "sell_qty": abs(current_qty),
-                    "sell_price": market_price,
-                    "new_peak": new_peak
-                }
+                if logger.isEnabledFor(logging.INFO):
+                    peak_drop_pct = ((market_price - new_peak) / new_peak) * 100
+                    logger.info("[EXIT] %s +%.1f%% → TRAIL_TRIGGER (%.1f%% from peak $%.2f) → FULL_SELL @%.2f",
+                                position.ticker, pnl_pct, peak_drop_pct, new_peak, market_price)
+                return ExitDecision(ExitAction.FULL_SELL, ExitReason.TRAILING_STOP, qty_abs, market_price, new_peak)
 
         # 4. Check TIME EXIT
-        hold_minutes = exit_rules.get("hold_minutes", 60)
+        hold_minutes = self._hold_minutes
         if hold_time >= hold_minutes:
-            logger.info(f"[EXIT] {position.ticker} +{pnl_pct:.1f}% → TIME_LIMIT ({hold_time:.0f}m >= {hold_minutes}m) → FULL_SELL @{market_price:.2f}")
-            return {
-                "action": "FULL_SELL",
-                "reason": "TIME_LIMIT",
-                "sell_qty": abs(current_qty),
-                "sell_price": market_price,
-                "new_peak": new_peak
-            }
+            logger.info("[EXIT] %s +%.1f%% → TIME_LIMIT (%.0fm >= %sm) → FULL_SELL @%.2f",
+                        position.ticker, pnl_pct, hold_time, hold_minutes, market_price)
+            return ExitDecision(ExitAction.FULL_SELL, ExitReason.TIME_LIMIT, qty_abs, market_price, new_peak)
 
         # 5. HOLD - no exit conditions met
-        return {
-            "action": "HOLD",
-            "reason": f"In position: +{pnl_pct:.1f}%, {hold_time:.0f}m",
-            "sell_qty": 0,
-            "sell_price": 0.0,
-            "new_peak": new_peak
-        }
+        return ExitDecision(ExitAction.HOLD, f"In position: +{pnl_pct:.1f}%, {hold_time:.0f}m", 0, 0.0, new_peak)
+
+    def manage_exit_batch(
+        self,
+        positions: list[Position],
+        prices: np.ndarray,
+        now: Optional[datetime] = None
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Evaluate exit conditions for many positions at once.
+
+        Applies the same rules, in the same priority order, as manage_exit()
+        as column-wise NumPy operations, without logging or building dicts.
+
+        Args:
+            positions: Open positions
+            prices: Current market price per position, aligned with positions
+            now: Current time (UTC), defaults to now
+
+        Returns:
+            (action, reason, sell_qty, new_peak): indices into BATCH_ACTIONS and
+            BATCH_REASONS, shares to sell (0 on HOLD), and updated peak prices
+        """
+        if now is None:
+            now = get_utc_now()
+
+        prices = np.asarray(prices, dtype=np.float64)
+        entry = np.array([p.entry_price for p in positions], dtype=np.float64)
+        peak = np.array([p.current_price or p.entry_price for p in positions], dtype=np.float64)
+        qty = np.array([p.quantity for p in positions], dtype=np.int64)
+        partial_sold = np.array([p.partial_sold for p in positions], dtype=bool)
+        entry_ts = np.array([p.entry_time.timestamp() for p in positions], dtype=np.float64)
+
+        new_peak = np.maximum(peak, prices)
+        pnl_pct = ((prices - entry) / entry) * 100
+        hold_time = (now.timestamp() - entry_ts) / 60
+        partial_qty = qty * self._tp1_num // self._tp1_den
+
+        # Rule conditions in manage_exit's priority order; np.select takes the first
+        conditions = [
+            pnl_pct <= -self._hard_stop_pct,
+            (pnl_pct >= self._tp1_pct) & (qty > 0) & ~partial_sold & (partial_qty > 0),
+            (new_peak > entry) & (prices <= new_peak * self._trail_mult),
+            hold_time >= self._hold_minutes,
+        ]
+        reason = np.select(conditions, [1, 2, 3, 4], default=0)
+        action = np.select([reason == 0, reason == 2], [0, 1], default=2)
+        sell_qty = np.select([reason == 0, reason == 2], [0, partial_qty], default=np.abs(qty))
+
+        return action, reason, sell_qty, new_peak
+
+
+def track_peaks_batch(prices: np.ndarray, start_peaks: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Running peak price along each row of a tick series, e.g. for replays.
+
+    Same peak update as manage_exit() (max of prior peak and price), applied
+    over whole series at once; ``prices / peaks - 1`` is the drawdown from
+    peak that the trailing stop compares against.
+
+    Args:
+        prices: Price ticks, one row per position (a 1-D array is one series)
+        start_peaks: Peak per row before the first tick (e.g. Position.current_price)
+
+    Returns:
+        Peaks after each tick, same shape as prices
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    if start_peaks is not None:
+        prices = np.maximum(prices, np.asarray(start_peaks, dtype=np.float64)[..., np.newaxis])
+    return np.maximum.accumulate(prices, axis=-1)
 
 
 async def main():
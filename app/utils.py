@@ -2,11 +2,28 @@
 Utility functions for the automated trading system.
 """
 
+import asyncio
 import hashlib
 import logging
+import re
+import time
 from datetime import datetime, timezone
+from functools import lru_cache
 from typing import Any, Optional
-import pytz
+from zoneinfo import ZoneInfo
+
+# Optional JIT for numeric kernels; without numba they run as plain Python
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit (supports @njit and @njit(...))."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
 
 
 def get_utc_now() -> datetime:
@@ -35,13 +52,17 @@ def generate_event_id(source: str, headline: str, published_at: datetime) -> str
         Unique event ID (SHA-256 hash)
     """
     content = f"{source}|{headline}|{published_at.isoformat()}"
-    return hashlib.sha256(content.encode()).hexdigest()[:16]
+    # Algorithm is fixed: stored IDs must stay stable across upgrades
+    return hashlib.sha256(content.encode(), usedforsecurity=False).hexdigest()[:16]
 
 
+@lru_cache(maxsize=8192)
 def generate_cluster_id(source: str, headline: str) -> str:
     """
     Generate cluster ID for deduplication.
 
+    Memoized: feeds re-serve the same headlines on every poll.
+
     Args:
         source: RSS feed source
         headline: News headline
@@ -50,7 +71,8 @@ def generate_cluster_id(source: str, headline: str) -> str:
         Cluster ID (SHA-1 hash)
     """
     content = f"{source}|{headline.lower().strip()}"
-    return hashlib.sha1(content.encode()).hexdigest()[:12]
+    # Algorithm is fixed: dedup compares against cluster IDs already stored
+    return hashlib.sha1(content.encode(), usedforsecurity=False).hexdigest()[:12]
 
 
 def basis_points_to_pct(bp: int) -> float:
@@ -63,6 +85,11 @@ def pct_to_basis_points(pct: float) -> int:
     return int(pct * 100)
 
 
+# Spread reported for a one-sided or empty quote; far above any max_spread_bp,
+# so the spread filter always rejects it
+INVALID_SPREAD_BP = 999999
+
+
 def calculate_spread_bp(bid: float, ask: float) -> int:
     """
     Calculate bid-ask spread in basis points.
@@ -72,10 +99,10 @@ def calculate_spread_bp(bid: float, ask: float) -> int:
         ask: Ask price
 
     Returns:
-        Spread in basis points
+        Spread in basis points (INVALID_SPREAD_BP if either side is missing)
     """
     if bid <= 0 or ask <= 0:
-        return 999999  # Invalid spread
+        return INVALID_SPREAD_BP
 
     mid = (bid + ask) / 2
     spread_pct = ((ask - bid) / mid) * 100
@@ -102,31 +129,36 @@ def get_market_session(dt: datetime) -> str:
     """
     Determine market session based on time.
 
+    Session boundaries fall on whole minutes, so results are memoized per
+    minute; every ticker in a cycle shares one lookup.
+
     Args:
         dt: Datetime (will be converted to US/Eastern)
 
     Returns:
         Session type: 'pre', 'regular', or 'after'
     """
-    eastern = pytz.timezone('US/Eastern')
-    et_time = dt.astimezone(eastern)
-    hour = et_time.hour
-    minute = et_time.minute
+    return _session_for_minute(int(dt.timestamp() // 60))
+
+
+# stdlib zoneinfo converts several times faster than pytz
+_EASTERN = ZoneInfo('America/New_York')
 
-    # Pre-market: 4:00 AM - 9:30 AM ET
-    if (hour == 4 and minute >= 0) or (4 < hour < 9) or (hour == 9 and minute < 30):
-        return "pre"
 
-    # Regular: 9:30 AM - 4:00 PM ET
-    if (hour == 9 and minute >= 30) or (9 < hour < 16):
-        return "regular"
+# Session per minute of the ET day: pre 4:00-9:30, regular 9:30-16:00,
+# after otherwise (after-hours to 20:00 and overnight are both "after")
+_SESSIONS = ("pre", "regular", "after")
+_SESSION_TABLE = bytes(
+    0 if 240 <= m < 570 else 1 if 570 <= m < 960 else 2
+    for m in range(24 * 60)
+)
 
-    # After-hours: 4:00 PM - 8:00 PM ET
-    if (hour == 16 and minute >= 0) or (16 < hour < 20):
-        return "after"
 
-    # Outside trading hours
-    return "after"
+@lru_cache(maxsize=1024)
+def _session_for_minute(epoch_minute: int) -> str:
+    """Market session for the minute starting at epoch_minute * 60 (UTC)."""
+    et_time = datetime.fromtimestamp(epoch_minute * 60, tz=timezone.utc).astimezone(_EASTERN)
+    return _SESSIONS[_SESSION_TABLE[et_time.hour * 60 + et_time.minute]]
 
 
 def setup_logger(name: str, log_file: Optional[str] = None, level: Optional[str] = None) -> logging.Logger:
@@ -194,7 +226,16 @@ def safe_divide(numerator: float, denominator: float, default: float = 0.0) -> f
 
 
 def round_to_tick(price: float, tick_size: float = 0.01) -> float:
-    """Round price to nearest tick size."""
+    """
+    Round price to nearest tick size.
+
+    For ticks that divide 1 (0.01, 0.0001, ...) the price is rounded in whole
+    ticks and divided back, which lands on the nearest float to the tick and
+    avoids sub-penny artifacts like 0.35000000000000003 from ``n * 0.01``.
+    """
+    ticks_per_unit = round(1 / tick_size)
+    if abs(ticks_per_unit * tick_size - 1) < 1e-9:
+        return round(price * ticks_per_unit) / ticks_per_unit
     return round(price / tick_size) * tick_size
 
 
@@ -216,25 +257,113 @@ def format_percentage(value: float, decimals: int = 2) -> str:
     return f"{value:.{decimals}f}%"
 
 
+@lru_cache(maxsize=32)
+def compile_ticker_pattern(whitelist: tuple[str, ...]) -> re.Pattern:
+    """
+    Compile a word-boundary regex matching any whitelisted ticker.
+
+    Args:
+        whitelist: Ticker symbols (tuple so the compiled pattern can be cached)
+
+    Returns:
+        Compiled pattern; matches nothing for an empty whitelist
+    """
+    if not whitelist:
+        return re.compile(r"(?!)")
+
+    # Prefix-trie alternation: at each word start the engine follows one
+    # branch per character instead of trying every ticker in turn
+    trie: dict = {}
+    for ticker in whitelist:
+        node = trie
+        for char in ticker:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    return re.compile(rf"\b(?:{_trie_to_regex(trie)})\b")
+
+
+def _trie_to_regex(node: dict) -> str:
+    """Render a character trie as a regex; longer continuations are tried first."""
+    branches = [re.escape(char) + _trie_to_regex(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ""
+
+    body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+    if "" in node:
+        # A ticker ends here; the greedy optional keeps "GOOGL" over "GOOG"
+        return f"(?:{body})?"
+    return body
+
+
 def extract_tickers_from_text(text: str, whitelist: list[str]) -> list[str]:
     """
     Extract ticker symbols from text based on whitelist.
 
+    Tickers must appear as whole words (so "META" does not match "METAL").
+
     Args:
         text: Text to search
         whitelist: List of valid ticker symbols
 
     Returns:
-        List of found tickers (deduplicated)
+        List of found tickers (deduplicated, in order of appearance)
     """
-    text_upper = text.upper()
-    found = []
+    pattern = compile_ticker_pattern(tuple(whitelist))
+    return list(dict.fromkeys(pattern.findall(text.upper())))
 
-    for ticker in whitelist:
-        if ticker in text_upper:
-            found.append(ticker)
 
-    return list(set(found))  # Deduplicate
+class RateLimiter:
+    """
+    Async token-bucket rate limiter.
+
+    Allows bursts of up to max_rate acquisitions, refilling continuously at
+    max_rate per time_period. Use as `async with limiter:` or
+    `await limiter.acquire()`.
+    """
+
+    def __init__(self, max_rate: float, time_period: float = 1.0):
+        self.max_rate = max_rate
+        self.time_period = time_period
+        self._refill_per_sec = max_rate / time_period
+        self._tokens = float(max_rate)
+        self._last = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.max_rate, self._tokens + (now - self._last) * self._refill_per_sec)
+                self._last = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self._tokens) / self._refill_per_sec)
+
+    def set_rate(self, max_rate: float, time_period: Optional[float] = None) -> None:
+        """
+        Change the rate in place, keeping the tokens already spent.
+
+        Args:
+            max_rate: New burst size / acquisitions per time_period
+            time_period: New period in seconds (unchanged if None)
+        """
+        if time_period is not None:
+            self.time_period = time_period
+        self.max_rate = max_rate
+        self._refill_per_sec = max_rate / self.time_period
+        self._tokens = min(self._tokens, float(max_rate))
+
+    async def __aenter__(self) -> "RateLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        return None
 
 
 class ColoredFormatter(logging.Formatter):
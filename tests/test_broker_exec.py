@@ -0,0 +1,150 @@
+"""
+Tests for broker execution: Alpaca submit retries and trade-update handling.
+No network access; the Alpaca HTTP session and stream are stubbed.
+"""
+
+import uuid
+import pytest
+import requests
+
+from app.broker_exec import BrokerExecutor
+from app.storage import Storage
+
+
+@pytest.fixture
+def broker():
+    """Create a FULL_AUTO broker executor backed by in-memory storage."""
+    storage = Storage(db_path=f"file:broker_test_{uuid.uuid4().hex}?mode=memory&cache=shared")
+    executor = BrokerExecutor(storage)
+    executor.settings = executor.settings.model_copy(update={"run_mode": "FULL_AUTO"})
+
+    yield executor
+
+    storage.close()
+
+
+def _response(status_code: int) -> requests.Response:
+    """Build a bare HTTP response with the given status."""
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = b'{"code": 42910000, "message": "rate limit exceeded"}'
+    response.url = "https://paper-api.alpaca.markets/v2/orders"
+    return response
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_submit_tried_max_retries_plus_one(broker, monkeypatch):
+    """Test that a 429 is retried only by our backoff, not also by the SDK."""
+    from alpaca.common.exceptions import APIError
+    from alpaca.trading.requests import LimitOrderRequest
+    from alpaca.trading.enums import OrderSide, TimeInForce
+
+    calls = []
+
+    def fake_request(method, url, **kwargs):
+        calls.append(url)
+        return _response(429)
+
+    monkeypatch.setattr(broker.client._session, "request", fake_request)
+    # Keep a regression fast: the SDK's own retries would each sleep 3s
+    monkeypatch.setattr("alpaca.common.rest.time.sleep", lambda seconds: None)
+
+    req = LimitOrderRequest(symbol="AAPL", qty=1, side=OrderSide.BUY,
+                            time_in_force=TimeInForce.DAY, limit_price=100.0)
+
+    with pytest.raises(APIError):
+        await broker._submit_with_backoff(req, max_retries=2, base=0.0, cap=0.0)
+
+    assert len(calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_submit_accepted_despite_5xx_is_not_resubmitted(broker, monkeypatch):
+    """Test that a 5xx for an order Alpaca did accept doesn't place it twice."""
+    from types import SimpleNamespace
+    from alpaca.trading.requests import LimitOrderRequest
+    from alpaca.trading.enums import OrderSide, TimeInForce
+
+    calls = []
+    accepted = SimpleNamespace(id="alpaca-1", status="new")
+
+    def fake_request(method, url, **kwargs):
+        calls.append(url)
+        return _response(502)
+
+    monkeypatch.setattr(broker.client._session, "request", fake_request)
+    monkeypatch.setattr(broker.client, "get_order_by_client_id", lambda client_id: accepted)
+
+    req = LimitOrderRequest(symbol="AAPL", qty=1, side=OrderSide.BUY, time_in_force=TimeInForce.DAY,
+                            limit_price=100.0, client_order_id="evt1_AAPL_1700000000")
+
+    assert await broker._submit_with_backoff(req, max_retries=2, base=0.0, cap=0.0) is accepted
+    assert len(calls) == 1
+
+
+def _order_pair(status: str):
+    """An OrderRecord/ApprovedSignal pair plus the Alpaca order the stub broker returns."""
+    from types import SimpleNamespace
+    from app.schemas import ApprovedSignal, OrderRecord, OrderStatus
+    from app.utils import get_utc_now
+
+    signal = ApprovedSignal(
+        approved=True, size_final_usd=1000.0, hard_stop_bp=150, take_profit_bp=250,
+        max_slippage_bp=40, notes=[], ticker="AAPL", entry_price_target=100.0, shares=10
+    )
+    order = OrderRecord(
+        order_id="alpaca-1", ticker="AAPL", event_id="evt1", signal_id="sig1", side="buy",
+        quantity=10, order_type="limit", limit_price=100.0, status=OrderStatus.SUBMITTED,
+        submitted_at=get_utc_now()
+    )
+    alpaca_order = SimpleNamespace(id="alpaca-1", status=status, filled_avg_price="100.5", filled_qty="10")
+    return order, signal, alpaca_order
+
+
+@pytest.mark.asyncio
+async def test_fill_before_monitor_registration_is_not_lost(broker, monkeypatch):
+    """Test that a fill pushed before _monitor_order registers is still picked up."""
+    from types import SimpleNamespace
+    from app.schemas import OrderStatus
+
+    monkeypatch.setattr(broker, "_ensure_trade_stream", lambda: None)
+    broker._order_timeout = 5.0
+    order, signal, submitted = _order_pair("new")
+    filled = SimpleNamespace(**{**vars(submitted), "status": "filled"})
+
+    await broker._on_trade_update(SimpleNamespace(event="fill", order=filled))
+    await broker._monitor_order(order, signal, submitted)
+
+    assert order.status == OrderStatus.FILLED
+    assert [p.order_id for p in broker._pending_positions] == ["alpaca-1"]
+    assert not broker._unclaimed_updates
+
+
+@pytest.mark.asyncio
+async def test_order_filled_at_submit_skips_stream_wait(broker, monkeypatch):
+    """Test that an order already terminal when submitted isn't waited on."""
+    from app.schemas import OrderStatus
+
+    monkeypatch.setattr(broker, "_ensure_trade_stream", lambda: pytest.fail("waited on stream"))
+    order, signal, submitted = _order_pair("filled")
+
+    await broker._monitor_order(order, signal, submitted)
+
+    assert order.status == OrderStatus.FILLED
+    assert order.filled_qty == 10
+
+
+@pytest.mark.asyncio
+async def test_rules_reload_keeps_spent_rate_budget(broker, monkeypatch):
+    """Test that a rules reload re-rates the Alpaca limiter instead of replacing it."""
+    limiter = broker._rate
+    for _ in range(5):
+        await limiter.acquire()
+
+    monkeypatch.setitem(broker.rules.execution, "api_requests_per_minute", 300)
+    broker.refresh_rules()
+
+    assert broker._rate is limiter
+    assert limiter.max_rate == 300
+    # The five calls already made still count against the budget
+    assert limiter._tokens < 200
@@ -9,151 +9,99 @@ from app.trade_manager import TradeManager
 from app.schemas import Position
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def trade_manager():
-    """Create TradeManager instance for testing."""
+    """Create TradeManager instance for testing (stateless, shared by the module)."""
     return TradeManager()
 
 
 @pytest.fixture
-def base_position():
-    """Create base position for testing."""
-    return Position(
-        ticker="TSLA",
-        entry_price=100.0,
-        quantity=10,
-        entry_time=datetime.now(timezone.utc) - timedelta(minutes=30),
-        event_id="test123",
-        order_id="order123",
-        stop_loss=96.0,
-        take_profit=110.0,
-        current_price=100.0,
-        partial_sold=False
-    )
-
-
-def test_hold_no_conditions_met(trade_manager, base_position):
-    """Test HOLD action when no exit conditions are met."""
-    # +2% profit, not enough for any trigger
-    result = trade_manager.manage_exit(base_position, 102.0)
-
-    assert result["action"] == "HOLD"
-    assert "In position" in result["reason"]
-    assert result["sell_qty"] == 0
-    assert result["new_peak"] == 102.0  # Peak updated
-
-
-def test_hard_stop_loss_trigger(trade_manager, base_position):
-    """Test HARD_STOP at -4% loss triggers immediate full sell."""
-    # -4% loss
-    result = trade_manager.manage_exit(base_position, 96.0)
-
-    assert result["action"] == "FULL_SELL"
-    assert result["reason"] == "HARD_STOP"
-    assert result["sell_qty"] == 10
-    assert result["sell_price"] == 96.0
-
-
-def test_partial_profit_at_8pct(trade_manager, base_position):
-    """Test partial profit taking at +8% gain (40% of position)."""
-    # +8% profit
-    result = trade_manager.manage_exit(base_position, 108.0)
-
-    assert result["action"] == "PARTIAL_SELL"
-    assert result["reason"] == "LVL1_PROFIT"
-    assert result["sell_qty"] == 4  # 40% of 10 shares
-    assert result["sell_price"] == 108.0
-    assert result["new_peak"] == 108.0
-
-
-def test_partial_profit_only_once(trade_manager, base_position):
-    """Test that partial profit taking only happens once."""
-    # Set partial_sold flag
-    base_position.partial_sold = True
-
-    # +10% profit, but already partially sold
-    result = trade_manager.manage_exit(base_position, 110.0)
-
-    # Should NOT trigger partial sell again
-    assert result["action"] != "PARTIAL_SELL"
-
-
-def test_trailing_stop_from_peak_100pct_gain(trade_manager, base_position):
-    """Test trailing stop after +100% gain, then -5% drop from peak."""
-    # Position peaked at +100% ($200)
-    base_position.current_price = 200.0
-    # Already took partial profit earlier
-    base_position.partial_sold = True
-
-    # Now at $190 = -5% from peak
-    result = trade_manager.manage_exit(base_position, 190.0)
-
-    assert result["action"] == "FULL_SELL"
-    assert result["reason"] == "TRAILING_STOP"
-    assert result["sell_qty"] == 10
-    assert result["sell_price"] == 190.0
-
-
-def test_trailing_stop_only_in_profit(trade_manager, base_position):
-    """Test that trailing stop only activates when in profit."""
-    # Price went from $100 to $95 to $90
-    # Even though this is -5% drop, should trigger hard stop instead
-    # because never went into profit
-    base_position.current_price = 95.0
-
-    result = trade_manager.manage_exit(base_position, 90.0)
-
-    # Should hit hard stop, not trailing stop
-    assert result["reason"] == "HARD_STOP"
-
-
-def test_time_based_exit_after_60min(trade_manager, base_position):
-    """Test time-based exit after 60 minutes holding."""
-    # Set entry time to 65 minutes ago
-    base_position.entry_time = datetime.now(timezone.utc) - timedelta(minutes=65)
-
-    # Small profit +3%
-    result = trade_manager.manage_exit(base_position, 103.0)
-
-    assert result["action"] == "FULL_SELL"
-    assert result["reason"] == "TIME_LIMIT"
-    assert result["sell_qty"] == 10
-    assert result["sell_price"] == 103.0
-
+def make_position():
+    """
+    Factory for test positions: a 10-share TSLA long at $100, held 30 minutes.
 
-def test_time_exit_not_before_60min(trade_manager, base_position):
-    """Test that time exit does not trigger before 60 minutes."""
-    # 55 minutes holding
-    base_position.entry_time = datetime.now(timezone.utc) - timedelta(minutes=55)
+    Keyword overrides replace fields; entry_minutes_ago sets entry_time.
+    Positions are built with model_construct, skipping re-validation of the
+    fixed base fields.
+    """
+    def factory(entry_minutes_ago: float = 30, **overrides) -> Position:
+        fields = {
+            "ticker": "TSLA",
+            "entry_price": 100.0,
+            "quantity": 10,
+            "entry_time": datetime.now(timezone.utc) - timedelta(minutes=entry_minutes_ago),
+            "event_id": "test123",
+            "order_id": "order123",
+            "stop_loss": 96.0,
+            "take_profit": 110.0,
+            "unrealized_pnl": None,
+            "current_price": 100.0,
+            "partial_sold": False,
+        }
+        fields.update(overrides)
+        return Position.model_construct(**fields)
+
+    return factory
 
-    result = trade_manager.manage_exit(base_position, 103.0)
 
-    # Should HOLD, not time exit yet
-    assert result["action"] == "HOLD"
-    assert result["reason"] != "TIME_LIMIT"
+@pytest.fixture
+def base_position(make_position):
+    """Create base position for testing."""
+    return make_position()
 
 
-def test_priority_hard_stop_over_time(trade_manager, base_position):
-    """Test that HARD_STOP takes priority over TIME_LIMIT."""
-    # 70 minutes holding (exceeds time limit)
-    base_position.entry_time = datetime.now(timezone.utc) - timedelta(minutes=70)
+# (position overrides, market price, expected action, expected reason, expected sell qty)
+EXIT_CASES = [
+    # +2% profit, not enough for any trigger
+    pytest.param({}, 102.0, "HOLD", None, 0, id="hold_no_conditions_met"),
+    # Exactly -4.0%
+    pytest.param({}, 96.0, "FULL_SELL", "HARD_STOP", 10, id="hard_stop_at_exactly_4pct_loss"),
+    # Exactly +8.0%: 40% of 10 shares
+    pytest.param({}, 108.0, "PARTIAL_SELL", "LVL1_PROFIT", 4, id="partial_profit_at_exactly_8pct"),
+    # +10% but already partially sold: no second partial sell
+    pytest.param({"partial_sold": True}, 110.0, "HOLD", None, 0, id="partial_profit_only_once"),
+    # Peaked at +100% ($200), now -5% from peak
+    pytest.param({"current_price": 200.0, "partial_sold": True}, 190.0, "FULL_SELL", "TRAILING_STOP", 10,
+                 id="trailing_stop_from_peak_100pct_gain"),
+    # -5% from a $95 "peak" never in profit: hard stop, not trailing stop
+    pytest.param({"current_price": 95.0}, 90.0, "FULL_SELL", "HARD_STOP", 10, id="trailing_stop_only_in_profit"),
+    pytest.param({"entry_minutes_ago": 65}, 103.0, "FULL_SELL", "TIME_LIMIT", 10, id="time_based_exit_after_60min"),
+    pytest.param({"entry_minutes_ago": 55}, 103.0, "HOLD", None, 0, id="time_exit_not_before_60min"),
+    pytest.param({"entry_minutes_ago": 70}, 96.0, "FULL_SELL", "HARD_STOP", 10, id="priority_hard_stop_over_time"),
+    # +8% but 6% below a $115 peak: trailing stop also fires, partial profit wins
+    pytest.param({"current_price": 115.0}, 108.0, "PARTIAL_SELL", "LVL1_PROFIT", 4, id="priority_profit_over_trailing"),
+    pytest.param({"entry_minutes_ago": 60}, 103.0, "FULL_SELL", "TIME_LIMIT", 10, id="time_exit_at_exactly_60min"),
+]
+
+
+@pytest.mark.parametrize("overrides, price, expected_action, expected_reason, expected_qty", EXIT_CASES)
+def test_exit_rules_table(trade_manager, make_position, overrides, price,
+                          expected_action, expected_reason, expected_qty):
+    """Test the exit decision for each scenario (expected_reason None = HOLD)."""
+    position = make_position(**overrides)
+
+    result = trade_manager.manage_exit(position, price)
+
+    assert result["action"] == expected_action
+    if expected_reason is None:
+        assert "In position" in result["reason"]
+    else:
+        assert result["reason"] == expected_reason
+    assert result["sell_qty"] == expected_qty
+    assert result["sell_price"] == (0.0 if expected_action == "HOLD" else price)
+    assert result["new_peak"] == max(position.current_price, price)  # Peak updated
+
+
+def test_exit_decision_fields(trade_manager, base_position):
+    """Test that exit decisions read by name, by key and as plain strings."""
+    from app.schemas import ExitAction, ExitReason
 
-    # But also at -4% (hard stop)
     result = trade_manager.manage_exit(base_position, 96.0)
 
-    # Should trigger HARD_STOP, not TIME_LIMIT
-    assert result["reason"] == "HARD_STOP"
-
-
-def test_priority_profit_over_trailing(trade_manager, base_position):
-    """Test partial profit takes priority over trailing stop."""
-    # At +8% for first time
-    base_position.partial_sold = False
-
-    result = trade_manager.manage_exit(base_position, 108.0)
-
-    # Should take partial profit, not trailing stop
-    assert result["reason"] == "LVL1_PROFIT"
+    assert result.action is ExitAction.FULL_SELL
+    assert result.reason is ExitReason.HARD_STOP
+    assert result["sell_qty"] == result.sell_qty == result[2] == 10
+    assert f"{result.action}: {result.reason}" == "FULL_SELL: HARD_STOP"
 
 
 def test_peak_price_tracking(trade_manager, base_position):
@@ -195,48 +143,61 @@ def test_large_gain_scenario(trade_manager, base_position):
     assert pnl_pct == pytest.approx(90.0, rel=0.01)
 
 
-def test_edge_case_exactly_8pct(trade_manager, base_position):
-    """Test edge case: exactly +8.0% profit."""
-    result = trade_manager.manage_exit(base_position, 108.0)
+@pytest.mark.parametrize("quantity, expected_sell", [
+    (10, 4),   # 10 shares -> 4 shares (40%)
+    (100, 40), # 100 shares -> 40 shares (40%)
+    (7, 2),    # 7 shares -> 2 shares (40% = 2.8, rounded down)
+    (12345, 4938),  # large sizes stay exact (integer math)
+])
+def test_quantity_calculation_partial_sell(trade_manager, make_position, quantity, expected_sell):
+    """Test that partial sell quantity is calculated correctly (40%)."""
+    result = trade_manager.manage_exit(make_position(quantity=quantity), 108.0)
 
-    assert result["action"] == "PARTIAL_SELL"
-    assert result["reason"] == "LVL1_PROFIT"
+    assert result["sell_qty"] == expected_sell
 
 
-def test_edge_case_exactly_4pct_loss(trade_manager, base_position):
-    """Test edge case: exactly -4.0% loss."""
-    result = trade_manager.manage_exit(base_position, 96.0)
-
-    assert result["action"] == "FULL_SELL"
-    assert result["reason"] == "HARD_STOP"
+def test_manage_exit_batch_matches_manage_exit(trade_manager, base_position):
+    """Test that batch exit evaluation agrees with per-position evaluation."""
+    from app.trade_manager import BATCH_ACTIONS, BATCH_REASONS
 
+    now = datetime.now(timezone.utc)
+    cases = [
+        ({}, 102.0),  # HOLD
+        ({}, 96.0),  # HARD_STOP
+        ({}, 108.0),  # LVL1_PROFIT
+        ({"partial_sold": True, "current_price": 200.0}, 190.0),  # TRAILING_STOP
+        ({"entry_time": now - timedelta(minutes=61)}, 101.0),  # TIME_LIMIT
+        ({"quantity": 2}, 108.0),  # 40% of 2 rounds to 0 -> HOLD
+    ]
+    positions = [base_position.model_copy(update=update) for update, _ in cases]
+    prices = [price for _, price in cases]
 
-def test_edge_case_exactly_60min(trade_manager, base_position):
-    """Test edge case: exactly 60 minutes holding."""
-    base_position.entry_time = datetime.now(timezone.utc) - timedelta(minutes=60)
+    action, reason, sell_qty, new_peak = trade_manager.manage_exit_batch(positions, prices, now)
 
-    result = trade_manager.manage_exit(base_position, 103.0)
+    for i, (position, price) in enumerate(zip(positions, prices)):
+        expected = trade_manager.manage_exit(position, price, now)
+        assert BATCH_ACTIONS[action[i]] == expected["action"]
+        if expected["action"] != "HOLD":
+            assert BATCH_REASONS[reason[i]] == expected["reason"]
+        assert sell_qty[i] == expected["sell_qty"]
+        assert new_peak[i] == expected["new_peak"]
 
-    assert result["action"] == "FULL_SELL"
-    assert result["reason"] == "TIME_LIMIT"
 
+def test_track_peaks_batch_matches_manage_exit(trade_manager, base_position):
+    """Test that batch peak tracking follows manage_exit's per-tick new_peak."""
+    from app.trade_manager import track_peaks_batch
 
-def test_quantity_calculation_partial_sell(trade_manager, base_position):
-    """Test that partial sell quantity is calculated correctly (40%)."""
-    # Different position sizes
-    test_cases = [
-        (10, 4),   # 10 shares -> 4 shares (40%)
-        (100, 40), # 100 shares -> 40 shares (40%)
-        (7, 2),    # 7 shares -> 2 shares (40% = 2.8, rounded down)
-    ]
+    ticks = [101.0, 99.0, 103.5, 102.0, 107.0, 104.0]
 
-    for quantity, expected_sell in test_cases:
-        base_position.quantity = quantity
-        base_position.partial_sold = False
+    peaks = []
+    for price in ticks:
+        peaks.append(trade_manager.manage_exit(base_position, price)["new_peak"])
+        base_position.current_price = peaks[-1]
 
-        result = trade_manager.manage_exit(base_position, 108.0)
+    batch = track_peaks_batch([ticks, ticks], start_peaks=[100.0, 105.0])
 
-        assert result["sell_qty"] == expected_sell
+    assert batch[0].tolist() == peaks
+    assert batch[1].tolist() == [105.0, 105.0, 105.0, 105.0, 107.0, 107.0]
 
 
 @pytest.mark.skip(reason="System only supports long positions (buy on news)")
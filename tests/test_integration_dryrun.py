@@ -3,29 +3,74 @@ Integration test for full pipeline in DRYRUN mode.
 Tests end-to-end flow without placing real orders.
 """
 
+import asyncio
 import pytest
+import pytest_asyncio
 import os
 from datetime import datetime, timezone
 
+from app.config import get_settings
 from app.main import AutoTrader
 from app.schemas import RunRecord
 
 
+# Environment for DRYRUN testing (DB_PATH is set per fixture)
+DRYRUN_ENV = {
+    "RUN_MODE": "DRYRUN",
+    "ANTHROPIC_API_KEY": os.getenv("ANTHROPIC_API_KEY", "test_key"),
+    "ALPACA_API_KEY": "test_alpaca_key",
+    "ALPACA_SECRET_KEY": "test_alpaca_secret",
+    "TICKER_WHITELIST": "AAPL,TSLA",
+    "CYCLE_MINUTES": "5",
+}
+
+
 @pytest.fixture
-def setup_dryrun_env(monkeypatch):
-    """Set up environment for DRYRUN testing."""
-    monkeypatch.setenv("RUN_MODE", "DRYRUN")
-    monkeypatch.setenv("ANTHROPIC_API_KEY", os.getenv("ANTHROPIC_API_KEY", "test_key"))
-    monkeypatch.setenv("ALPACA_API_KEY", "test_alpaca_key")
-    monkeypatch.setenv("ALPACA_SECRET_KEY", "test_alpaca_secret")
-    monkeypatch.setenv("TICKER_WHITELIST", "AAPL,TSLA")
-    monkeypatch.setenv("CYCLE_MINUTES", "5")
-    monkeypatch.setenv("DB_PATH", "data/test_autotrader.db")
+def setup_dryrun_env(monkeypatch, tmp_path):
+    """Set up environment for DRYRUN testing, with a database private to the test."""
+    for name, value in DRYRUN_ENV.items():
+        monkeypatch.setenv(name, value)
+    # Per-test path: tests (and pytest-xdist workers) never share a database
+    monkeypatch.setenv("DB_PATH", str(tmp_path / "autotrader.db"))
+
+    # Settings are cached; rebuild them from this environment, then drop them
+    get_settings.cache_clear()
+    yield
+    get_settings.cache_clear()
+
+
+@pytest.fixture(scope="module")
+def event_loop():
+    """
+    One event loop for the whole module.
+
+    The shared trader's sessions, locks and queues are bound to the loop they
+    were first used on, so every test (and the teardown) must run on it.
+    """
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest_asyncio.fixture(scope="module")
+async def trader(tmp_path_factory):
+    """One DRYRUN AutoTrader (with its own database) shared by the module's tests."""
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        for name, value in DRYRUN_ENV.items():
+            monkeypatch.setenv(name, value)
+        monkeypatch.setenv("DB_PATH", str(tmp_path_factory.mktemp("trader") / "autotrader.db"))
+        get_settings.cache_clear()
+
+        trader = AutoTrader()
+        yield trader
+
+        await trader.aclose()
+    get_settings.cache_clear()
 
 
 @pytest.mark.asyncio
 @pytest.mark.integration
-async def test_full_pipeline_dryrun(setup_dryrun_env):
+async def test_full_pipeline_dryrun(trader):
     """
     Test complete pipeline in DRYRUN mode.
 
@@ -35,8 +80,6 @@ async def test_full_pipeline_dryrun(setup_dryrun_env):
     3. Verifies no errors occurred
     4. Checks that run record was created
     """
-    trader = AutoTrader()
-
     # Run one cycle
     run_record = await trader.run_cycle()
 
@@ -54,10 +97,8 @@ async def test_full_pipeline_dryrun(setup_dryrun_env):
 
 
 @pytest.mark.asyncio
-async def test_trader_initialization(setup_dryrun_env):
+async def test_trader_initialization(trader):
     """Test that AutoTrader initializes all components."""
-    trader = AutoTrader()
-
     assert trader.storage is not None
     assert trader.rss_fetcher is not None
     assert trader.llm_interpreter is not None
@@ -69,10 +110,8 @@ async def test_trader_initialization(setup_dryrun_env):
 
 
 @pytest.mark.asyncio
-async def test_since_time_calculation(setup_dryrun_env):
+async def test_since_time_calculation(trader):
     """Test that since time is calculated correctly."""
-    trader = AutoTrader()
-
     since_time = trader._get_since_time()
 
     assert since_time is not None
@@ -84,11 +123,12 @@ def test_storage_initialization(setup_dryrun_env):
     """Test that storage initializes database correctly."""
     from app.storage import Storage
 
-    storage = Storage("data/test_autotrader.db")
+    db_path = os.environ["DB_PATH"]
+    storage = Storage(db_path)
 
     # Verify tables exist
     import sqlite3
-    conn = sqlite3.connect("data/test_autotrader.db")
+    conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
 
     cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
@@ -101,3 +141,82 @@ def test_storage_initialization(setup_dryrun_env):
     assert "runs" in tables
 
     conn.close()
+
+
+@pytest.mark.asyncio
+async def test_skip_signal_rejected_without_validation_error(trader):
+    """Test that a SKIP pre-signal yields a rejected approval (zero stop/TP)."""
+    from app.schemas import EventCard, MarketState, PortfolioState
+
+    now = datetime.now(timezone.utc)
+    event = EventCard(
+        event_id="skip1", tickers=["AAPL"], headline="Rumor about Apple",
+        published_at=now, category="rumor", sentiment=0.9, reliability=0.9,
+        key_facts=[], session="regular", cluster_id="c1", source="Test"
+    )
+    market = MarketState(
+        ticker="AAPL", ts=now, mid=175.0, spread_bp=5, dP_1m=0.5, dP_5m=2.0,
+        vol_ratio_1m=4.0, rsi_3=60.0, vwap_dev_bp=10, session="regular"
+    )
+    portfolio = PortfolioState(
+        equity=100000.0, cash=100000.0, positions_count=0, daily_pnl=0.0, daily_pnl_pct=0.0
+    )
+
+    pre_signal = trader.rule_engine.evaluate(event, market)
+    approved = await trader.risk_guard.approve_signal(pre_signal, market, portfolio)
+
+    assert pre_signal.action == "SKIP"
+    assert approved.approved is False
+    assert approved.hard_stop_bp == 0
+    assert approved.notes == ["Signal was SKIP"]
+
+
+@pytest.mark.asyncio
+async def test_reserved_entry_counts_toward_portfolio_limits(trader):
+    """Test that an entry still executing counts as an open position."""
+    from app.config import SECTOR_MAP
+
+    before = await trader.risk_guard.get_portfolio_state()
+    reservation = trader.risk_guard.reserve_entry("AAPL", 5000.0)
+    try:
+        during = await trader.risk_guard.get_portfolio_state()
+    finally:
+        trader.risk_guard.release_entry(reservation)
+    after = await trader.risk_guard.get_portfolio_state()
+
+    sector = SECTOR_MAP.get("AAPL", "Unknown")
+    assert during.positions_count == before.positions_count + 1
+    assert during.sector_exposure[sector] == pytest.approx(
+        before.sector_exposure.get(sector, 0.0) + 5000.0 / before.equity
+    )
+    assert after.positions_count == before.positions_count
+
+
+@pytest.mark.asyncio
+async def test_partial_ticker_failure_still_marks_event_processed(trader, monkeypatch):
+    """Test that one failing ticker doesn't leave an event (and its fills) to be retried."""
+    from app.schemas import EventCard
+
+    event = EventCard(
+        event_id="partial1", tickers=["AAPL", "TSLA"], headline="Apple and Tesla news",
+        published_at=datetime.now(timezone.utc), category="guidance", sentiment=0.9,
+        reliability=0.9, key_facts=[], session="regular", cluster_id="c2", source="Test"
+    )
+
+    async def no_prefetch(tickers):
+        return {}
+
+    async def process_ticker(event, ticker):
+        if ticker == "TSLA":
+            raise RuntimeError("quote feed down")
+        return 1
+
+    marked = []
+    monkeypatch.setattr(trader.market_scanner, "get_market_states", no_prefetch)
+    monkeypatch.setattr(trader, "_process_ticker", process_ticker)
+    monkeypatch.setattr(trader.storage, "mark_event_processed", marked.append)
+
+    errors = []
+    assert await trader._process_event(event, errors) == 1
+    assert marked == ["partial1"]
+    assert errors == ["Event partial1 TSLA: quote feed down"]
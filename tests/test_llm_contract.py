@@ -5,6 +5,7 @@ Ensures LLM output conforms to expected EventCard schema.
 
 import pytest
 from datetime import datetime, timezone
+from types import SimpleNamespace
 
 from app.llm_interpreter import LLMInterpreter
 from app.schemas import RSSFeedItem, EventCard
@@ -45,15 +46,59 @@ SAMPLE_HEADLINES = [
 ]
 
 
+# Recorded tool-call arguments replayed by mock_anthropic, keyed by a
+# (case-insensitive) headline substring; the first match wins
+RECORDED_RESPONSES = [
+    ("earnings", {"category": "earnings", "sentiment": 0.8, "reliability": 0.9,
+                  "key_facts": ["Quarterly results beat estimates"]}),
+    ("fda", {"category": "FDA", "sentiment": 0.7, "reliability": 0.85,
+             "key_facts": ["FDA approval granted"]}),
+    ("recall", {"category": "regulatory", "sentiment": -0.6, "reliability": 0.8,
+                "key_facts": ["Vehicle recall over safety issues"]}),
+    ("reportedly", {"category": "rumor", "sentiment": 0.2, "reliability": 0.4,
+                    "key_facts": ["Unconfirmed talks"]}),
+    ("record profits", {"category": "other", "sentiment": 0.75, "reliability": 0.7,
+                        "key_facts": ["Record profits reported"]}),
+]
+DEFAULT_RESPONSE = {"category": "other", "sentiment": 0.0, "reliability": 0.3, "key_facts": []}
+
+
 @pytest.fixture
 def llm_interpreter():
     """Create LLM interpreter instance."""
     return LLMInterpreter()
 
 
+@pytest.fixture
+def mock_anthropic(llm_interpreter, monkeypatch):
+    """
+    Replace the Anthropic client with a stub replaying RECORDED_RESPONSES.
+
+    Returns:
+        List of the keyword arguments of every messages.create call
+    """
+    calls = []
+
+    async def fake_create(**kwargs):
+        calls.append(kwargs)
+        prompt = kwargs["messages"][0]["content"]
+        headline = prompt.split("Headline: ", 1)[1].split("\n", 1)[0].lower()
+        payload = next((p for key, p in RECORDED_RESPONSES if key in headline), DEFAULT_RESPONSE)
+
+        block = SimpleNamespace(type="tool_use", name="emit_event", input=dict(payload))
+        response = SimpleNamespace(content=[block])
+        return SimpleNamespace(headers={}, parse=lambda: response)
+
+    client = SimpleNamespace(
+        messages=SimpleNamespace(with_raw_response=SimpleNamespace(create=fake_create))
+    )
+    monkeypatch.setattr(llm_interpreter, "client", client)
+    return calls
+
+
 @pytest.mark.asyncio
-@pytest.mark.parametrize("sample", SAMPLE_HEADLINES[:3])  # Test first 3 to limit API calls
-async def test_llm_interpretation_schema(llm_interpreter, sample):
+@pytest.mark.parametrize("sample", SAMPLE_HEADLINES[:3])
+async def test_llm_interpretation_schema(llm_interpreter, mock_anthropic, sample):
     """Test that LLM output conforms to EventCard schema."""
     # Create RSS item
     item = RSSFeedItem(
@@ -80,10 +125,13 @@ async def test_llm_interpretation_schema(llm_interpreter, sample):
     assert 0.0 <= event.reliability <= 1.0
     assert isinstance(event.key_facts, list)
     assert event.session in ["pre", "regular", "after"]
+    assert event.category == sample["expected_category"]
+    low, high = sample["expected_sentiment_range"]
+    assert low <= event.sentiment <= high
 
 
 @pytest.mark.asyncio
-async def test_llm_sentiment_range(llm_interpreter):
+async def test_llm_sentiment_range(llm_interpreter, mock_anthropic):
     """Test that sentiment is in correct range for positive news."""
     item = RSSFeedItem(
         source="Test",
@@ -101,7 +149,7 @@ async def test_llm_sentiment_range(llm_interpreter):
 
 
 @pytest.mark.asyncio
-async def test_llm_reliability_for_rumor(llm_interpreter):
+async def test_llm_reliability_for_rumor(llm_interpreter, mock_anthropic):
     """Test that rumors have lower reliability scores."""
     item = RSSFeedItem(
         source="Test",
@@ -116,7 +164,6 @@ async def test_llm_reliability_for_rumor(llm_interpreter):
 
     assert event is not None
     # Rumors should have lower reliability
-    # Note: This is a heuristic - LLM may vary
     assert event.category == "rumor" or event.reliability < 0.7
 
 
@@ -128,20 +175,108 @@ async def test_llm_retry_on_failure(llm_interpreter):
     assert llm_interpreter is not None
 
 
-def test_json_extraction():
+@pytest.mark.parametrize("content, category", [
+    # Plain JSON
+    ('{"category": "earnings", "sentiment": 0.8, "reliability": 0.9, "key_facts": []}', "earnings"),
+    # JSON in code block
+    ('```json\n{"category": "FDA", "sentiment": 0.7, "reliability": 0.85, "key_facts": []}\n```', "FDA"),
+    # JSON in plain code block
+    ('```\n{"category": "M&A", "sentiment": 0.6, "reliability": 0.75, "key_facts": []}\n```', "M&A"),
+])
+def test_json_extraction(content, category):
     """Test JSON extraction from various formats."""
-    from app.llm_interpreter import LLMInterpreter
-
     interp = LLMInterpreter()
 
-    # Plain JSON
-    result = interp._extract_json('{"category": "earnings", "sentiment": 0.8, "reliability": 0.9, "key_facts": []}')
-    assert result["category"] == "earnings"
+    result = interp._extract_json(content)
+    assert result["category"] == category
 
-    # JSON in code block
-    result = interp._extract_json('```json\n{"category": "FDA", "sentiment": 0.7, "reliability": 0.85, "key_facts": []}\n```')
-    assert result["category"] == "FDA"
 
-    # JSON in plain code block
-    result = interp._extract_json('```\n{"category": "M&A", "sentiment": 0.6, "reliability": 0.75, "key_facts": []}\n```')
-    assert result["category"] == "M&A"
+@pytest.mark.asyncio
+async def test_interpret_cache_skips_repeat_llm_calls(llm_interpreter):
+    """Test that republished headlines are served from the cache."""
+    calls = []
+
+    async def fake_create(**kwargs):
+        calls.append(kwargs)
+        block = SimpleNamespace(
+            type="tool_use",
+            name="emit_event",
+            input={"category": "earnings", "sentiment": 0.8, "reliability": 0.9, "key_facts": []}
+        )
+        response = SimpleNamespace(content=[block])
+        return SimpleNamespace(headers={}, parse=lambda: response)
+
+    llm_interpreter.client = SimpleNamespace(
+        messages=SimpleNamespace(with_raw_response=SimpleNamespace(create=fake_create))
+    )
+
+    def make_item(headline, source):
+        return RSSFeedItem(
+            source=source,
+            headline=headline,
+            url="https://example.com",
+            published_at=datetime.now(timezone.utc),
+            snippet="Apple beat estimates.",
+            cluster_id="cache_test"
+        )
+
+    first = await llm_interpreter.interpret(make_item("Apple beats Q4 estimates", "Feed A"))
+    second = await llm_interpreter.interpret(make_item("APPLE beats Q4 estimates!", "Feed B"))
+
+    assert len(calls) == 1
+    assert first.category == second.category == "earnings"
+    assert second.source == "Feed B"
+    assert first.event_id != second.event_id
+
+
+def test_rate_limit_headers_pause_only_when_budget_low(llm_interpreter):
+    """Test that rate-limit headers only pause requests near exhaustion."""
+    import time
+    from datetime import timedelta
+
+    reset = (datetime.now(timezone.utc) + timedelta(seconds=20)).isoformat()
+
+    llm_interpreter._update_rate_limit({
+        "anthropic-ratelimit-requests-remaining": "40",
+        "anthropic-ratelimit-requests-reset": reset
+    })
+    assert llm_interpreter._paused_until == 0.0
+
+    # A malformed budget header is ignored rather than failing the response
+    llm_interpreter._update_rate_limit({
+        "anthropic-ratelimit-requests-remaining": "n/a",
+        "anthropic-ratelimit-requests-reset": reset
+    })
+    assert llm_interpreter._paused_until == 0.0
+
+    llm_interpreter._update_rate_limit({
+        "anthropic-ratelimit-requests-remaining": "2",
+        "anthropic-ratelimit-requests-reset": reset
+    })
+    assert 15 < llm_interpreter._paused_until - time.monotonic() <= 20
+
+
+def test_ticker_extraction_matches_whole_words():
+    """Test that tickers only match as whole words, in order of appearance."""
+    from app.utils import extract_tickers_from_text
+
+    whitelist = ["AAPL", "META", "NVDA"]
+
+    assert extract_tickers_from_text("Nvda and Apple (AAPL) rally; NVDA up", whitelist) == ["NVDA", "AAPL"]
+    assert extract_tickers_from_text("METAL prices climb", whitelist) == []
+    assert extract_tickers_from_text("Meta beats estimates", []) == []
+
+
+def test_json_extraction_ignores_surrounding_prose():
+    """Test that text around the first JSON object is ignored."""
+    interp = LLMInterpreter()
+
+    result = interp._extract_json(
+        'Here is the analysis: {"category": "guidance", "sentiment": 0.4, '
+        '"reliability": 0.8, "key_facts": ["raised {FY} outlook"]} Let me know if you need more.'
+    )
+    assert result["category"] == "guidance"
+    assert result["key_facts"] == ["raised {FY} outlook"]
+
+    with pytest.raises(ValueError):
+        interp._extract_json("No JSON here")
@@ -0,0 +1,35 @@
+"""
+Tests for market state caching in the market scanner.
+No network access; the Alpaca fetch is stubbed.
+"""
+
+import pytest
+
+from app.market_scanner import MarketScanner
+from app.schemas import MarketState
+from app.utils import get_utc_now
+
+
+@pytest.mark.asyncio
+async def test_max_age_zero_bypasses_cached_state(monkeypatch):
+    """Test that exit monitoring (max_age=0) never reuses a cached quote."""
+    scanner = MarketScanner()
+    fetches = []
+
+    async def fake_fetch(tickers):
+        fetches.append(list(tickers))
+        mid = 100.0 + len(fetches)
+        return {t: MarketState(
+            ticker=t, ts=get_utc_now(), mid=mid, spread_bp=5, dP_1m=0.0, dP_5m=0.0,
+            vol_ratio_1m=1.0, rsi_3=50.0, vwap_dev_bp=0, session="regular"
+        ) for t in tickers}
+
+    monkeypatch.setattr(scanner, "_fetch_market_states", fake_fetch)
+
+    first = await scanner.get_market_states(["AAPL"])
+    cached = await scanner.get_market_states(["AAPL"])
+    fresh = await scanner.get_market_states(["AAPL"], max_age=0)
+
+    assert first["AAPL"].mid == cached["AAPL"].mid == 101.0
+    assert fresh["AAPL"].mid == 102.0
+    assert len(fetches) == 2
@@ -0,0 +1,32 @@
+"""
+Tests for Slack notification batching.
+No network access; the HTTP client is stubbed.
+"""
+
+import asyncio
+import pytest
+
+from app.notifier import Notifier
+
+
+@pytest.mark.asyncio
+async def test_notify_returns_when_slack_post_raises(monkeypatch):
+    """Test that a failing post neither hangs callers nor stops the flusher."""
+    notifier = Notifier()
+    notifier.enabled = True
+    attempts = []
+
+    async def broken_client():
+        attempts.append(1)
+        raise RuntimeError("client unavailable")
+
+    monkeypatch.setattr(notifier, "_get_client", broken_client)
+
+    try:
+        await asyncio.wait_for(notifier.notify_error("Test", "first"), timeout=5)
+        # The flusher survived the failure and serves the next batch
+        await asyncio.wait_for(notifier.notify_error("Test", "second"), timeout=5)
+    finally:
+        await notifier.aclose()
+
+    assert len(attempts) == 2
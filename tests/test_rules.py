@@ -64,8 +64,7 @@ def test_entry_signal_good_conditions(rule_engine, good_event, good_market):
 
 def test_skip_low_sentiment(rule_engine, good_event, good_market):
     """Test that low sentiment triggers SKIP."""
-    bad_event = good_event.model_copy()
-    bad_event.sentiment = 0.3  # Below threshold
+    bad_event = good_event.model_copy(update={"sentiment": 0.3})  # Below threshold
 
     signal = rule_engine.evaluate(bad_event, good_market)
 
@@ -75,8 +74,7 @@ def test_skip_low_sentiment(rule_engine, good_event, good_market):
 
 def test_skip_low_reliability(rule_engine, good_event, good_market):
     """Test that low reliability triggers SKIP."""
-    bad_event = good_event.model_copy()
-    bad_event.reliability = 0.5  # Below threshold
+    bad_event = good_event.model_copy(update={"reliability": 0.5})  # Below threshold
 
     signal = rule_engine.evaluate(bad_event, good_market)
 
@@ -86,8 +84,7 @@ def test_skip_low_reliability(rule_engine, good_event, good_market):
 
 def test_skip_rumor_category(rule_engine, good_event, good_market):
     """Test that rumor category is skipped."""
-    rumor_event = good_event.model_copy()
-    rumor_event.category = "rumor"
+    rumor_event = good_event.model_copy(update={"category": "rumor"})
 
     signal = rule_engine.evaluate(rumor_event, good_market)
 
@@ -97,8 +94,7 @@ def test_skip_rumor_category(rule_engine, good_event, good_market):
 
 def test_skip_excessive_spike(rule_engine, good_event, good_market):
     """Test that excessive 1m spike triggers SKIP."""
-    spiked_market = good_market.model_copy()
-    spiked_market.dP_1m = 6.0  # Above threshold
+    spiked_market = good_market.model_copy(update={"dP_1m": 6.0})  # Above threshold
 
     signal = rule_engine.evaluate(good_event, spiked_market)
 
@@ -108,8 +104,7 @@ def test_skip_excessive_spike(rule_engine, good_event, good_market):
 
 def test_skip_wide_spread(rule_engine, good_event, good_market):
     """Test that wide spread triggers SKIP."""
-    wide_spread_market = good_market.model_copy()
-    wide_spread_market.spread_bp = 100  # Above threshold
+    wide_spread_market = good_market.model_copy(update={"spread_bp": 100})  # Above threshold
 
     signal = rule_engine.evaluate(good_event, wide_spread_market)
 
@@ -119,8 +114,7 @@ def test_skip_wide_spread(rule_engine, good_event, good_market):
 
 def test_skip_low_volume(rule_engine, good_event, good_market):
     """Test that low volume triggers SKIP."""
-    low_vol_market = good_market.model_copy()
-    low_vol_market.vol_ratio_1m = 1.5  # Below threshold
+    low_vol_market = good_market.model_copy(update={"vol_ratio_1m": 1.5})  # Below threshold
 
     signal = rule_engine.evaluate(good_event, low_vol_market)
 
@@ -130,8 +124,7 @@ def test_skip_low_volume(rule_engine, good_event, good_market):
 
 def test_skip_overbought_rsi(rule_engine, good_event, good_market):
     """Test that overbought RSI triggers SKIP."""
-    overbought_market = good_market.model_copy()
-    overbought_market.rsi_3 = 80  # Above threshold
+    overbought_market = good_market.model_copy(update={"rsi_3": 80})  # Above threshold
 
     signal = rule_engine.evaluate(good_event, overbought_market)
 
@@ -141,8 +134,7 @@ def test_skip_overbought_rsi(rule_engine, good_event, good_market):
 
 def test_skip_premarket_session(rule_engine, good_event, good_market):
     """Test that pre-market session is skipped."""
-    premarket = good_market.model_copy()
-    premarket.session = "pre"
+    premarket = good_market.model_copy(update={"session": "pre"})
 
     signal = rule_engine.evaluate(good_event, premarket)
 
@@ -152,8 +144,7 @@ def test_skip_premarket_session(rule_engine, good_event, good_market):
 
 def test_skip_price_change_too_small(rule_engine, good_event, good_market):
     """Test that insufficient price movement triggers SKIP."""
-    flat_market = good_market.model_copy()
-    flat_market.dP_5m = 0.5  # Below minimum
+    flat_market = good_market.model_copy(update={"dP_5m": 0.5})  # Below minimum
 
     signal = rule_engine.evaluate(good_event, flat_market)
 
@@ -162,8 +153,7 @@ def test_skip_price_change_too_small(rule_engine, good_event, good_market):
 
 def test_skip_price_change_too_large(rule_engine, good_event, good_market):
     """Test that excessive price movement triggers SKIP."""
-    runaway_market = good_market.model_copy()
-    runaway_market.dP_5m = 5.0  # Above maximum
+    runaway_market = good_market.model_copy(update={"dP_5m": 5.0})  # Above maximum
 
     signal = rule_engine.evaluate(good_event, runaway_market)
 
@@ -180,3 +170,71 @@ def test_metrics_populated(rule_engine, good_event, good_market):
     assert "vol_ratio" in signal.metrics
     assert "spread_bp" in signal.metrics
     assert "rsi_3" in signal.metrics
+
+
+def test_non_verbose_stops_at_first_failure(rule_engine, good_event, good_market):
+    """Test that verbose=False reports only the first failed entry check."""
+    bad_market = good_market.model_copy(update={"vol_ratio_1m": 1.5, "spread_bp": 100})
+
+    full = rule_engine.evaluate(good_event, bad_market)
+    short = rule_engine.evaluate(good_event, bad_market, verbose=False)
+
+    assert full.action == short.action == "SKIP"
+    assert any("spread" in r.lower() for r in full.reasons)
+    assert not any("spread" in r.lower() for r in short.reasons)
+    assert any("volume" in r.lower() for r in short.reasons)
+    assert rule_engine.evaluate(good_event, good_market, verbose=False).action == "ENTRY"
+
+
+def test_evaluate_batch_matches_evaluate(rule_engine, good_event, good_market):
+    """Test that batch evaluation agrees with per-item evaluation."""
+    from app.rule_engine import BATCH_CHECKS
+
+    markets = []
+    for field, value in [("dP_1m", 6.0), ("session", "pre"), ("spread_bp", 100),
+                         ("vol_ratio_1m", 1.5), ("rsi_3", 80), ("dP_5m", 5.0)]:
+        markets.append(good_market.model_copy(update={field: value}))
+    markets.append(good_market)
+
+    events = [good_event] * len(markets)
+    entry_mask, failed_check = rule_engine.evaluate_batch(events, markets)
+
+    expected = [rule_engine.evaluate(e, m).action == "ENTRY" for e, m in zip(events, markets)]
+    assert entry_mask.tolist() == expected
+    assert [BATCH_CHECKS[i] for i in failed_check[:-1]] == [
+        "spike_1m", "session", "spread", "vol_ratio", "rsi_3", "dP_5m_max"
+    ]
+    assert failed_check[-1] == -1
+
+    # Columnar input gives the same result without the model lists
+    from app.schemas import EventBatch, MarketBatch
+    batch_mask, batch_failed = rule_engine.evaluate_batch(
+        EventBatch.from_events(events), MarketBatch.from_markets(markets)
+    )
+    assert batch_mask.tolist() == entry_mask.tolist()
+    assert batch_failed.tolist() == failed_check.tolist()
+
+
+def test_reload_registration_does_not_keep_engine_alive(tmp_path):
+    """Test that rules reload callbacks don't pin collected components in memory."""
+    import gc
+    import weakref
+    from app.config import RulesConfig
+
+    config_path = tmp_path / "rules.yaml"
+    config_path.write_text("entry: {}\n")
+    rules = RulesConfig(str(config_path))
+
+    engine = RuleEngine()
+    engine.rules = rules
+    rules.on_reload(engine.refresh_rules)
+    collected = weakref.ref(engine)
+
+    del engine
+    gc.collect()
+    config_path.write_text("entry: {min_reliability: 0.5}\n")
+    rules._mtime_ns = -1
+    rules.reload()
+
+    assert collected() is None
+    assert rules._reload_callbacks == []
@@ -4,92 +4,100 @@ Tests that database schema matches code expectations.
 """
 
 import sqlite3
+import uuid
 import pytest
-import tempfile
-import os
 from app.storage import Storage
 
 
+def _memory_db_uri(prefix: str) -> str:
+    """Unique shared-cache in-memory database URI (lives while a connection is open)."""
+    return f"file:{prefix}_{uuid.uuid4().hex}?mode=memory&cache=shared"
+
+
 @pytest.fixture
 def storage():
-    """Create temporary file storage for testing."""
-    # Use temporary file instead of :memory: to persist across connections
-    fd, db_path = tempfile.mkstemp(suffix=".db")
-    os.close(fd)
-
-    storage = Storage(db_path=db_path)
+    """Create in-memory storage for testing."""
+    # Shared cache, unlike plain :memory:, lets other connections see the same DB
+    storage = Storage(db_path=_memory_db_uri("schema_test"))
 
     yield storage
 
-    # Cleanup
-    try:
-        os.remove(db_path)
-    except:
-        pass
+    storage.close()
 
 
-def test_events_table_has_processed_column(storage):
-    """Test that events table has processed column."""
-    with sqlite3.connect(storage.db_path) as conn:
+@pytest.fixture(scope="module")
+def schema_snapshot():
+    """
+    Introspect a freshly initialized database once for the read-only schema tests.
+
+    Returns:
+        {"columns": {table: set of column names}, "indexes": set of index names}
+    """
+    storage = Storage(db_path=_memory_db_uri("schema_snapshot"))
+
+    with sqlite3.connect(storage.db_path, uri=True) as conn:
         cursor = conn.cursor()
-        cursor.execute("PRAGMA table_info(events)")
-        columns = {row[1] for row in cursor.fetchall()}
+        cursor.execute("SELECT name, type FROM sqlite_master WHERE name NOT LIKE 'sqlite_%'")
+        objects = cursor.fetchall()
+
+        columns = {}
+        for name, obj_type in objects:
+            if obj_type == "table":
+                # table_xinfo also lists generated columns
+                cursor.execute(f"PRAGMA table_xinfo({name})")
+                columns[name] = {row[1] for row in cursor.fetchall()}
+
+    snapshot = {
+        "columns": columns,
+        "indexes": {name for name, obj_type in objects if obj_type == "index"},
+    }
 
-    assert "processed" in columns, "events table should have processed column"
+    storage.close()
+    return snapshot
 
 
-def test_events_processed_index_exists(storage):
-    """Test that index on events.processed exists."""
-    with sqlite3.connect(storage.db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='index' AND name='idx_events_processed'")
-        result = cursor.fetchone()
+def test_events_table_has_processed_column(schema_snapshot):
+    """Test that events table has processed column."""
+    assert "processed" in schema_snapshot["columns"]["events"], "events table should have processed column"
 
-    assert result is not None, "idx_events_processed index should exist"
 
+def test_events_processed_index_exists(schema_snapshot):
+    """Test that index on events.processed exists."""
+    assert "idx_events_processed" in schema_snapshot["indexes"], "idx_events_processed index should exist"
 
-def test_positions_table_has_current_price_column(storage):
-    """Test that positions table has current_price column."""
-    with sqlite3.connect(storage.db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute("PRAGMA table_info(positions)")
-        columns = {row[1] for row in cursor.fetchall()}
 
-    assert "current_price" in columns, "positions table should have current_price column"
+def test_positions_table_has_current_price_column(schema_snapshot):
+    """Test that positions table has current_price column."""
+    assert "current_price" in schema_snapshot["columns"]["positions"], \
+        "positions table should have current_price column"
 
 
-def test_positions_table_has_partial_sold_column(storage):
+def test_positions_table_has_partial_sold_column(schema_snapshot):
     """Test that positions table has partial_sold column."""
-    with sqlite3.connect(storage.db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute("PRAGMA table_info(positions)")
-        columns = {row[1] for row in cursor.fetchall()}
-
-    assert "partial_sold" in columns, "positions table should have partial_sold column"
+    assert "partial_sold" in schema_snapshot["columns"]["positions"], \
+        "positions table should have partial_sold column"
 
 
-def test_all_required_indexes_exist(storage):
+def test_all_required_indexes_exist(schema_snapshot):
     """Test that all required indexes exist."""
     expected_indexes = {
         "idx_events_published",
         "idx_events_cluster",
         "idx_events_processed",
+        "idx_events_unprocessed",
         "idx_signals_event",
         "idx_orders_signal",
         "idx_positions_status",
+        "idx_positions_open",
+        "idx_positions_entry_epoch",
         "idx_runs_started"
     }
 
-    with sqlite3.connect(storage.db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='index'")
-        actual_indexes = {row[0] for row in cursor.fetchall() if not row[0].startswith("sqlite_")}
-
-    missing_indexes = expected_indexes - actual_indexes
+    missing_indexes = expected_indexes - schema_snapshot["indexes"]
     assert not missing_indexes, f"Missing indexes: {missing_indexes}"
 
 
-def test_events_table_schema_complete(storage):
+def test_events_table_schema_complete(schema_snapshot):
     """Test that events table has all required columns."""
     required_columns = {
         "event_id", "cluster_id", "headline", "category", "sentiment",
@@ -97,29 +105,20 @@ def test_events_table_schema_complete(storage):
         "url", "key_facts", "created_at", "processed"
     }
 
-    with sqlite3.connect(storage.db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute("PRAGMA table_info(events)")
-        actual_columns = {row[1] for row in cursor.fetchall()}
-
-    missing_columns = required_columns - actual_columns
+    missing_columns = required_columns - schema_snapshot["columns"]["events"]
     assert not missing_columns, f"Missing columns in events table: {missing_columns}"
 
 
-def test_positions_table_schema_complete(storage):
+def test_positions_table_schema_complete(schema_snapshot):
     """Test that positions table has all required columns."""
     required_columns = {
         "position_id", "ticker", "entry_price", "quantity", "entry_time",
         "exit_time", "exit_price", "event_id", "order_id", "stop_loss",
-        "take_profit", "current_price", "partial_sold", "realized_pnl", "status"
+        "take_profit", "current_price", "partial_sold", "realized_pnl", "status",
+        "entry_time_epoch"
     }
 
-    with sqlite3.connect(storage.db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute("PRAGMA table_info(positions)")
-        actual_columns = {row[1] for row in cursor.fetchall()}
-
-    missing_columns = required_columns - actual_columns
+    missing_columns = required_columns - schema_snapshot["columns"]["positions"]
     assert not missing_columns, f"Missing columns in positions table: {missing_columns}"
 
 
@@ -132,9 +131,76 @@ def test_migration_idempotency(storage):
     assert storage2 is not None
 
     # Verify schema is still correct
-    with sqlite3.connect(storage2.db_path) as conn:
+    with sqlite3.connect(storage2.db_path, uri=True) as conn:
         cursor = conn.cursor()
         cursor.execute("PRAGMA table_info(events)")
         columns = {row[1] for row in cursor.fetchall()}
 
     assert "processed" in columns
+
+
+def test_events_exist_bulk_lookup(storage):
+    """Test that events_exist returns only cluster IDs already stored."""
+    from datetime import datetime, timezone
+    from app.schemas import EventCard
+
+    for i in range(3):
+        storage.save_event(EventCard(
+            event_id=f"evt{i}",
+            tickers=["AAPL"],
+            headline=f"Headline {i}",
+            published_at=datetime.now(timezone.utc),
+            category="earnings",
+            sentiment=0.5,
+            reliability=0.9,
+            session="regular",
+            cluster_id=f"cluster{i}"
+        ))
+
+    # More IDs than one query chunk, with duplicates
+    lookup = [f"missing{i}" for i in range(600)] + ["cluster0", "cluster2", "cluster2"]
+
+    assert storage.events_exist(lookup) == {"cluster0", "cluster2"}
+    assert storage.events_exist([]) == set()
+
+
+def test_load_positions_for_exit_scan(storage):
+    """Test that open positions load as columns with SQLite-computed entry epochs."""
+    from datetime import datetime, timezone
+    from app.schemas import Position
+
+    entry_time = datetime(2024, 1, 2, 15, 30, 45, 123456, tzinfo=timezone.utc)
+    for i, peak in enumerate([None, 112.5]):
+        storage.save_position(Position(
+            ticker="AAPL", entry_price=100.0 + i, quantity=10 * (i + 1), entry_time=entry_time,
+            event_id=f"evt{i}", order_id=f"order{i}", stop_loss=96.0, take_profit=110.0,
+            current_price=peak
+        ))
+    storage.close_position(order_id="order1", exit_price=105.0, exit_time=entry_time, realized_pnl=40.0)
+    storage.save_position(Position(
+        ticker="TSLA", entry_price=200.0, quantity=5, entry_time=entry_time,
+        event_id="evt2", order_id="order2", stop_loss=190.0, take_profit=220.0, current_price=210.0
+    ))
+
+    scan = storage.load_positions_for_exit_scan()
+
+    assert scan["order_id"].tolist() == ["order0", "order2"]
+    assert scan["ticker"].tolist() == ["AAPL", "TSLA"]
+    assert scan["entry_epoch"].tolist() == [int(entry_time.timestamp())] * 2
+    assert scan["current_price"].tolist() == [100.0, 210.0]
+    assert scan["quantity"].tolist() == [10, 5]
+    assert scan["partial_sold"].tolist() == [False, False]
+
+
+def test_wal_mode_enabled(tmp_path):
+    """Test that file databases use WAL journaling with synchronous=NORMAL."""
+    storage = Storage(db_path=str(tmp_path / "wal.db"))
+
+    with storage._connect() as conn:
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+
+    storage.close()
+
+    # journal_mode=WAL is persistent: any later connection sees it
+    with sqlite3.connect(storage.db_path) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"